@@ -0,0 +1,97 @@
+"""Poll interval learned from when schedules changed before.
+
+Past change times (HistoryStore rows or the `changes` list in
+last_state.json) are binned by half-hour of the Kyiv day, weighted so that
+recent weeks count more. The interval is interpolated geometrically between
+`min_interval` (the busiest bin, e.g. evening releases of tomorrow's table)
+and `max_interval` (bins where nothing was ever published). Right after a
+change the interval drops back to the minimum, since revisions cluster, and
+it doubles for every quiet hour after that. A long interval never
+skips past the start of a busier bin.
+"""
+import math
+from datetime import datetime, timedelta, timezone
+from typing import Iterable, List, Optional
+
+from http_fetch import kyiv_tz
+
+BINS_PER_DAY = 48
+BIN_SECONDS = 86400 // BINS_PER_DAY
+
+
+def parse_time(value: str) -> Optional[datetime]:
+	try:
+		dt = datetime.fromisoformat(value)
+	except (TypeError, ValueError):
+		return None
+	return dt if dt.tzinfo else dt.replace(tzinfo=timezone.utc)
+
+
+class AdaptiveSchedule:
+	def __init__(
+		self,
+		change_times: Iterable[str] = (),
+		min_interval: int = 60,
+		max_interval: int = 1800,
+		fallback: int = 300,
+		half_life_days: float = 14.0,
+		min_observations: int = 5,
+	):
+		self.min_interval = min_interval
+		self.max_interval = max(min_interval, max_interval)
+		self.fallback = min(self.max_interval, max(self.min_interval, fallback))
+		self.half_life = half_life_days * 86400
+		self.min_observations = min_observations
+		self.tz = kyiv_tz()
+		self.changes: List[datetime] = []
+		for value in change_times:
+			dt = parse_time(value)
+			if dt is not None:
+				self.changes.append(dt)
+		self.changes.sort()
+
+	def observe(self, when: Optional[datetime] = None) -> None:
+		self.changes.append(when or datetime.now(timezone.utc))
+
+	def _bin(self, when: datetime) -> int:
+		local = when.astimezone(self.tz)
+		return (local.hour * 3600 + local.minute * 60 + local.second) // BIN_SECONDS
+
+	def bin_weights(self, now: datetime) -> List[float]:
+		"""Decayed change counts per half-hour bin, smoothed over neighbouring bins."""
+		raw = [0.0] * BINS_PER_DAY
+		for dt in self.changes:
+			age = max(0.0, (now - dt).total_seconds())
+			raw[self._bin(dt)] += 0.5 ** (age / self.half_life)
+		return [
+			0.25 * raw[i - 1] + 0.5 * raw[i] + 0.25 * raw[(i + 1) % BINS_PER_DAY]
+			for i in range(BINS_PER_DAY)
+		]
+
+	def _interval_for(self, weight: float, peak: float) -> float:
+		heat = weight / peak if peak > 0 else 0.0
+		return self.max_interval * (self.min_interval / self.max_interval) ** heat
+
+	def next_interval(self, now: Optional[datetime] = None) -> int:
+		"""Seconds to wait before the next poll."""
+		now = now or datetime.now(timezone.utc)
+		if len(self.changes) < self.min_observations:
+			return self.fallback
+		weights = self.bin_weights(now)
+		peak = max(weights)
+		interval = self._interval_for(weights[self._bin(now)], peak)
+
+		# Revisions follow changes: start from the minimum and back off per quiet hour
+		# (capped where it reaches max_interval; 2 ** hours overflows after ~42 quiet days)
+		quiet = (now - self.changes[-1]).total_seconds()
+		doublings = min(max(0.0, quiet / 3600), math.log2(self.max_interval / max(1, self.min_interval)))
+		interval = min(interval, self.min_interval * 2 ** doublings)
+
+		# Do not sleep through the start of a busier bin
+		local = now.astimezone(self.tz)
+		offset = BIN_SECONDS - (local.minute * 60 + local.second) % BIN_SECONDS
+		while offset < interval:
+			upcoming = self._interval_for(weights[self._bin(now + timedelta(seconds=offset))], peak)
+			interval = min(interval, offset + upcoming)
+			offset += BIN_SECONDS
+		return int(math.ceil(min(self.max_interval, max(self.min_interval, interval))))
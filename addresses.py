@@ -0,0 +1,80 @@
+"""Address list loading for batch mode.
+
+Addresses come from `ADDRESSES_FILE` (a JSON list, or one
+`city; street; house` per line) or from the `ADDRESSES` env variable
+(the same JSON list inline). Each JSON item is either an object with
+`city`/`street`/`house_num` keys or a 3-element list.
+"""
+import json
+import os
+from typing import List, NamedTuple, Optional
+
+
+class Address(NamedTuple):
+	city: str
+	street: str
+	house_num: str
+
+	@property
+	def key(self) -> str:
+		"""Stable identifier used to key per-address state."""
+		return "|".join(part.strip().lower() for part in self)
+
+	@property
+	def label(self) -> str:
+		return f"{self.city}, {self.street}, {self.house_num}"
+
+
+def _from_item(item) -> Optional[Address]:
+	if isinstance(item, dict):
+		city = item.get("city") or item.get("CITY") or ""
+		street = item.get("street") or item.get("STREET") or ""
+		house = item.get("house_num") or item.get("house") or item.get("HOUSE_NUM") or ""
+	elif isinstance(item, (list, tuple)) and len(item) == 3:
+		city, street, house = item
+	elif isinstance(item, str) and item.count(";") == 2:
+		city, street, house = item.split(";")
+	else:
+		return None
+	city, street, house = str(city).strip(), str(street).strip(), str(house).strip()
+	if not city or not street or not house:
+		return None
+	return Address(city, street, house)
+
+
+def parse_addresses(text: str) -> List[Address]:
+	"""Parse a JSON list or a `city; street; house` per-line list."""
+	text = text.strip()
+	if not text:
+		return []
+	if text[0] in "[{":
+		data = json.loads(text)
+		items = data.get("addresses", []) if isinstance(data, dict) else data
+	else:
+		items = [line for line in text.splitlines() if line.strip() and not line.lstrip().startswith("#")]
+	return parse_address_items(items)
+
+
+def parse_address_items(items: list) -> List[Address]:
+	"""Addresses from already-split items (objects, 3-lists or `a; b; c` strings), deduplicated."""
+	addresses: List[Address] = []
+	seen = set()
+	for item in items:
+		addr = _from_item(item)
+		if addr is None:
+			print(f"DEBUG: Skipping malformed address entry: {item!r}")
+			continue
+		if addr.key in seen:
+			continue
+		seen.add(addr.key)
+		addresses.append(addr)
+	return addresses
+
+
+def load_addresses(path: Optional[str] = None) -> List[Address]:
+	"""Load the batch address list from a file or the ADDRESSES env variable."""
+	path = path or os.environ.get("ADDRESSES_FILE")
+	if path:
+		with open(path, "r", encoding="utf-8") as f:
+			return parse_addresses(f.read())
+	return parse_addresses(os.environ.get("ADDRESSES", ""))
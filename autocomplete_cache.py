@@ -0,0 +1,72 @@
+"""Persistent cache of resolved autocomplete selections.
+
+After the interactive flow picks city, street and house, the browser session
+stores what the form ended up holding (visible input values plus any hidden
+inputs the site filled in). Later runs restore those values directly and call
+`formSubmit`, skipping the three typing/polling loops. Entries expire after
+AUTOCOMPLETE_CACHE_TTL seconds or as soon as the site rejects them.
+"""
+import json
+import os
+import threading
+import time
+from typing import Optional
+
+
+DEFAULT_AUTOCOMPLETE_CACHE_FILE = os.environ.get("AUTOCOMPLETE_CACHE_FILE", "autocomplete_cache.json")
+# One week by default; street/house lists change rarely
+AUTOCOMPLETE_CACHE_TTL = int(os.environ.get("AUTOCOMPLETE_CACHE_TTL", str(7 * 24 * 3600)))
+
+
+def cache_key(city: str, street: str, house_num: str) -> str:
+	return "|".join(part.strip().lower() for part in (city, street, house_num))
+
+
+class AutocompleteCache:
+	"""JSON-file backed map of address -> restored form state. Thread-safe."""
+
+	def __init__(self, path: str = DEFAULT_AUTOCOMPLETE_CACHE_FILE, ttl: int = AUTOCOMPLETE_CACHE_TTL):
+		self.path = path
+		self.ttl = ttl
+		self._lock = threading.Lock()
+		self._entries = self._load()
+
+	def _load(self) -> dict:
+		try:
+			with open(self.path, "r", encoding="utf-8") as f:
+				data = json.load(f)
+			return data if isinstance(data, dict) else {}
+		except FileNotFoundError:
+			return {}
+		except Exception as e:
+			print(f"DEBUG: Ignoring unreadable autocomplete cache {self.path}: {e}")
+			return {}
+
+	def _save(self) -> None:
+		tmp = f"{self.path}.tmp"
+		with open(tmp, "w", encoding="utf-8") as f:
+			json.dump(self._entries, f, ensure_ascii=False, indent=2)
+		os.replace(tmp, self.path)
+
+	def get(self, city: str, street: str, house_num: str) -> Optional[dict]:
+		key = cache_key(city, street, house_num)
+		with self._lock:
+			entry = self._entries.get(key)
+			if not entry:
+				return None
+			if time.time() - entry.get("stored_at", 0) > self.ttl:
+				del self._entries[key]
+				self._save()
+				return None
+			return entry
+
+	def put(self, city: str, street: str, house_num: str, form_state: dict) -> None:
+		entry = dict(form_state, stored_at=time.time())
+		with self._lock:
+			self._entries[cache_key(city, street, house_num)] = entry
+			self._save()
+
+	def invalidate(self, city: str, street: str, house_num: str) -> None:
+		with self._lock:
+			if self._entries.pop(cache_key(city, street, house_num), None) is not None:
+				self._save()
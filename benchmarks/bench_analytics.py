@@ -0,0 +1,117 @@
+"""Compare ScheduleMatrix aggregates against loops over results[*]['slots'].
+
+Generates synthetic results for --addresses x --dates address-days (default
+5000 x 2 = 10k), checks that both paths agree, and prints per-call timings
+for off hours per address, 'maybe' exposure, the fleet concurrency curve and
+pairwise overlap (on the first --overlap addresses, which is quadratic on
+the list path). Building the matrix from the results and from their packed
+form (as stored in state files and the history DB) is timed as well.
+
+	python benchmarks/bench_analytics.py [--addresses 5000] [--dates 2] [--repeat 5]
+"""
+import argparse
+import os
+import random
+import sys
+import timeit
+from datetime import date, timedelta
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import schedule_analytics  # noqa: E402
+from schedule_analytics import ScheduleMatrix  # noqa: E402
+
+
+def synthetic_results(addresses: int, dates: int, seed: int = 1) -> dict:
+	"""Group-like schedules: long runs of on/off with occasional 'maybe' edges."""
+	rng = random.Random(seed)
+	days = [(date(2026, 1, 12) + timedelta(days=i)).isoformat() for i in range(dates)]
+	results = {}
+	for a in range(addresses):
+		per_day = []
+		for day in days:
+			slots, status = [], "on"
+			for _ in range(48):
+				if rng.random() < 0.1:
+					status = rng.choice(["on", "off", "off", "maybe"])
+				slots.append(status)
+			per_day.append({"date": day, "off_ranges": [], "slots": slots})
+		results[f"city|street {a // 50}|{a}"] = per_day
+	return results
+
+
+# The list-of-strings path, written the way callers do it today
+
+def list_hours(results: dict, statuses) -> dict:
+	return {key: sum(s in statuses for res in rs for s in res["slots"]) * 0.5 for key, rs in results.items()}
+
+
+def list_concurrent(results: dict, dates: list) -> list:
+	curve = {d: [0] * 48 for d in dates}
+	for rs in results.values():
+		for res in rs:
+			row = curve[res["date"]]
+			for i, s in enumerate(res["slots"]):
+				if s == "off":
+					row[i] += 1
+	return [curve[d] for d in dates]
+
+
+def list_overlap(results: dict, keys: list) -> list:
+	flat = {k: [s == "off" for res in results[k] for s in res["slots"]] for k in keys}
+	return [[sum(x and y for x, y in zip(flat[a], flat[b])) * 0.5 for b in keys] for a in keys]
+
+
+def main(argv=None) -> int:
+	parser = argparse.ArgumentParser(description="Vectorised vs list schedule analytics")
+	parser.add_argument("--addresses", type=int, default=5000)
+	parser.add_argument("--dates", type=int, default=2)
+	parser.add_argument("--overlap", type=int, default=300, help="addresses in the pairwise overlap case")
+	parser.add_argument("--repeat", type=int, default=5)
+	args = parser.parse_args(argv)
+
+	if schedule_analytics.np is None:
+		print("numpy is not installed; nothing to compare")
+		return 1
+	np = schedule_analytics.np
+	results = synthetic_results(args.addresses, args.dates)
+	matrix = ScheduleMatrix.from_results(results)
+	dates = matrix.dates
+	# State files and the history DB already hold packed days
+	packed = list(schedule_analytics.results_days(results))
+	sub_keys = matrix.keys[: args.overlap]
+	sub = ScheduleMatrix.from_results({k: results[k] for k in sub_keys})
+
+	# Both paths must agree before their timings mean anything
+	off = list_hours(results, ("off",))
+	assert np.allclose(matrix.hours("off"), [off[k] for k in matrix.keys]), "off hours differ"
+	maybe = list_hours(results, ("maybe",))
+	assert np.allclose(matrix.hours("maybe"), [maybe[k] for k in matrix.keys]), "maybe hours differ"
+	assert (matrix.concurrent("off") == np.array(list_concurrent(results, dates))).all(), "concurrency differs"
+	assert np.allclose(sub.overlap_hours("off"), list_overlap(results, sub_keys)), "overlap differs"
+
+	cases = [
+		("off hours per address", lambda: list_hours(results, ("off",)), lambda: matrix.hours("off")),
+		("maybe exposure", lambda: list_hours(results, ("maybe",)), lambda: matrix.hours("maybe")),
+		("concurrency curve", lambda: list_concurrent(results, dates), lambda: matrix.concurrent("off")),
+		(f"overlap {len(sub_keys)}x{len(sub_keys)}", lambda: list_overlap(results, sub_keys), lambda: sub.overlap_hours("off")),
+		("build matrix from results", None, lambda: ScheduleMatrix.from_results(results)),
+		("build matrix from packed days", None, lambda: ScheduleMatrix.from_packed(packed)),
+	]
+	print(f"{args.addresses} addresses x {args.dates} dates = {args.addresses * args.dates} address-days")
+	header = f"{'case':<28}  {'list ms':>9}  {'numpy ms':>9}  {'speedup':>8}"
+	print(header)
+	print("-" * len(header))
+	for name, list_fn, np_fn in cases:
+		np_ms = min(timeit.repeat(np_fn, number=1, repeat=args.repeat)) * 1000
+		if list_fn is None:
+			print(f"{name:<28}  {'':>9}  {np_ms:>9.2f}  {'':>8}")
+			continue
+		list_ms = min(timeit.repeat(list_fn, number=1, repeat=args.repeat)) * 1000
+		print(f"{name:<28}  {list_ms:>9.2f}  {np_ms:>9.2f}  {list_ms / np_ms:>7.0f}x")
+	return 0
+
+
+if __name__ == "__main__":
+	sys.exit(main())
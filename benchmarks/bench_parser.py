@@ -0,0 +1,60 @@
+"""Compare the single-pass fact parser against the legacy re-parsing path (legacy_parser.py).
+
+Runs both over every recorded container in benchmarks/fixtures, fails if
+their results differ, and prints per-call timings.
+
+	python benchmarks/bench_parser.py [--repeat 200]
+"""
+import argparse
+import glob
+import os
+import sys
+import timeit
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import fact_parser  # noqa: E402
+from legacy_parser import legacy_build_results  # noqa: E402
+from main import build_results  # noqa: E402
+
+FIXTURES = os.path.join(ROOT, "benchmarks", "fixtures")
+
+
+def load_fixtures():
+	fixtures = {}
+	for path in sorted(glob.glob(os.path.join(FIXTURES, "*.html"))):
+		with open(path, "r", encoding="utf-8") as f:
+			fixtures[os.path.basename(path)] = f.read()
+	return fixtures
+
+
+def main(argv=None) -> int:
+	parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+	parser.add_argument("--repeat", type=int, default=200)
+	args = parser.parse_args(argv)
+
+	fixtures = load_fixtures()
+	if not fixtures:
+		print(f"No fixtures in {FIXTURES}")
+		return 1
+
+	mismatches = 0
+	print(f"backend: {fact_parser.PARSER_BACKEND}, repeat: {args.repeat}")
+	print(f"{'fixture':<24}  {'legacy ms':>10}  {'single ms':>10}  {'speedup':>8}  match")
+	for name, html in fixtures.items():
+		expected = legacy_build_results(html)
+		got = build_results(html)
+		match = expected == got
+		mismatches += not match
+		legacy = timeit.timeit(lambda: legacy_build_results(html), number=args.repeat) / args.repeat * 1000
+		single = timeit.timeit(lambda: build_results(html), number=args.repeat) / args.repeat * 1000
+		print(f"{name:<24}  {legacy:>10.3f}  {single:>10.3f}  {legacy / single:>7.1f}x  {'yes' if match else 'NO'}")
+	if mismatches:
+		print(f"{mismatches} fixture(s) differ from the legacy parser output")
+		return 1
+	return 0
+
+
+if __name__ == "__main__":
+	sys.exit(main())
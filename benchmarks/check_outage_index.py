@@ -0,0 +1,168 @@
+"""Check OutageIndex against brute force on random addresses.
+
+Random addresses get a few consecutive days of slots; the expected off
+intervals are built by walking the slot lists one half-hour at a time
+(no DaySchedule masks), and every query is answered by a full scan. The
+index must agree at random instants and at every interval edge, after the
+initial load, after incremental updates of a random subset and after a
+removal. Prints the counts and exits 1 on any mismatch.
+
+	python benchmarks/check_outage_index.py [--addresses 500] [--days 3] [--seed 1]
+"""
+import argparse
+import os
+import random
+import sys
+from datetime import date, datetime, time, timedelta
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from http_fetch import kyiv_tz  # noqa: E402
+from outage_index import Interval, OutageIndex  # noqa: E402
+
+STATUSES = ("on", "off", "maybe", "unknown")
+WINDOWS = (0, 15 * 60, 3600, 4 * 3600)
+
+
+def random_results(rng: random.Random, first_day: date, days: int) -> list:
+	"""`days` consecutive days of runs of random statuses (off runs often reach midnight)."""
+	results = []
+	for d in range(days):
+		slots = []
+		while len(slots) < 48:
+			status = rng.choices(STATUSES, weights=(5, 4, 1, 1))[0]
+			slots += [status] * rng.randint(1, 8)
+		if rng.random() < 0.3:
+			slots[-rng.randint(1, 4):] = ["off"] * 4
+		results.append({"date": (first_day + timedelta(days=d)).isoformat(), "slots": slots[:48]})
+	return results
+
+
+def brute_intervals(results: list, tz) -> list:
+	"""Merged [start, end) epoch intervals of "off" slots, one slot at a time.
+
+	A slot runs from its local wall-clock start to the next slot's, so on the
+	day the clocks go back the 03:30 slot also covers the repeated hour.
+	"""
+	spans = []
+	for res in results:
+		day = date.fromisoformat(res["date"])
+		for i, status in enumerate(res["slots"]):
+			if status == "off":
+				local = datetime.combine(day, time()) + timedelta(minutes=30 * i)
+				end = local + timedelta(minutes=30)
+				spans.append((local.replace(tzinfo=tz).timestamp(), end.replace(tzinfo=tz).timestamp()))
+	intervals = []
+	for start, end in sorted(spans):
+		if intervals and start <= intervals[-1][1]:
+			intervals[-1] = (intervals[-1][0], max(intervals[-1][1], end))
+		else:
+			intervals.append((start, end))
+	return intervals
+
+
+class Brute:
+	"""Expected answers by scanning every interval of every address."""
+
+	def __init__(self, tz):
+		self.tz = tz
+		self.by_key = {}
+		self.everything = []
+
+	def all(self):
+		return [Interval(s, e, k) for k, ivs in self.by_key.items() for s, e in ivs]
+
+	def refresh(self) -> None:
+		"""Flatten `by_key` for the fleet-wide scans; call after changing it."""
+		self.everything = self.all()
+
+	def interval_at(self, key, t):
+		found = [Interval(s, e, key) for s, e in self.by_key.get(key, ()) if s <= t < e]
+		return found[0] if found else None
+
+	def next_transition(self, key, t):
+		current = self.interval_at(key, t)
+		if current is not None:
+			return datetime.fromtimestamp(current.end, self.tz), "on"
+		later = [s for s, _ in self.by_key.get(key, ()) if s > t]
+		return (datetime.fromtimestamp(min(later), self.tz), "off") if later else None
+
+	def starting_within(self, t, window):
+		return sorted(i for i in self.everything if t <= i.start < t + window)
+
+	def ending_within(self, t, window):
+		return sorted(i for i in self.everything if t < i.end <= t + window)
+
+	def off_at(self, t):
+		return sorted(i for i in self.everything if i.start <= t < i.end)
+
+
+def compare(index: OutageIndex, brute: Brute, rng: random.Random, probes: int) -> tuple:
+	"""(queries, mismatches) over random instants and the edges of random intervals."""
+	brute.refresh()
+	everything = brute.everything
+	instants = [rng.uniform(min(i.start for i in everything) - 3600, max(i.end for i in everything) + 3600) for _ in range(probes)]
+	for i in rng.sample(everything, min(probes, len(everything))):
+		instants += [i.start, i.end, i.start - 1, i.end - 1]
+	keys = list(brute.by_key)
+	queries = mismatches = 0
+
+	def check(name, got, expected, *args):
+		nonlocal queries, mismatches
+		queries += 1
+		if got != expected:
+			mismatches += 1
+			if mismatches <= 5:
+				print(f"MISMATCH {name}{args}: index {got!r}, brute force {expected!r}")
+
+	for t in instants:
+		check("off_at", sorted(index.off_at(t)), brute.off_at(t), t)
+		for window in WINDOWS:
+			check("starting_within", sorted(index.starting_within(t, window)), brute.starting_within(t, window), t, window)
+			check("ending_within", sorted(index.ending_within(t, window)), brute.ending_within(t, window), t, window)
+		for key in rng.sample(keys, min(10, len(keys))):
+			check("interval_at", index.interval_at(key, t), brute.interval_at(key, t), key, t)
+			check("next_transition", index.next_transition(key, t), brute.next_transition(key, t), key, t)
+	return queries, mismatches
+
+
+def main(argv=None) -> int:
+	parser = argparse.ArgumentParser(description="OutageIndex vs brute force")
+	parser.add_argument("--addresses", type=int, default=500)
+	parser.add_argument("--days", type=int, default=3, help="days of slots per address")
+	parser.add_argument("--probes", type=int, default=200, help="random instants per round")
+	parser.add_argument("--seed", type=int, default=1)
+	args = parser.parse_args(argv)
+
+	rng = random.Random(args.seed)
+	tz = kyiv_tz()
+	# Spans the last Sunday of October, so one day has 25 hours in Kyiv
+	first_day = date(2025, 10, 24)
+	index, brute = OutageIndex(tz), Brute(tz)
+
+	def load(key):
+		results = random_results(rng, first_day + timedelta(days=rng.randint(0, 2)), args.days)
+		index.update(key, results)
+		brute.by_key[key] = brute_intervals(results, tz)
+
+	keys = [f"addr{i}" for i in range(args.addresses)]
+	for key in keys:
+		load(key)
+	rounds = [("initial", None)]
+	rounds.append(("updated", lambda: [load(k) for k in rng.sample(keys, len(keys) // 5)]))
+	removed = keys[len(keys) // 2]
+	rounds.append(("removed", lambda: (index.remove(removed), brute.by_key.pop(removed))))
+
+	failed = 0
+	for name, change in rounds:
+		if change is not None:
+			change()
+		queries, mismatches = compare(index, brute, rng, args.probes)
+		failed += mismatches
+		print(f"{name:<8} {len(index)} addresses, {len(brute.all())} intervals: {queries} queries, {mismatches} mismatches")
+	return 1 if failed else 0
+
+
+if __name__ == "__main__":
+	sys.exit(main())
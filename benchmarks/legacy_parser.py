@@ -0,0 +1,140 @@
+"""The pre-single-pass fact table parser, kept as the reference for benchmarks.
+
+Production code parses with fact_parser only. This is the old pipeline from
+`main`: parse the container, serialise every `.discon-fact-table`, rebuild
+`table2col` layouts as a new wide table (`normalize_table`) and parse the
+result again (`parse_fact_table_to_slots`). bench_parser.py checks that
+both give the same results, and run.py times the old stages.
+"""
+import os
+import sys
+from typing import List, Optional
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from bs4 import BeautifulSoup  # noqa: E402
+
+import fact_parser  # noqa: E402
+from fact_parser import cell_slots  # noqa: E402
+
+
+def parse_fact_table_to_slots(table_html: str) -> Optional[List[str]]:
+	"""Parse a rendered fact table into 48 half-hour slots.
+
+	Slot values: 'on', 'off', 'maybe', 'unknown'.
+	"""
+	soup = BeautifulSoup(table_html, "html.parser")
+	table = soup.find("table")
+	if not table:
+		return None
+
+	tbody = table.find("tbody")
+	if not tbody:
+		return None
+
+	tr = tbody.find("tr", class_="current-day") or tbody.find("tr")
+	if not tr:
+		return None
+
+	tds = tr.find_all("td")
+	# Day name cells usually have colspan; hour cells do not.
+	hour_tds = [td for td in tds if not td.has_attr("colspan")]
+	if not hour_tds:
+		return None
+
+	slots: List[str] = []
+	for td in hour_tds[:24]:
+		classes = td.get("class") or []
+		slots.extend(cell_slots(" ".join(classes)))
+
+	while len(slots) < 48:
+		slots.append("unknown")
+	return slots[:48]
+
+
+def normalize_table(html: str) -> str:
+	"""If site returned a two-column table layout, normalize it into the single-row wide table.
+
+	This reconstructs a table with a single tbody row containing 24 hourly td cells.
+	"""
+	try:
+		soup = BeautifulSoup(html, "html.parser")
+		# if already wide (has a single table with hour cols), return as-is
+		if soup.find('table') and soup.find('table').find('thead') and len(soup.find_all('th')) >= 24:
+			return html
+
+		# detect possible multi-column block
+		wrap = soup.find(class_='table2col') or soup
+		tables = wrap.find_all('table')
+		if not tables or len(tables) < 2:
+			return html
+
+		# collect hour-cell classes from both tables; each table row has third td with class
+		classes = []
+		for t in tables:
+			for tr in t.find_all('tr'):
+				tds = tr.find_all('td')
+				if len(tds) >= 3:
+					cls = ' '.join(tds[2].get('class') or [])
+					classes.append(cls)
+
+		# If we didn't find 24 cells, return original
+		if len(classes) < 24:
+			return html
+
+		# build new single-row table
+		new_div = BeautifulSoup('', 'html.parser').new_tag('div')
+		new_div['rel'] = wrap.get('rel', '')
+		new_div['class'] = 'discon-fact-table active'
+
+		table_tag = BeautifulSoup('', 'html.parser').new_tag('table')
+		head = BeautifulSoup('', 'html.parser').new_tag('thead')
+		tr_head = BeautifulSoup('', 'html.parser').new_tag('tr')
+		th0 = BeautifulSoup('', 'html.parser').new_tag('th', colspan='2')
+		th0.string = 'Часові'
+		tr_head.append(th0)
+		for h in range(24):
+			th = BeautifulSoup('', 'html.parser').new_tag('th', scope='col')
+			div = BeautifulSoup('', 'html.parser').new_tag('div')
+			div.string = f"{h:02d}-{(h+1)%24:02d}"
+			th.append(div)
+			tr_head.append(th)
+		head.append(tr_head)
+		table_tag.append(head)
+
+		tbody = BeautifulSoup('', 'html.parser').new_tag('tbody')
+		tr_body = BeautifulSoup('', 'html.parser').new_tag('tr')
+		td_empty = BeautifulSoup('', 'html.parser').new_tag('td', colspan='2')
+		td_empty.string = '\xa0'
+		tr_body.append(td_empty)
+		for cls in classes[:24]:
+			td = BeautifulSoup('', 'html.parser').new_tag('td')
+			if cls:
+				td['class'] = cls
+			tr_body.append(td)
+		tbody.append(tr_body)
+		table_tag.append(tbody)
+
+		new_div.append(table_tag)
+
+		legend = wrap.find(class_='discon-fact-legend')
+		if legend:
+			new_div.append(legend)
+
+		return str(new_div)
+	except Exception:
+		return html
+
+
+def legacy_build_results(table_html: str) -> List[dict]:
+	"""The old pipeline: parse, serialise, normalise, re-parse."""
+	soup_all = BeautifulSoup(table_html, "html.parser")
+	date_map = fact_parser.extract_date_map(soup_all)
+	results = []
+	for tbl in soup_all.select(".discon-fact-table"):
+		rel = tbl.get("rel") or tbl.get("data-rel")
+		date_str = date_map.get(rel) or fact_parser.rel_to_date(rel)
+		slots = parse_fact_table_to_slots(normalize_table(str(tbl))) or []
+		results.append({"date": date_str, "off_ranges": fact_parser.slots_to_ranges(slots, "off"), "slots": slots})
+	return results
@@ -0,0 +1,190 @@
+"""Benchmark suite for the parse pipeline over the recorded fixtures.
+
+Times every stage that runs after a fetch, per fixture in benchmarks/fixtures:
+the legacy `parse_fact_table_to_slots` and `normalize_table` (legacy_parser.py), `slots_to_ranges`,
+`DaySchedule.ranges`, date-map extraction, `build_results` and the whole
+`process_fact_html` path (with notifications and git disabled, state in a
+temp dir). Reports per-call latency and peak allocation.
+
+	python benchmarks/run.py                                  # compare with benchmarks/baseline.json
+	python benchmarks/run.py --baseline ''                    # report only
+	HTML_PARSER=html.parser python benchmarks/run.py --save-baseline benchmarks/baseline.json
+	python benchmarks/run.py --max-regression 0.25
+
+The run fails (exit 1) when any benchmark is more than --max-regression
+slower than its baseline (by default the committed benchmarks/baseline.json).
+Every sample is paired with a run of a fixed pure-Python workload
+(`calibration`) and benchmarks are compared by their median time relative
+to it, so a baseline recorded on one machine can be checked on a faster or
+slower (or throttling) one.
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_BASELINE = os.path.join(ROOT, "benchmarks", "baseline.json")
+sys.path.insert(0, ROOT)
+
+from bs4 import BeautifulSoup  # noqa: E402
+
+import fact_parser  # noqa: E402
+import legacy_parser  # noqa: E402
+import main as pipeline  # noqa: E402
+from bench_parser import load_fixtures  # noqa: E402
+from day_schedule import DaySchedule  # noqa: E402
+
+
+# Each sample times a batch of calls lasting at least this long, so
+# sub-millisecond stages are not lost in timer and scheduler noise
+MIN_SAMPLE_MS = 5.0
+
+
+def _time_ms(fn, number: int = 1) -> float:
+	t0 = time.perf_counter()
+	for _ in range(number):
+		fn()
+	return (time.perf_counter() - t0) * 1000 / number
+
+
+def measure(fn, repeat: int) -> dict:
+	fn()  # warm-up
+	number = max(1, int(MIN_SAMPLE_MS / max(_time_ms(fn), 1e-3)))
+	samples = []
+	relative = []
+	for _ in range(repeat):
+		samples.append(_time_ms(fn, number))
+		relative.append(samples[-1] / _time_ms(calibration))
+	tracemalloc.start()
+	try:
+		fn()
+		_, peak = tracemalloc.get_traced_memory()
+	finally:
+		tracemalloc.stop()
+	samples.sort()
+	return {
+		"median_ms": statistics.median(samples),
+		"relative": statistics.median(relative),
+		"p95_ms": samples[min(len(samples) - 1, int(len(samples) * 0.95))],
+		"peak_kib": peak / 1024,
+	}
+
+
+def calibration() -> None:
+	"""Reference workload independent of this repo's code."""
+	sorted(str(i * 7919 % 10007) for i in range(20000))
+
+
+@contextlib.contextmanager
+def quiet_pipeline(state_dir: str):
+	"""Run process_fact_html without network, git or console noise."""
+	async def no_send(_message: str) -> None:
+		return None
+
+	saved = (pipeline.send_telegram_notification, pipeline.commit_state_file, pipeline.DEFAULT_STATE_FILE, pipeline.HISTORY_DB)
+	pipeline.send_telegram_notification = no_send
+	pipeline.commit_state_file = lambda path: None
+	pipeline.DEFAULT_STATE_FILE = os.path.join(state_dir, "last_state.json")
+	pipeline.HISTORY_DB = ""
+	try:
+		with contextlib.redirect_stdout(io.StringIO()):
+			yield
+	finally:
+		(pipeline.send_telegram_notification, pipeline.commit_state_file, pipeline.DEFAULT_STATE_FILE, pipeline.HISTORY_DB) = saved
+
+
+def cases_for(name: str, html: str, state_dir: str):
+	"""(benchmark name, callable) pairs for one fixture; `state_dir` holds process_fact_html's state."""
+	soup = BeautifulSoup(html, "html.parser")
+	tables = [str(t) for t in soup.select(".discon-fact-table")]
+	normalized = [legacy_parser.normalize_table(t) for t in tables]
+	slots = [legacy_parser.parse_fact_table_to_slots(t) or [] for t in normalized]
+	days = [DaySchedule.from_slots(s) for s in slots]
+
+	def full_path():
+		# Fresh state each call so every iteration takes the "changed" branch
+		with quiet_pipeline(state_dir):
+			try:
+				os.remove(os.path.join(state_dir, "last_state.json"))
+			except FileNotFoundError:
+				pass
+			pipeline.process_fact_html(html)
+
+	yield f"{name}:legacy.parse_fact_table_to_slots", lambda: [legacy_parser.parse_fact_table_to_slots(t) for t in normalized]
+	yield f"{name}:legacy.normalize_table", lambda: [legacy_parser.normalize_table(t) for t in tables]
+	yield f"{name}:slots_to_ranges", lambda: [fact_parser.slots_to_ranges(s, "off") for s in slots]
+	yield f"{name}:DaySchedule.ranges", lambda: [d.ranges("off") for d in days]
+	yield f"{name}:extract_date_map", lambda: fact_parser.extract_date_map(soup)
+	yield f"{name}:build_results", lambda: pipeline.build_results(html)
+	yield f"{name}:process_fact_html", full_path
+
+
+def main(argv=None) -> int:
+	parser = argparse.ArgumentParser(description="Parse pipeline benchmarks")
+	parser.add_argument("--repeat", type=int, default=50)
+	parser.add_argument("--filter", help="only run benchmarks whose name contains this")
+	parser.add_argument("--baseline", default=os.environ.get("BENCH_BASELINE", DEFAULT_BASELINE),
+		help="JSON baseline to compare medians against (default benchmarks/baseline.json; '' to skip)")
+	parser.add_argument("--max-regression", type=float, default=float(os.environ.get("BENCH_MAX_REGRESSION", "0.25")),
+		help="allowed slowdown vs baseline as a fraction (default 0.25 = 25%%)")
+	parser.add_argument("--save-baseline", help="write this run's medians as a baseline JSON")
+	args = parser.parse_args(argv)
+
+	fixtures = load_fixtures()
+	if not fixtures:
+		print("No fixtures found")
+		return 1
+	baseline = {}
+	if args.baseline:
+		with open(args.baseline, "r", encoding="utf-8") as f:
+			baseline = json.load(f)
+
+	results = {"_backend": {"parser": fact_parser.PARSER_BACKEND}}
+	regressions = []
+	base_backend = baseline.get("_backend", {}).get("parser")
+	if base_backend and base_backend != fact_parser.PARSER_BACKEND:
+		print(f"Baseline was recorded with the {base_backend} parser; set HTML_PARSER={base_backend} to compare")
+		baseline = {}
+	print(f"backend: {fact_parser.PARSER_BACKEND}, repeat: {args.repeat}")
+	header = f"{'benchmark':<48}  {'median ms':>9}  {'p95 ms':>8}  {'peak KiB':>9}  {'vs base':>8}"
+	print(header)
+	print("-" * len(header))
+	with tempfile.TemporaryDirectory(prefix="bench_state_") as state_dir:
+		for fixture, html in fixtures.items():
+			for name, fn in cases_for(os.path.splitext(fixture)[0], html, state_dir):
+				if args.filter and args.filter not in name:
+					continue
+				r = measure(fn, args.repeat)
+				# The pipeline records timing spans; don't let them pile up across cases
+				pipeline.TRACER.reset()
+				results[name] = r
+				base = baseline.get(name, {})
+				ratio = ""
+				if base.get("relative"):
+					change = r["relative"] / base["relative"] - 1
+					ratio = f"{change:+.0%}"
+					if change > args.max_regression:
+						regressions.append((name, base["median_ms"], r["median_ms"], change))
+				print(f"{name:<48}  {r['median_ms']:>9.3f}  {r['p95_ms']:>8.3f}  {r['peak_kib']:>9.1f}  {ratio:>8}")
+
+	if args.save_baseline:
+		with open(args.save_baseline, "w", encoding="utf-8") as f:
+			json.dump(results, f, indent=2, sort_keys=True)
+		print(f"Baseline written to {args.save_baseline}")
+	if regressions:
+		print(f"\n{len(regressions)} regression(s) over {args.max_regression:.0%}:")
+		for name, base, now, change in regressions:
+			print(f" - {name}: {change:+.0%} relative to calibration ({base:.3f} ms on the baseline machine, {now:.3f} ms here)")
+		return 1
+	return 0
+
+
+if __name__ == "__main__":
+	sys.exit(main())
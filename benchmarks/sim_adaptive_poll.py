@@ -0,0 +1,87 @@
+"""Simulate --adaptive polling against the fixed 5-minute cron.
+
+Synthetic change history in the Kyiv day: tomorrow's table released between
+19:00 and 21:30, a revision 10-60 min later on half the days and a morning
+change (08:00-12:00) on a fifth of them. AdaptiveSchedule is seeded with
+--history days of it, then both schedules poll through the next --days days;
+a change is detected at the first poll after it. Prints polls per day and
+detection latency for each.
+
+	python benchmarks/sim_adaptive_poll.py [--history 28] [--days 14] [--seed 1]
+"""
+import argparse
+import os
+import random
+import sys
+from datetime import datetime, timedelta, timezone
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from adaptive_poll import AdaptiveSchedule  # noqa: E402
+from http_fetch import kyiv_tz  # noqa: E402
+
+
+def day_changes(rng: random.Random, day: datetime) -> list:
+	release = day.replace(hour=19) + timedelta(minutes=rng.uniform(0, 150))
+	changes = [release]
+	if rng.random() < 0.5:
+		changes.append(release + timedelta(minutes=rng.uniform(10, 60)))
+	if rng.random() < 0.2:
+		changes.append(day.replace(hour=8) + timedelta(minutes=rng.uniform(0, 240)))
+	return changes
+
+
+def simulate(changes: list, start: datetime, end: datetime, next_interval, observe=None) -> tuple:
+	"""(polls, detection latencies in seconds) of polling from `start` to `end`."""
+	now, polls, latencies, i = start, 0, [], 0
+	while now < end:
+		polls += 1
+		while i < len(changes) and changes[i] <= now:
+			latencies.append((now - changes[i]).total_seconds())
+			if observe is not None:
+				observe(now)
+			i += 1
+		now += timedelta(seconds=next_interval(now))
+	return polls, latencies
+
+
+def main(argv=None) -> int:
+	parser = argparse.ArgumentParser(description="Adaptive vs fixed poll interval")
+	parser.add_argument("--history", type=int, default=28, help="days of past changes the schedule learns from")
+	parser.add_argument("--days", type=int, default=14, help="days to simulate")
+	parser.add_argument("--fixed", type=int, default=300, help="fixed interval to compare with (cron: 300 s)")
+	parser.add_argument("--min-interval", type=int, default=60)
+	parser.add_argument("--max-interval", type=int, default=1800)
+	parser.add_argument("--seed", type=int, default=1)
+	args = parser.parse_args(argv)
+
+	rng = random.Random(args.seed)
+	tz = kyiv_tz()
+	origin = datetime(2026, 9, 1, tzinfo=tz)
+	days = [origin + timedelta(days=d) for d in range(args.history + args.days)]
+	changes = [day_changes(rng, day) for day in days]
+	past = [c for day in changes[: args.history] for c in day]
+	future = sorted(c for day in changes[args.history:] for c in day)
+	start, end = days[args.history], days[args.history] + timedelta(days=args.days)
+
+	schedule = AdaptiveSchedule(
+		[c.astimezone(timezone.utc).isoformat() for c in past], args.min_interval, args.max_interval, fallback=args.fixed,
+	)
+	runs = [
+		("adaptive", simulate(future, start, end, schedule.next_interval, schedule.observe)),
+		(f"fixed {args.fixed}s", simulate(future, start, end, lambda now: args.fixed)),
+	]
+	print(f"{len(past)} past changes over {args.history} days, {len(future)} changes in {args.days} simulated days")
+	header = f"{'schedule':<12}  {'polls/day':>9}  {'mean latency':>12}  {'max latency':>11}"
+	print(header)
+	print("-" * len(header))
+	for name, (polls, latencies) in runs:
+		mean = sum(latencies) / len(latencies) / 60 if latencies else 0.0
+		worst = max(latencies) / 60 if latencies else 0.0
+		print(f"{name:<12}  {polls / args.days:>9.0f}  {mean:>10.1f} m  {worst:>9.1f} m")
+	return 0
+
+
+if __name__ == "__main__":
+	sys.exit(main())
@@ -0,0 +1,698 @@
+"""Long-lived Selenium session for the DTEK shutdowns page.
+
+A cold start (chromedriver provisioning, Chrome launch, page load, the 5 s
+settle delay and the first-load modal) dominates the cost of a poll. A
+`BrowserSession` pays that once: the driver stays open between `fetch()`
+calls and later polls only reload the already-initialised page (cookies and
+the dismissed-modal state are kept) and re-run the form fill.
+"""
+import threading
+import time
+from typing import Optional
+
+from driver_provision import chromedriver_path
+from lean_load import LEAN_RECORD_BASELINE, LeanProfile, LoadBaseline, load_stats, report
+from tracing import span
+
+
+MODAL_PRESENT_JS = (
+	"return !!document.querySelector('.modal__container[aria-modal=\"true\"]')"
+	" || !!document.querySelector('.modal__container--firstPopup')"
+	" || !!document.querySelector('.m-attention__container');"
+)
+# Snapshot of the address form after a successful interactive pick. Hidden
+# inputs are included (the site keeps selected IDs there) except CSRF tokens,
+# which are per-session.
+FORM_STATE_JS = """
+const out = {fields: {}, hidden: {}};
+for (const id of ['city', 'street', 'house_num']) {
+	const el = document.getElementById(id);
+	if (el) out.fields[id] = el.value;
+}
+const city = document.getElementById('city');
+const scope = (city && city.form) || document;
+scope.querySelectorAll('input[type=hidden]').forEach(h => {
+	const k = h.id || h.name;
+	if (k && !/token|csrf/i.test(k)) out.hidden[k] = h.value;
+});
+const g = document.getElementById('group-name');
+out.group = g ? g.innerText.trim() : '';
+return out;
+"""
+RESTORE_FORM_JS = """
+const data = arguments[0];
+for (const [id, v] of Object.entries(data.fields || {})) {
+	const el = document.getElementById(id);
+	if (!el) return false;
+	el.disabled = false;
+	el.removeAttribute('disabled');
+	el.value = v;
+}
+for (const [k, v] of Object.entries(data.hidden || {})) {
+	const el = document.getElementById(k) || document.querySelector('input[type=hidden][name="' + k + '"]');
+	if (el) el.value = v;
+}
+if (typeof DisconSchedule === 'undefined' || !DisconSchedule.ajax || !DisconSchedule.ajax.formSubmit) return false;
+DisconSchedule.ajax.formSubmit('getHomeNum');
+return true;
+"""
+# How long a cached submit may take before it counts as rejected
+CACHED_SUBMIT_TIMEOUT = 15
+
+# The outage group (`sub_type_reason`, e.g. GPV3.1) shown in #group-name: its
+# display name in DisconSchedule.preset, else the fact group with its number
+GROUP_JS = """
+const g = document.getElementById('group-name');
+const text = g ? g.innerText.trim() : '';
+if (!text || typeof DisconSchedule === 'undefined') return null;
+const names = (DisconSchedule.preset && DisconSchedule.preset.sch_names) || {};
+for (const [group, name] of Object.entries(names)) {
+	if (name && String(name).trim() === text) return group;
+}
+const m = text.match(/\\d+(?:\\.\\d+)?/);
+const days = (DisconSchedule.fact && DisconSchedule.fact.data) || {};
+for (const hours of Object.values(days)) {
+	for (const group of Object.keys(hours || {})) {
+		if (m && group.replace(/^\\D+/, '') === m[0]) return group;
+	}
+}
+return null;
+"""
+
+MODAL_GONE_JS = (
+	"return !document.querySelector('.modal__container[aria-modal=\"true\"]')"
+	" && !document.querySelector('.modal__container--firstPopup')"
+	" && !document.querySelector('.m-attention__container');"
+)
+
+
+class BrowserSession:
+	"""One headless Chrome kept warm across polls.
+
+	Use as a context manager or call `close()` explicitly. If the driver dies
+	between polls, the next `fetch()` transparently starts a new one.
+
+	With an `autocomplete_cache`, addresses picked interactively once are
+	afterwards restored straight into the form and submitted. With a `lean`
+	profile, non-essential resources are blocked and page loads wait for the
+	form instead of `initial_settle` (see lean_load). Page loads are only
+	measured for lean sessions, or with `record_baseline` to record the
+	full-profile baseline they are compared with.
+	"""
+
+	def __init__(
+		self,
+		url: str,
+		wait_timeout: float = 60,
+		initial_settle: float = 5.0,
+		autocomplete_cache=None,
+		tables_selector: str = ".discon-fact-tables",
+		lean: Optional[LeanProfile] = None,
+		record_baseline: bool = LEAN_RECORD_BASELINE,
+	):
+		self.url = url
+		self.tables_selector = tables_selector
+		self.wait_timeout = wait_timeout
+		self.initial_settle = initial_settle
+		self.autocomplete_cache = autocomplete_cache
+		self.lean = lean
+		self.record_baseline = record_baseline and lean is None
+		self.load_baseline = LoadBaseline()
+		self.driver = None
+		self.wait = None
+		self.polls = 0
+		# Outage group shown for the last fetched address (None if unknown)
+		self.group: Optional[str] = None
+
+	def __enter__(self) -> "BrowserSession":
+		return self
+
+	def __exit__(self, *exc) -> None:
+		self.close()
+
+	@property
+	def started(self) -> bool:
+		return self.driver is not None
+
+	@property
+	def measure_loads(self) -> bool:
+		return self.lean is not None or self.record_baseline
+
+	def _new_driver(self):
+		from selenium import webdriver
+		from selenium.webdriver.chrome.service import Service
+
+		options = webdriver.ChromeOptions()
+		options.add_argument("--headless=new")
+		options.add_argument("--no-sandbox")
+		options.add_argument("--disable-dev-shm-usage")
+		# Force a wide viewport so the site renders the full-hour table layout
+		options.add_argument("--window-size=1400,900")
+		if self.lean is not None:
+			for arg in self.lean.chrome_arguments():
+				options.add_argument(arg)
+		if self.measure_loads:
+			# Network events for the per-load request/byte report
+			options.set_capability("goog:loggingPrefs", {"performance": "ALL"})
+
+		with span("browser.driver_path"):
+			driver_path = chromedriver_path()
+		driver = webdriver.Chrome(service=Service(driver_path), options=options)
+		try:
+			# Ensure window size is applied in headless mode
+			driver.set_window_size(1400, 900)
+		except Exception:
+			pass
+		if self.lean is not None:
+			try:
+				driver.execute_cdp_cmd("Network.enable", {})
+				driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": self.lean.blocked_patterns(self.url)})
+			except Exception as e:
+				print(f"DEBUG: Lean loading unavailable, loading the full page: {e}")
+		return driver
+
+	def _performance_log(self) -> list:
+		if not self.measure_loads:
+			return []
+		try:
+			return self.driver.get_log("performance")
+		except Exception:
+			return []
+
+	def _report_load(self, kind: str) -> None:
+		"""Print requests/bytes of the page load that just finished (see lean_load)."""
+		entries = self._performance_log()
+		if entries:
+			print(f"DEBUG: {report(self.url, kind, load_stats(entries), self.lean is not None, self.load_baseline, self.record_baseline)}")
+
+	def _wait_form_ready(self) -> None:
+		from selenium.webdriver.common.by import By
+		from selenium.webdriver.support import expected_conditions as EC
+
+		self.wait.until(lambda d: d.execute_script("return document.readyState") == "complete")
+		self.wait.until(EC.presence_of_element_located((By.ID, "city")))
+		self.wait.until(lambda d: d.execute_script("return typeof DisconSchedule !== 'undefined'"))
+
+	def start(self) -> None:
+		"""Launch Chrome, open the page and get past the first-load modal."""
+		from selenium.webdriver.support.ui import WebDriverWait
+
+		with span("browser.launch"):
+			self.driver = self._new_driver()
+		self.wait = WebDriverWait(self.driver, self.wait_timeout)
+		with span("page.load"):
+			self.driver.get(self.url)
+		if self.lean is not None:
+			with span("page.form_ready"):
+				self._wait_form_ready()
+		else:
+			# Per spec: wait 5 seconds after opening the page
+			with span("page.settle_sleep"):
+				time.sleep(self.initial_settle)
+		self._report_load("load")
+		with span("modal.dismiss"):
+			self.dismiss_blocking_modal()
+
+	def _reload(self) -> None:
+		"""Reload the initialised page; cookies keep the modal from coming back."""
+		from selenium.webdriver.common.by import By
+		from selenium.webdriver.support import expected_conditions as EC
+
+		# Drop the previous poll's form traffic so the report covers the reload only
+		self._performance_log()
+		with span("page.reload"):
+			self.driver.refresh()
+			self.wait.until(lambda d: d.execute_script("return document.readyState") == "complete")
+			self.wait.until(EC.presence_of_element_located((By.ID, "city")))
+		self._report_load("reload")
+		with span("modal.dismiss"):
+			self.dismiss_blocking_modal()
+
+	def close(self) -> None:
+		if self.driver is not None:
+			try:
+				self.driver.quit()
+			except Exception:
+				pass
+		self.driver = None
+		self.wait = None
+
+	def fetch(self, city: str, street: str, house_num: str) -> str:
+		"""Fill the address form and return the `.discon-fact-tables` HTML.
+
+		A page that times out is retried once on the same browser; Chrome is
+		only restarted when the session itself is gone.
+		"""
+		from selenium.common.exceptions import TimeoutException, WebDriverException
+
+		self.group = None
+		reload = self.polls > 0
+		for attempt in range(2):
+			try:
+				if not self.started:
+					self.start()
+				elif reload:
+					self._reload()
+				html = self.fetch_cached(city, street, house_num)
+				if html is None:
+					html = self.fill_form_and_read(city, street, house_num)
+					self.remember_form(city, street, house_num)
+				self.polls += 1
+				return html
+			except TimeoutException:
+				if attempt > 0:
+					raise
+				# Slow page: the driver is fine, start the form over on a reload
+				print("DEBUG: Page timed out, retrying in the same browser")
+				reload = True
+			except WebDriverException as e:
+				if attempt > 0:
+					raise
+				if self.session_alive(e):
+					print(f"DEBUG: Page error ({e.__class__.__name__}), retrying in the same browser")
+					reload = True
+					continue
+				# Driver crashed or the tab went away: start over once
+				print(f"DEBUG: Browser session lost ({e.__class__.__name__}), restarting")
+				self.close()
+				self.polls = 0
+		raise RuntimeError("Browser session could not be restarted")
+
+	def session_alive(self, error: Optional[Exception] = None) -> bool:
+		"""False when `error` or a probe shows the browser session or driver is gone."""
+		from selenium.common.exceptions import InvalidSessionIdException, NoSuchWindowException
+
+		if self.driver is None or isinstance(error, (InvalidSessionIdException, NoSuchWindowException)):
+			return False
+		try:
+			self.driver.execute_script("return 1")
+			return True
+		except Exception:
+			return False
+
+	def fetch_cached(self, city: str, street: str, house_num: str) -> Optional[str]:
+		"""Submit the form from cached selections; None on a miss or rejection.
+
+		A rejected entry is invalidated and the page reloaded so the
+		interactive flow starts from a clean form.
+		"""
+		from selenium.common.exceptions import TimeoutException
+		from selenium.webdriver.support.ui import WebDriverWait
+
+		cache = self.autocomplete_cache
+		if cache is None:
+			return None
+		entry = cache.get(city, street, house_num)
+		if not entry:
+			return None
+		with span("autocomplete.cached_submit"):
+			try:
+				if not self.driver.execute_script(RESTORE_FORM_JS, entry):
+					raise TimeoutException("form or DisconSchedule.ajax.formSubmit missing")
+				saved_wait, self.wait = self.wait, WebDriverWait(self.driver, CACHED_SUBMIT_TIMEOUT)
+				try:
+					# The group name only appears when the site accepted the address
+					self.wait.until(lambda d: d.execute_script(
+						"const g=document.getElementById('group-name'); return g && g.innerText && g.innerText.trim().length>0;"
+					))
+					html = self.read_fact_tables()
+				finally:
+					self.wait = saved_wait
+				print(f"DEBUG: Used cached autocomplete selections for {house_num!r}")
+				return html
+			except (TimeoutException, RuntimeError) as e:
+				print(f"DEBUG: Cached autocomplete selections rejected ({e}), falling back to typing")
+				cache.invalidate(city, street, house_num)
+		self._reload()
+		return None
+
+	def remember_form(self, city: str, street: str, house_num: str) -> None:
+		if self.autocomplete_cache is None:
+			return
+		try:
+			state = self.driver.execute_script(FORM_STATE_JS)
+		except Exception as e:
+			print(f"DEBUG: Could not snapshot form state: {e}")
+			return
+		if state and all((state.get("fields") or {}).get(k) for k in ("city", "street", "house_num")):
+			self.autocomplete_cache.put(city, street, house_num, state)
+
+	def dismiss_blocking_modal(self) -> None:
+		"""Close/remove first-load modal that can intercept clicks."""
+		from selenium.webdriver.common.by import By
+		from selenium.webdriver.common.keys import Keys
+
+		driver = self.driver
+		# Try a few different strategies. If none work, we fall back to JS remove.
+		try:
+			# Wait briefly to see if modal is present
+			modal_present = driver.execute_script(MODAL_PRESENT_JS)
+		except Exception:
+			modal_present = False
+
+		if not modal_present:
+			return
+
+		# 1) Click common close buttons
+		close_selectors = [
+			".modal__container [data-modal-close]",
+			".modal__container .modal__close",
+			".modal__container .close",
+			".modal__container button[aria-label='Close']",
+			".modal__container button",
+		]
+		for sel in close_selectors:
+			try:
+				btn = driver.find_element(By.CSS_SELECTOR, sel)
+				driver.execute_script("arguments[0].scrollIntoView({block:'center'});", btn)
+				btn.click()
+				time.sleep(0.3)
+				# If modal gone, stop
+				if driver.execute_script(MODAL_GONE_JS):
+					return
+			except Exception:
+				pass
+
+		# 2) Press Escape
+		try:
+			body = driver.find_element(By.TAG_NAME, "body")
+			body.send_keys(Keys.ESCAPE)
+			time.sleep(0.3)
+			if driver.execute_script(MODAL_GONE_JS):
+				return
+		except Exception:
+			pass
+
+		# 3) Force-remove modal + backdrops (last resort)
+		try:
+			driver.execute_script(
+				"""
+				for (const sel of ['.modal__container[aria-modal="true"]', '.modal__container--firstPopup', '.m-attention__container']) {
+					const el = document.querySelector(sel);
+					if (el) el.remove();
+				}
+				// remove common backdrops/locks
+				for (const sel of ['.modal__overlay', '.modal__backdrop', '.ps__rail-x', '.ps__rail-y']) {
+					const els = document.querySelectorAll(sel);
+					els.forEach(e => e.remove());
+				}
+				document.documentElement.style.overflow = 'auto';
+				document.body.style.overflow = 'auto';
+				"""
+			)
+			time.sleep(0.2)
+		except Exception:
+			pass
+
+	def pick_autocomplete_exact(self, input_id: str, value: str) -> None:
+		from selenium.webdriver.common.by import By
+		from selenium.webdriver.common.keys import Keys
+		from selenium.webdriver.support import expected_conditions as EC
+		from selenium.common.exceptions import ElementNotInteractableException
+
+		driver = self.driver
+		wait = self.wait
+		print(f"Selecting {input_id} -> {value}")
+		# Always re-fetch an enabled element (DOM may change after selection)
+		def enabled_visible(d):
+			el = d.find_element(By.ID, input_id)
+			return el if el.is_displayed() and el.is_enabled() else False
+		inp = wait.until(enabled_visible)
+		# Ensure any modal isn't intercepting clicks
+		self.dismiss_blocking_modal()
+		driver.execute_script("arguments[0].scrollIntoView({block:'center'});", inp)
+		wait.until(EC.element_to_be_clickable((By.ID, input_id)))
+
+		# Type using WebElement send_keys to mimic real user input
+		try:
+			inp.click()
+		except Exception:
+			pass
+		try:
+			inp.send_keys(Keys.COMMAND, 'a')
+			inp.send_keys(Keys.BACKSPACE)
+		except Exception:
+			pass
+		try:
+			inp.send_keys(value)
+		except ElementNotInteractableException:
+			# Some states report enabled but still block typing; use JS input event.
+			driver.execute_script(
+				"arguments[0].focus(); arguments[0].value = arguments[1]; arguments[0].dispatchEvent(new Event('input', {bubbles:true}));",
+				inp,
+				value,
+			)
+
+		# Find and click an item from this input's autocomplete list
+		deadline = time.time() + 25
+		picked = False
+		last_error = None
+		while time.time() < deadline and not picked:
+			try:
+				input_el = driver.find_element(By.ID, input_id)
+				wrap = input_el.find_element(By.XPATH, "ancestor::div[contains(@class,'autocomplete')]")
+				# Some UIs only show suggestions after clicking the dropdown icon
+				try:
+					items_wrap = wrap.find_element(By.CSS_SELECTOR, ".autocomplete-items")
+					items = items_wrap.find_elements(By.CSS_SELECTOR, "div")
+				except Exception:
+					items = []
+
+				if not items:
+					try:
+						icon = wrap.find_element(By.CSS_SELECTOR, "img")
+						icon.click()
+					except Exception:
+						pass
+					time.sleep(0.3)
+					continue
+
+				target = value.strip().lower()
+				# exact match first
+				for it in items:
+					t = (it.text or '').strip().lower()
+					if t == target:
+						it.click()
+						picked = True
+						break
+				if picked:
+					break
+				# contains fallback
+				for it in items:
+					t = (it.text or '').strip().lower()
+					if target in t:
+						it.click()
+						picked = True
+						break
+				if picked:
+					break
+				items[0].click()
+				picked = True
+				break
+			except Exception as e:
+				last_error = e
+				time.sleep(0.3)
+
+		if not picked:
+			# Dump wrapper HTML for debugging
+			try:
+				wrap_html = driver.execute_script(
+					"const inp = document.getElementById(arguments[0]); const w = inp && inp.closest('.autocomplete'); return w ? w.outerHTML : null;",
+					input_id,
+				)
+			except Exception:
+				wrap_html = None
+			if wrap_html:
+				with open(f"dtek_autocomplete_{input_id}.html", "w", encoding="utf-8") as f:
+					f.write(wrap_html)
+			raise RuntimeError(f"Autocomplete suggestions not selectable for {input_id}: {last_error}")
+		# Some flows rely on change/blur events after selecting from list
+		try:
+			driver.execute_script(
+				"arguments[0].dispatchEvent(new Event('change', {bubbles:true})); arguments[0].blur();",
+				inp,
+			)
+		except Exception:
+			pass
+		try:
+			final_val = inp.get_attribute('value')
+		except Exception:
+			final_val = None
+		print(f"Selected {input_id} (value now: {final_val!r})")
+
+	def fill_form_and_read(self, city: str, street: str, house_num: str) -> str:
+		from selenium.webdriver.common.by import By
+
+		driver = self.driver
+		wait = self.wait
+
+		# Fill fields strictly in order
+		with span("autocomplete.city"):
+			self.pick_autocomplete_exact("city", city)
+		# Nudge: some versions require an explicit street-list load
+		try:
+			driver.execute_script(
+				"if (typeof DisconSchedule !== 'undefined' && DisconSchedule.ajax) {"
+				"  const keys = Object.keys(DisconSchedule.ajax);"
+				"  for (const k of keys) {"
+				"    if (k.toLowerCase().includes('street')) { try { DisconSchedule.ajax[k](); } catch(e) {} }"
+				"  }"
+				"}"
+			)
+		except Exception:
+			pass
+		# Give the page a moment to unlock street after city selection
+		with span("sleep.street_unlock"):
+			time.sleep(0.5)
+		# Some sessions keep street disabled until an internal flag is set by the popup.
+		# If it's still disabled, force-enable it so we can proceed with sequential filling.
+		try:
+			driver.execute_script(
+				"const el = document.getElementById('street'); if (el) { el.disabled = false; el.removeAttribute('disabled'); }"
+			)
+		except Exception:
+			pass
+
+		# Wait until street becomes enabled after selecting city; if stuck, try to trigger invisible load
+		with span("wait.street_enabled"):
+			try:
+				wait.until(lambda d: d.find_element(By.ID, "street").is_enabled())
+			except Exception:
+				try:
+					ajax_keys = driver.execute_script(
+						"return (typeof DisconSchedule !== 'undefined' && DisconSchedule.ajax) ? Object.keys(DisconSchedule.ajax) : [];"
+					)
+					print('DisconSchedule.ajax keys:', ajax_keys)
+				except Exception:
+					pass
+				# Attempt to trigger street list population if the site exposes helpers
+				try:
+					driver.execute_script(
+						"if (typeof DisconSchedule !== 'undefined' && DisconSchedule.ajax) {"
+						" if (DisconSchedule.ajax.getStreetInvisibly) DisconSchedule.ajax.getStreetInvisibly();"
+						" if (DisconSchedule.ajax.getStreet) DisconSchedule.ajax.getStreet();"
+						" }"
+					)
+				except Exception:
+					pass
+				wait.until(lambda d: d.find_element(By.ID, "street").is_enabled())
+		with span("autocomplete.street"):
+			self.pick_autocomplete_exact("street", street)
+
+		# Kick off async home list load if the site uses it
+		try:
+			driver.execute_script(
+				"if (typeof DisconSchedule !== 'undefined' && DisconSchedule.ajax && DisconSchedule.ajax.getHomeNumInvisibly) DisconSchedule.ajax.getHomeNumInvisibly();"
+			)
+		except Exception:
+			pass
+
+		# Per spec: wait 2 seconds before house
+		with span("sleep.before_house"):
+			time.sleep(2)
+		# Force-enable house input if still disabled
+		try:
+			driver.execute_script(
+				"const el = document.getElementById('house_num'); if (el) { el.disabled = false; el.removeAttribute('disabled'); }"
+			)
+		except Exception:
+			pass
+
+		# Ensure house input becomes enabled before interacting
+		def house_enabled(d):
+			try:
+				el = d.find_element(By.ID, "house_num")
+				return el.is_displayed() and el.is_enabled()
+			except Exception:
+				return False
+		with span("wait.house_enabled"):
+			wait.until(house_enabled)
+
+		with span("autocomplete.house_num"):
+			self.pick_autocomplete_exact("house_num", house_num)
+
+		# After selecting house, trigger the site's submit that builds the table
+		try:
+			driver.execute_script("if (typeof DisconSchedule !== 'undefined' && DisconSchedule.ajax && DisconSchedule.ajax.formSubmit) DisconSchedule.ajax.formSubmit('getHomeNum');")
+		except Exception:
+			pass
+
+		return self.read_fact_tables()
+
+	def read_fact_tables(self) -> str:
+		"""Wait for the rendered fact tables and return the container HTML."""
+		from selenium.webdriver.common.by import By
+		from selenium.webdriver.support import expected_conditions as EC
+
+		wait = self.wait
+		with span("wait.fact_tables"):
+			# Wait until the fact tables container appears and an active table is rendered
+			wait.until(EC.presence_of_element_located((By.CSS_SELECTOR, self.tables_selector)))
+			# Wait for an active table or at least any table to be present
+			wait.until(lambda d: d.execute_script(
+				"const w = document.querySelector(arguments[0]); return !!(w && (w.querySelector('.discon-fact-table.active') || w.querySelector('.discon-fact-table')))",
+				self.tables_selector,
+			))
+
+		# Also wait for #group-name to show something (helps ensure selection applied)
+		with span("wait.group_name"):
+			try:
+				wait.until(lambda d: d.execute_script("const g=document.getElementById('group-name'); return g && g.innerText && g.innerText.trim().length>0;"))
+			except Exception:
+				# not critical, continue
+				pass
+
+		# Return the whole tables container so we can parse all dates (today/tomorrow)
+		html = self.driver.execute_script(
+			"const wrap = document.querySelector(arguments[0]); return wrap ? wrap.outerHTML : '';",
+			self.tables_selector,
+		)
+		if not html:
+			raise RuntimeError("Fact table not found after filling form")
+		try:
+			self.group = self.driver.execute_script(GROUP_JS)
+		except Exception as e:
+			print(f"DEBUG: Could not read the outage group: {e}")
+		return html
+
+
+class SessionPool:
+	"""Bounded set of warm sessions, one per worker thread.
+
+	Run it from a thread pool of at most `size` workers: each worker lazily gets
+	its own session (Selenium drivers are not thread-safe), so no more than
+	`size` browsers are ever alive. `factory` builds a session for a URL.
+	"""
+
+	def __init__(self, url: str, size: int, factory=BrowserSession):
+		self.url = url
+		self.size = size
+		self.factory = factory
+		self._local = threading.local()
+		self._lock = threading.Lock()
+		self._sessions = []
+
+	def __enter__(self) -> "SessionPool":
+		return self
+
+	def __exit__(self, *exc) -> None:
+		self.close()
+
+	def get(self):
+		session = getattr(self._local, "session", None)
+		if session is None:
+			with self._lock:
+				if len(self._sessions) >= self.size:
+					raise RuntimeError(f"SessionPool exhausted ({self.size} sessions)")
+				session = self.factory(self.url)
+				self._sessions.append(session)
+			self._local.session = session
+		return session
+
+	def close(self) -> None:
+		with self._lock:
+			sessions, self._sessions = self._sessions, []
+		for session in sessions:
+			close = getattr(session, "close", None)
+			if close:
+				close()
@@ -0,0 +1,131 @@
+"""Compact, hashable representation of one day's 48 half-hour slots.
+
+Each slot is 2 bits ('unknown'=0, 'on'=1, 'off'=2, 'maybe'=3), kept as two
+48-bit planes in a single int (low bits of every slot, then high bits), so a
+day is 12 bytes when serialised. Equality and hashing are int operations, and
+range extraction works on bit masks rather than walking the list.
+"""
+from typing import Iterable, List, Optional, Tuple
+
+
+SLOTS_PER_DAY = 48
+PACKED_SIZE = 12  # bytes: 48 slots * 2 bits
+STATUS_CODES = {"unknown": 0, "on": 1, "off": 2, "maybe": 3}
+CODE_STATUS = {code: status for status, code in STATUS_CODES.items()}
+_PLANE = (1 << SLOTS_PER_DAY) - 1
+
+
+def slot_time(index: int) -> str:
+	"""'HH:MM' at the start of half-hour slot `index` (48 -> '24:00')."""
+	h, m = divmod(index, 2)
+	return f"{h:02d}:{'00' if m == 0 else '30'}"
+
+
+class DaySchedule:
+	__slots__ = ("bits",)
+
+	def __init__(self, bits: int = 0):
+		self.bits = bits
+
+	@classmethod
+	def from_slots(cls, slots: Iterable[str]) -> "DaySchedule":
+		"""Pack a slot list; missing trailing slots stay 'unknown'."""
+		lo = hi = 0
+		for i, status in enumerate(slots):
+			if i >= SLOTS_PER_DAY:
+				break
+			code = STATUS_CODES.get(status, 0)
+			if code & 1:
+				lo |= 1 << i
+			if code & 2:
+				hi |= 1 << i
+		return cls(lo | (hi << SLOTS_PER_DAY))
+
+	@classmethod
+	def from_bytes(cls, data: bytes) -> "DaySchedule":
+		if len(data) != PACKED_SIZE:
+			raise ValueError(f"DaySchedule needs {PACKED_SIZE} bytes, got {len(data)}")
+		return cls(int.from_bytes(data, "little"))
+
+	@classmethod
+	def from_hex(cls, text: str) -> "DaySchedule":
+		return cls.from_bytes(bytes.fromhex(text))
+
+	def to_bytes(self) -> bytes:
+		return self.bits.to_bytes(PACKED_SIZE, "little")
+
+	def hex(self) -> str:
+		return self.to_bytes().hex()
+
+	def to_slots(self) -> List[str]:
+		lo = self.bits & _PLANE
+		hi = self.bits >> SLOTS_PER_DAY
+		return [CODE_STATUS[((lo >> i) & 1) | (((hi >> i) & 1) << 1)] for i in range(SLOTS_PER_DAY)]
+
+	def mask(self, status: str) -> int:
+		"""48-bit mask with bit i set where slot i has `status`."""
+		code = STATUS_CODES.get(status)
+		if code is None:
+			return 0
+		lo = self.bits & _PLANE
+		hi = self.bits >> SLOTS_PER_DAY
+		return (lo if code & 1 else ~lo) & (hi if code & 2 else ~hi) & _PLANE
+
+	def count(self, status: str) -> int:
+		return bin(self.mask(status)).count("1")
+
+	def slot_ranges(self, status: str) -> List[Tuple[int, int]]:
+		"""Half-open [start, end) slot index runs of `status`."""
+		return mask_ranges(self.mask(status))
+
+	def ranges(self, status: str) -> List[str]:
+		"""Runs of `status` as 'HH:MM - HH:MM' strings (same as slots_to_ranges)."""
+		return [f"{slot_time(s)} - {slot_time(e)}" for s, e in self.slot_ranges(status)]
+
+	def __eq__(self, other) -> bool:
+		return isinstance(other, DaySchedule) and self.bits == other.bits
+
+	def __hash__(self) -> int:
+		return hash(self.bits)
+
+	def __repr__(self) -> str:
+		return f"DaySchedule({self.hex()})"
+
+
+def mask_ranges(mask: int) -> List[Tuple[int, int]]:
+	"""Split a slot bit mask into [start, end) runs using run-boundary bits."""
+	starts = mask & ~(mask << 1)
+	ends = mask & ~(mask >> 1)
+	runs: List[Tuple[int, int]] = []
+	while starts:
+		s_bit = starts & -starts
+		e_bit = ends & -ends
+		runs.append((s_bit.bit_length() - 1, e_bit.bit_length()))
+		starts ^= s_bit
+		ends ^= e_bit
+	return runs
+
+
+def pack_results(results: List[dict]) -> List[dict]:
+	"""State form of results: 'slots' list replaced by the 24-char hex 'packed'.
+
+	A day the parser could not read (empty slots) is stored as ''.
+	"""
+	packed = []
+	for res in results:
+		entry = {k: v for k, v in res.items() if k != "slots"}
+		slots = res.get("slots") or []
+		entry["packed"] = DaySchedule.from_slots(slots).hex() if slots else ""
+		packed.append(entry)
+	return packed
+
+
+def unpack_results(entries: Optional[List[dict]]) -> List[dict]:
+	"""Inverse of pack_results; entries still holding a 'slots' list pass through."""
+	results = []
+	for entry in entries or []:
+		res = {k: v for k, v in entry.items() if k != "packed"}
+		if "slots" not in res:
+			res["slots"] = DaySchedule.from_hex(entry["packed"]).to_slots() if entry.get("packed") else []
+		results.append(res)
+	return results
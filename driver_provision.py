@@ -0,0 +1,164 @@
+"""Chromedriver provisioning without a network round trip on every start.
+
+`ChromeDriverManager().install()` checks the driver registry (and may
+download) each time a browser starts. Here the driver is resolved once per
+installed Chrome version:
+
+1. CHROMEDRIVER_PATH set: use that binary as is (fully offline).
+2. Otherwise the local Chrome version is read from the binary
+   (`--version`). If the cache holds a driver for that version whose
+   SHA-256 still matches the manifest, it is used without any network access.
+3. Otherwise (first run, Chrome upgraded, cache corrupted) webdriver_manager
+   fetches a driver once; it is copied into DRIVER_CACHE_DIR and recorded in
+   the manifest. With DRIVER_OFFLINE=1 this step raises instead.
+
+The resolved path is memoised for the process, so a SessionPool of browsers
+provisions once.
+"""
+import hashlib
+import json
+import os
+import re
+import shutil
+import stat
+import subprocess
+import threading
+from typing import Optional
+
+
+CHROMEDRIVER_PATH = os.environ.get("CHROMEDRIVER_PATH", "")
+CHROME_BINARY = os.environ.get("CHROME_BINARY", "")
+DRIVER_CACHE_DIR = os.environ.get(
+	"DRIVER_CACHE_DIR", os.path.join(os.path.expanduser("~"), ".cache", "py-actions", "chromedriver")
+)
+DRIVER_OFFLINE = os.environ.get("DRIVER_OFFLINE", "0") == "1"
+
+CHROME_CANDIDATES = ("google-chrome", "google-chrome-stable", "chromium", "chromium-browser", "chrome")
+_VERSION_RE = re.compile(r"(\d+\.\d+\.\d+\.\d+)")
+
+_lock = threading.Lock()
+_resolved: Optional[str] = None
+
+
+class DriverProvisionError(RuntimeError):
+	"""Raised when no usable chromedriver can be provided."""
+
+
+def chrome_version(binary: Optional[str] = None) -> Optional[str]:
+	"""Full version of the installed Chrome/Chromium, e.g. '126.0.6478.126'."""
+	candidates = [binary] if binary else ([CHROME_BINARY] if CHROME_BINARY else list(CHROME_CANDIDATES))
+	for candidate in candidates:
+		path = shutil.which(candidate) or (candidate if os.path.isfile(candidate) else None)
+		if not path:
+			continue
+		try:
+			out = subprocess.run([path, "--version"], capture_output=True, text=True, timeout=10).stdout
+		except (OSError, subprocess.SubprocessError):
+			continue
+		m = _VERSION_RE.search(out or "")
+		if m:
+			return m.group(1)
+	return None
+
+
+def file_sha256(path: str) -> str:
+	h = hashlib.sha256()
+	with open(path, "rb") as f:
+		for chunk in iter(lambda: f.read(1 << 20), b""):
+			h.update(chunk)
+	return h.hexdigest()
+
+
+class DriverCache:
+	"""Drivers under `root/<chrome version>/` plus a `manifest.json` of hashes."""
+
+	def __init__(self, root: str = DRIVER_CACHE_DIR):
+		self.root = root
+		self.manifest_path = os.path.join(root, "manifest.json")
+
+	def _manifest(self) -> dict:
+		try:
+			with open(self.manifest_path, "r", encoding="utf-8") as f:
+				data = json.load(f)
+			return data if isinstance(data, dict) else {}
+		except (FileNotFoundError, ValueError):
+			return {}
+
+	def lookup(self, version: str) -> Optional[str]:
+		"""Cached driver for `version` if present and intact."""
+		entry = self._manifest().get(version)
+		if not entry:
+			return None
+		path = entry.get("path") or ""
+		if not os.path.isfile(path):
+			return None
+		if file_sha256(path) != entry.get("sha256"):
+			print(f"DEBUG: Cached chromedriver {path} failed the integrity check")
+			return None
+		return path
+
+	def store(self, version: str, source: str) -> str:
+		"""Copy `source` into the cache for `version`; returns the cached path."""
+		target_dir = os.path.join(self.root, version)
+		os.makedirs(target_dir, exist_ok=True)
+		target = os.path.join(target_dir, os.path.basename(source))
+		tmp = f"{target}.tmp"
+		shutil.copyfile(source, tmp)
+		os.chmod(tmp, os.stat(tmp).st_mode | stat.S_IXUSR | stat.S_IXGRP | stat.S_IXOTH)
+		os.replace(tmp, target)
+		manifest = self._manifest()
+		manifest[version] = {"path": target, "sha256": file_sha256(target)}
+		tmp_manifest = f"{self.manifest_path}.tmp"
+		with open(tmp_manifest, "w", encoding="utf-8") as f:
+			json.dump(manifest, f, indent=2, sort_keys=True)
+		os.replace(tmp_manifest, self.manifest_path)
+		return target
+
+
+def _download(version: Optional[str]) -> str:
+	from webdriver_manager.chrome import ChromeDriverManager
+
+	if not version:
+		return ChromeDriverManager().install()
+	# Pin to the installed browser (the keyword was `version` before webdriver-manager 4)
+	try:
+		manager = ChromeDriverManager(driver_version=version)
+	except TypeError:
+		manager = ChromeDriverManager(version=version)
+	return manager.install()
+
+
+def chromedriver_path(cache: Optional[DriverCache] = None, offline: bool = DRIVER_OFFLINE) -> str:
+	"""Path of a chromedriver matching the installed Chrome (see module docstring)."""
+	global _resolved
+	with _lock:
+		if _resolved is not None and os.path.isfile(_resolved):
+			return _resolved
+		if CHROMEDRIVER_PATH:
+			if not os.access(CHROMEDRIVER_PATH, os.X_OK):
+				raise DriverProvisionError(f"CHROMEDRIVER_PATH {CHROMEDRIVER_PATH} is not an executable file")
+			_resolved = CHROMEDRIVER_PATH
+			return _resolved
+
+		cache = cache or DriverCache()
+		version = chrome_version()
+		if version:
+			cached = cache.lookup(version)
+			if cached:
+				_resolved = cached
+				return _resolved
+		if offline:
+			raise DriverProvisionError(
+				f"No cached chromedriver for Chrome {version or '(not found)'} and DRIVER_OFFLINE=1; set CHROMEDRIVER_PATH"
+			)
+		print(f"DEBUG: Provisioning chromedriver for Chrome {version or '(unknown version)'}")
+		try:
+			downloaded = _download(version)
+		except Exception as e:
+			if not version:
+				raise DriverProvisionError(f"chromedriver download failed: {e}") from e
+			# Exact build not published as a driver: fall back to the manager's own match
+			print(f"DEBUG: No driver for {version} ({e}), letting webdriver_manager pick")
+			downloaded = _download(None)
+		_resolved = cache.store(version, downloaded) if version else downloaded
+		return _resolved
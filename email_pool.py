@@ -0,0 +1,180 @@
+"""Pooled SMTP delivery for many recipients.
+
+`SmtpPool` keeps up to `size` authenticated connections and sends a batch of
+messages over them in parallel, one worker thread per connection, so the TLS
+handshake and login are paid once per connection instead of once per
+message. A connection that the server dropped (or that sat idle past
+`idle_check` seconds and fails NOOP) is reopened and the message retried;
+connections are recycled after `max_per_connection` messages to stay under
+provider per-session limits.
+
+Any SMTP server works for testing, e.g. `python -m aiosmtpd -n -l localhost:8025`
+with `SmtpSettings("localhost", 8025, use_ssl=False)`.
+"""
+import queue
+import smtplib
+import threading
+import time
+from email.message import EmailMessage
+from typing import Iterable, List, NamedTuple, Optional
+
+
+class SmtpSettings(NamedTuple):
+	host: str
+	port: int
+	user: Optional[str] = None
+	password: Optional[str] = None
+	use_ssl: bool = True
+	starttls: bool = False
+	timeout: float = 30.0
+
+
+# Errors after which the connection is unusable but the message may still go through
+RECONNECT_ERRORS = (smtplib.SMTPServerDisconnected, smtplib.SMTPConnectError, OSError)
+# 421: server is closing the transmission channel
+RECONNECT_CODES = {421}
+
+
+class _Connection:
+	def __init__(self, srv: smtplib.SMTP):
+		self.srv = srv
+		self.sent = 0
+		self.last_used = time.monotonic()
+
+
+class SmtpPool:
+	def __init__(
+		self,
+		settings: SmtpSettings,
+		size: int = 3,
+		max_per_connection: int = 100,
+		max_retries: int = 2,
+		idle_check: float = 30.0,
+	):
+		self.settings = settings
+		self.size = max(1, size)
+		self.max_per_connection = max_per_connection
+		self.max_retries = max_retries
+		self.idle_check = idle_check
+		self._idle: "queue.LifoQueue[_Connection]" = queue.LifoQueue()
+		self.connects = 0
+
+	def __enter__(self) -> "SmtpPool":
+		return self
+
+	def __exit__(self, *exc) -> None:
+		self.close()
+
+	def _connect(self) -> _Connection:
+		s = self.settings
+		if s.use_ssl:
+			srv = smtplib.SMTP_SSL(s.host, s.port, timeout=s.timeout)
+		else:
+			srv = smtplib.SMTP(s.host, s.port, timeout=s.timeout)
+		try:
+			srv.ehlo()
+			if s.starttls and not s.use_ssl:
+				srv.starttls()
+				srv.ehlo()
+			if s.user:
+				srv.login(s.user, s.password or "")
+		except Exception:
+			srv.close()
+			raise
+		self.connects += 1
+		return _Connection(srv)
+
+	@staticmethod
+	def _discard(conn: Optional[_Connection]) -> None:
+		if conn is None:
+			return
+		try:
+			conn.srv.quit()
+		except Exception:
+			conn.srv.close()
+
+	def _checkout(self) -> _Connection:
+		"""An idle connection that still answers NOOP, or a new one."""
+		while True:
+			try:
+				conn = self._idle.get_nowait()
+			except queue.Empty:
+				return self._connect()
+			if time.monotonic() - conn.last_used < self.idle_check:
+				return conn
+			try:
+				if conn.srv.noop()[0] == 250:
+					return conn
+			except RECONNECT_ERRORS:
+				pass
+			self._discard(conn)
+
+	def _checkin(self, conn: _Connection) -> None:
+		if conn.sent >= self.max_per_connection:
+			self._discard(conn)
+		else:
+			conn.last_used = time.monotonic()
+			self._idle.put(conn)
+
+	def _worker(self, todo: "queue.Queue[tuple]", results: List[Optional[dict]]) -> None:
+		conn: Optional[_Connection] = None
+		while True:
+			try:
+				idx, msg = todo.get_nowait()
+			except queue.Empty:
+				break
+			result = {"to": msg["To"], "ok": False, "attempts": 0, "error": None}
+			while result["attempts"] <= self.max_retries:
+				result["attempts"] += 1
+				try:
+					if conn is None:
+						# After a drop, pooled siblings are likely stale too: open a fresh one
+						conn = self._connect() if result["attempts"] > 1 else self._checkout()
+					conn.srv.send_message(msg)
+					conn.sent += 1
+					result["ok"] = True
+					result["error"] = None
+					break
+				except smtplib.SMTPResponseException as e:
+					result["error"] = f"{e.smtp_code} {e.smtp_error!r}"
+					if e.smtp_code not in RECONNECT_CODES:
+						break
+					self._discard(conn)
+					conn = None
+				except smtplib.SMTPRecipientsRefused as e:
+					result["error"] = str(e.recipients)
+					break
+				except RECONNECT_ERRORS as e:
+					result["error"] = str(e) or type(e).__name__
+					self._discard(conn)
+					conn = None
+			results[idx] = result
+			if conn is not None and conn.sent >= self.max_per_connection:
+				self._discard(conn)
+				conn = None
+		if conn is not None:
+			self._checkin(conn)
+
+	def send_all(self, messages: Iterable[EmailMessage]) -> List[dict]:
+		"""Send every message; returns {to, ok, attempts, error} per message, in order."""
+		messages = list(messages)
+		todo: "queue.Queue[tuple]" = queue.Queue()
+		for item in enumerate(messages):
+			todo.put(item)
+		results: List[Optional[dict]] = [None] * len(messages)
+		workers = [
+			threading.Thread(target=self._worker, args=(todo, results), daemon=True)
+			for _ in range(min(self.size, len(messages)))
+		]
+		for t in workers:
+			t.start()
+		for t in workers:
+			t.join()
+		return results  # type: ignore[return-value]
+
+	def close(self) -> None:
+		while True:
+			try:
+				self._discard(self._idle.get_nowait())
+			except queue.Empty:
+				return
@@ -0,0 +1,199 @@
+"""Single-pass extraction of schedules from the `.discon-fact-tables` container.
+
+The old parser (now benchmarks/legacy_parser.py, kept as the reference)
+parsed the container, serialised every `.discon-fact-table` back to a
+string, re-parsed it to rebuild `table2col` layouts as a new wide table and
+parsed it a third time to read the slots. Here the container is parsed once
+and slots are read straight off the tree for both layouts.
+
+The lxml tree builder is used when installed (HTML_PARSER overrides it).
+"""
+import os
+from datetime import datetime, timezone, timedelta
+from typing import List, Optional, Tuple, Union
+try:
+	from zoneinfo import ZoneInfo
+except Exception:
+	ZoneInfo = None
+
+from bs4 import BeautifulSoup, Tag
+
+from day_schedule import DaySchedule
+
+
+def _default_backend() -> str:
+	try:
+		import lxml  # noqa: F401
+		return "lxml"
+	except ImportError:
+		return "html.parser"
+
+
+PARSER_BACKEND = os.environ.get("HTML_PARSER") or _default_backend()
+
+# Checked in order against the joined class string of an hour cell.
+# 'cell-scheduled-maybe' must precede its prefix 'cell-scheduled'.
+CELL_SLOT_RULES: List[Tuple[str, Tuple[str, str]]] = [
+	("cell-scheduled-maybe", ("maybe", "maybe")),
+	("cell-scheduled", ("off", "off")),
+	("cell-non-scheduled", ("on", "on")),
+	("cell-first-half", ("off", "on")),
+	("cell-second-half", ("on", "off")),
+]
+
+
+def cell_slots(cls: str) -> Tuple[str, str]:
+	"""Map an hour cell's class string to its two half-hour slots."""
+	for marker, slots in CELL_SLOT_RULES:
+		if marker in cls:
+			return slots
+	return ("unknown", "unknown")
+
+
+def slots_to_ranges(slots: List[str], status: str) -> List[str]:
+	ranges: List[str] = []
+	i = 0
+	n = len(slots)
+	while i < n:
+		if slots[i] == status:
+			start = i
+			while i < n and slots[i] == status:
+				i += 1
+			end = i
+
+			sh, sm = divmod(start, 2)
+			eh, em = divmod(end, 2)
+			start_time = f"{sh:02d}:{'00' if sm == 0 else '30'}"
+			end_time = f"{eh:02d}:{'00' if em == 0 else '30'}"
+			ranges.append(f"{start_time} - {end_time}")
+		else:
+			i += 1
+	return ranges
+
+
+def rel_to_date(rel: Optional[str], tz=None) -> Optional[str]:
+	"""Fallback for tables without a `.dates` label: `rel` is a UTC timestamp.
+
+	Dates are taken in `tz` (default Europe/Kyiv).
+	"""
+	if not rel:
+		return None
+	# Fallback to timestamp calculation: convert UTC timestamp -> Europe/Kyiv
+	try:
+		ts = int(rel)
+		# normalize milliseconds -> seconds
+		if ts > 10 ** 12:
+			ts = ts // 1000
+		dt_utc = datetime.fromtimestamp(ts, tz=timezone.utc)
+		if tz is not None:
+			kyiv_tz = tz
+		elif ZoneInfo:
+			kyiv_tz = ZoneInfo("Europe/Kyiv")
+		else:
+			kyiv_tz = timezone(timedelta(hours=2))
+		dt_local = dt_utc.astimezone(kyiv_tz)
+		return dt_local.strftime('%Y-%m-%d')
+	except Exception:
+		return None
+
+
+def extract_date_map(soup_all: Tag) -> dict:
+	"""Map each table `rel` to its ISO date using the `.dates .date` labels."""
+	date_map = {}
+	dates_div = soup_all.find("div", class_="dates")
+	if dates_div:
+		date_divs = dates_div.find_all("div", class_="date")
+		for d in date_divs:
+			rel = d.get("rel")
+			span = d.find("span", {"rel": "date"})
+			if span and rel:
+				date_text = span.get_text().strip()  # e.g., "04.01.26" or "04.01.2026"
+				parts = date_text.split(".")
+				if len(parts) == 3:
+					day, month, year = parts
+					year = year.strip()
+					# support two-digit years (assume 2000s) and four-digit years
+					if len(year) == 2:
+						full_year = "20" + year
+					else:
+						full_year = year
+					try:
+						date_iso = f"{int(full_year):04d}-{int(month):02d}-{int(day):02d}"
+						date_map[rel] = date_iso
+					except Exception:
+						# ignore malformed date parts
+						pass
+	return date_map
+
+
+def _class_str(td: Tag) -> str:
+	classes = td.get("class") or []
+	return classes if isinstance(classes, str) else " ".join(classes)
+
+
+def _classes_to_slots(classes: List[str]) -> List[str]:
+	slots: List[str] = []
+	for cls in classes[:24]:
+		slots.extend(cell_slots(cls))
+	while len(slots) < 48:
+		slots.append("unknown")
+	return slots[:48]
+
+
+def _wide_slots(table: Optional[Tag]) -> Optional[List[str]]:
+	"""Wide layout: one row (preferably `.current-day`) of 24 hour cells."""
+	if table is None:
+		return None
+	tbody = table.find("tbody")
+	if not tbody:
+		return None
+	tr = tbody.find("tr", class_="current-day") or tbody.find("tr")
+	if not tr:
+		return None
+	# Day name cells usually have colspan; hour cells do not.
+	hour_tds = [td for td in tr.find_all("td") if not td.has_attr("colspan")]
+	if not hour_tds:
+		return None
+	return _classes_to_slots([_class_str(td) for td in hour_tds[:24]])
+
+
+def table_slots(tbl: Tag) -> Optional[List[str]]:
+	"""Slots for one `.discon-fact-table` element, wide or `table2col` layout."""
+	first_table = tbl.find("table")
+	if first_table is not None and first_table.find("thead") is not None and len(tbl.find_all("th")) >= 24:
+		return _wide_slots(first_table)
+
+	# Two-column layout: each row's third cell carries the hour class
+	wrap = tbl.find(class_="table2col") or tbl
+	tables = wrap.find_all("table")
+	if len(tables) >= 2:
+		classes = []
+		for t in tables:
+			for tr in t.find_all("tr"):
+				tds = tr.find_all("td")
+				if len(tds) >= 3:
+					classes.append(_class_str(tds[2]))
+		if len(classes) >= 24:
+			return _classes_to_slots(classes)
+	return _wide_slots(first_table)
+
+
+def extract_results(source: Union[str, Tag], backend: Optional[str] = None, tz=None) -> List[dict]:
+	"""Parse all `.discon-fact-table` entries into [{date, off_ranges, slots}].
+
+	`source` is the container HTML or an already-parsed tree; `tz` is the
+	provider's timezone used to date tables that only carry a `rel` timestamp.
+	"""
+	soup_all = source if isinstance(source, Tag) else BeautifulSoup(source, backend or PARSER_BACKEND)
+	date_map = extract_date_map(soup_all)
+
+	results = []
+	for tbl in soup_all.select(".discon-fact-table"):
+		rel = tbl.get("rel") or tbl.get("data-rel")
+		if isinstance(rel, list):
+			rel = " ".join(rel)
+		date_str = date_map.get(rel) or rel_to_date(rel, tz)
+		slots = table_slots(tbl) or []
+		off_ranges = DaySchedule.from_slots(slots).ranges("off")
+		results.append({"date": date_str, "off_ranges": off_ranges, "slots": slots})
+	return results
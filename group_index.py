@@ -0,0 +1,161 @@
+"""Persistent address -> outage group index.
+
+Resolving an address to its group (`getHomeNum`, or the three autocomplete
+inputs in the browser) is the slowest part of a poll, and the answer almost
+never changes. Entries are filled lazily on first lookup and served for up to
+GROUP_INDEX_TTL seconds. Once older than GROUP_INDEX_REFRESH they are still
+served, but `refresh_in_background` re-resolves them off the polling path.
+A fresh resolution that disagrees with the stored group replaces it; the
+Selenium path feeds back the group the page shows (`#group-name`) the same
+way. Changes are kept in memory until `flush()`, which callers run once per
+batch or poll.
+"""
+import json
+import os
+import threading
+import time
+from typing import Callable, Dict, Iterable, List, Optional, Tuple, Union
+
+from autocomplete_cache import cache_key
+
+
+DEFAULT_GROUP_INDEX_FILE = os.environ.get("GROUP_INDEX_FILE", "group_index.json")
+# Hard expiry (default 90 days) and soft age after which entries are re-resolved (default 7 days)
+GROUP_INDEX_TTL = int(os.environ.get("GROUP_INDEX_TTL", str(90 * 24 * 3600)))
+GROUP_INDEX_REFRESH = int(os.environ.get("GROUP_INDEX_REFRESH", str(7 * 24 * 3600)))
+
+AddressTuple = Tuple[str, str, str]
+# Bulk resolver, e.g. HttpFactFetcher.resolve_groups
+Resolver = Callable[[List[AddressTuple]], Dict[tuple, Union[str, Exception]]]
+
+
+class GroupIndex:
+	"""JSON-file backed map of address -> group. Thread-safe."""
+
+	def __init__(
+		self,
+		path: str = DEFAULT_GROUP_INDEX_FILE,
+		ttl: int = GROUP_INDEX_TTL,
+		refresh_after: int = GROUP_INDEX_REFRESH,
+	):
+		self.path = path
+		self.ttl = ttl
+		self.refresh_after = refresh_after
+		self._lock = threading.Lock()
+		self._entries = self._load()
+		self._dirty = False
+		self._refresher: Optional[threading.Thread] = None
+
+	def _load(self) -> dict:
+		try:
+			with open(self.path, "r", encoding="utf-8") as f:
+				data = json.load(f)
+			return data if isinstance(data, dict) else {}
+		except FileNotFoundError:
+			return {}
+		except Exception as e:
+			print(f"DEBUG: Ignoring unreadable group index {self.path}: {e}")
+			return {}
+
+	def _save(self) -> None:
+		tmp = f"{self.path}.tmp"
+		with open(tmp, "w", encoding="utf-8") as f:
+			json.dump(self._entries, f, ensure_ascii=False, indent=1)
+		os.replace(tmp, self.path)
+
+	def flush(self) -> bool:
+		"""Write the index if it changed since the last flush; True if it was written."""
+		with self._lock:
+			if not self._dirty:
+				return False
+			self._save()
+			self._dirty = False
+		return True
+
+	def __len__(self) -> int:
+		return len(self._entries)
+
+	def get(self, city: str, street: str, house_num: str) -> Optional[str]:
+		return self.lookup_many([(city, street, house_num)]).get((city, street, house_num))
+
+	def lookup_many(self, addresses: Iterable[AddressTuple]) -> Dict[AddressTuple, str]:
+		"""{address: group} for every address with an unexpired entry (one lock, no I/O)."""
+		now = time.time()
+		found = {}
+		with self._lock:
+			for address in addresses:
+				entry = self._entries.get(cache_key(*address))
+				if entry and now - entry.get("resolved_at", 0) <= self.ttl:
+					found[tuple(address)] = entry["group"]
+		return found
+
+	def put_many(self, groups: Dict[AddressTuple, str]) -> List[AddressTuple]:
+		"""Store fresh resolutions; returns the addresses whose group changed."""
+		now = time.time()
+		changed = []
+		with self._lock:
+			for address, group in groups.items():
+				key = cache_key(*address)
+				old = self._entries.get(key)
+				if old and old.get("group") != group:
+					print(f"DEBUG: Group for {key} changed: {old.get('group')} -> {group}")
+					changed.append(tuple(address))
+				self._entries[key] = {"address": list(address), "group": group, "resolved_at": now}
+			if groups:
+				self._dirty = True
+		return changed
+
+	def put(self, city: str, street: str, house_num: str, group: str) -> bool:
+		"""Store one fresh resolution; True if it differs from the indexed group."""
+		return bool(self.put_many({(city, street, house_num): group}))
+
+	def invalidate(self, city: str, street: str, house_num: str) -> None:
+		with self._lock:
+			if self._entries.pop(cache_key(city, street, house_num), None) is not None:
+				self._dirty = True
+
+	def stale(self) -> List[AddressTuple]:
+		"""Addresses whose entry is older than `refresh_after`."""
+		cutoff = time.time() - self.refresh_after
+		with self._lock:
+			return [
+				tuple(e["address"]) for e in self._entries.values()
+				if e.get("resolved_at", 0) < cutoff and len(e.get("address") or ()) == 3
+			]
+
+	def refresh(self, resolver: Resolver, addresses: Optional[List[AddressTuple]] = None) -> int:
+		"""Re-resolve `addresses` (default: stale entries); returns how many changed group."""
+		addresses = self.stale() if addresses is None else addresses
+		if not addresses:
+			return 0
+		resolved = resolver(addresses)
+		groups = {a: g for a, g in resolved.items() if isinstance(g, str)}
+		for address, err in resolved.items():
+			if not isinstance(err, str):
+				print(f"DEBUG: Group refresh failed for {cache_key(*address)}: {err}")
+		changed = self.put_many(groups)
+		self.flush()
+		print(f"DEBUG: Group index refreshed {len(groups)}/{len(addresses)} entries, {len(changed)} changed")
+		return len(changed)
+
+	def refresh_in_background(self, resolver: Resolver) -> Optional[threading.Thread]:
+		"""Start refreshing stale entries on a daemon thread (unless one is running)."""
+		if self._refresher is not None and self._refresher.is_alive():
+			return self._refresher
+		if not self.stale():
+			return None
+
+		def run() -> None:
+			try:
+				self.refresh(resolver)
+			except Exception as e:
+				print(f"DEBUG: Group index refresh failed: {e}")
+
+		self._refresher = threading.Thread(target=run, name="group-index-refresh", daemon=True)
+		self._refresher.start()
+		return self._refresher
+
+	def wait(self, timeout: Optional[float] = None) -> None:
+		"""Let a running background refresh finish (before the process exits)."""
+		if self._refresher is not None:
+			self._refresher.join(timeout)
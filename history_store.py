@@ -0,0 +1,178 @@
+"""Append-only SQLite history of observed schedules.
+
+Each row is one observed version of one address/date: the packed
+`DaySchedule` bytes (12 bytes per day) plus the rendered off ranges. A new row
+is written only when a date's schedule differs from its latest stored
+version, so the table grows with changes, not with polls.
+"""
+import json
+import sqlite3
+import threading
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+
+from day_schedule import DaySchedule
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS schedule_versions (
+	id INTEGER PRIMARY KEY,
+	address TEXT NOT NULL,
+	date TEXT NOT NULL,
+	observed_at TEXT NOT NULL,
+	packed BLOB NOT NULL,
+	off_ranges TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_versions_address_date_time
+	ON schedule_versions (address, date, observed_at);
+CREATE INDEX IF NOT EXISTS idx_versions_observed_at
+	ON schedule_versions (observed_at);
+"""
+
+
+def _off_slots(packed: bytes) -> int:
+	return DaySchedule.from_bytes(packed).count("off") if packed else 0
+
+
+def _now_iso() -> str:
+	return datetime.now(timezone.utc).isoformat()
+
+
+def _row_result(row: sqlite3.Row) -> dict:
+	packed = row["packed"]
+	return {
+		"date": row["date"] or None,
+		"off_ranges": json.loads(row["off_ranges"]),
+		"slots": DaySchedule.from_bytes(packed).to_slots() if packed else [],
+		"observed_at": row["observed_at"],
+	}
+
+
+class HistoryStore:
+	"""Thin wrapper over one SQLite connection; calls are serialised by a lock."""
+
+	def __init__(self, path: str):
+		self.path = path
+		self._lock = threading.Lock()
+		self.conn = sqlite3.connect(path, check_same_thread=False)
+		self.conn.row_factory = sqlite3.Row
+		self.conn.create_function("off_slots", 1, _off_slots, deterministic=True)
+		with self.conn:
+			self.conn.executescript(SCHEMA)
+
+	def close(self) -> None:
+		with self._lock:
+			self.conn.close()
+
+	def latest_fingerprints(self, address: str) -> Dict[str, str]:
+		"""{date: packed hex} of the newest stored version of each date."""
+		with self._lock:
+			rows = self.conn.execute(
+				"""
+				SELECT date, packed FROM schedule_versions v
+				WHERE address = ? AND observed_at = (
+					SELECT MAX(observed_at) FROM schedule_versions
+					WHERE address = v.address AND date = v.date
+				)
+				""",
+				(address,),
+			).fetchall()
+		return {row["date"]: bytes(row["packed"]).hex() for row in rows}
+
+	def record(self, address: str, results: List[dict], observed_at: Optional[str] = None) -> List[str]:
+		"""Append versions for dates whose schedule changed; returns those dates."""
+		observed_at = observed_at or _now_iso()
+		latest = self.latest_fingerprints(address)
+		rows = []
+		for res in results:
+			date = res.get("date") or ""
+			slots = res.get("slots") or []
+			packed = DaySchedule.from_slots(slots).to_bytes() if slots else b""
+			if latest.get(date) == packed.hex():
+				continue
+			rows.append((address, date, observed_at, packed, json.dumps(res.get("off_ranges") or [], ensure_ascii=False)))
+		if rows:
+			with self._lock, self.conn:
+				self.conn.executemany(
+					"INSERT INTO schedule_versions (address, date, observed_at, packed, off_ranges) VALUES (?, ?, ?, ?, ?)",
+					rows,
+				)
+		return [row[1] for row in rows]
+
+	def schedule_as_of(self, address: str, when: str) -> List[dict]:
+		"""Every date's schedule as it was known at ISO time `when`."""
+		with self._lock:
+			rows = self.conn.execute(
+				"""
+				SELECT date, observed_at, packed, off_ranges FROM schedule_versions v
+				WHERE address = ? AND observed_at = (
+					SELECT MAX(observed_at) FROM schedule_versions
+					WHERE address = v.address AND date = v.date AND observed_at <= ?
+				)
+				ORDER BY date
+				""",
+				(address, when),
+			).fetchall()
+		return [_row_result(row) for row in rows]
+
+	def latest_days(self, since: Optional[str] = None, until: Optional[str] = None) -> List[tuple]:
+		"""(address, date, packed bytes) of the final version of every date in [since, until]."""
+		with self._lock:
+			rows = self.conn.execute(
+				"""
+				SELECT address, date, packed FROM schedule_versions v
+				WHERE date != '' AND date >= ? AND date <= ? AND observed_at = (
+					SELECT MAX(observed_at) FROM schedule_versions
+					WHERE address = v.address AND date = v.date
+				)
+				ORDER BY address, date
+				""",
+				(since or "", until or "9999-12-31"),
+			).fetchall()
+		return [(row["address"], row["date"], bytes(row["packed"])) for row in rows]
+
+	def versions(self, address: str, date: str) -> List[dict]:
+		"""All stored versions of one date, oldest first."""
+		with self._lock:
+			rows = self.conn.execute(
+				"""
+				SELECT date, observed_at, packed, off_ranges FROM schedule_versions
+				WHERE address = ? AND date = ? ORDER BY observed_at
+				""",
+				(address, date),
+			).fetchall()
+		return [_row_result(row) for row in rows]
+
+	def monthly_off_hours(self, address: Optional[str] = None) -> List[dict]:
+		"""Total scheduled off hours per address per month (final version of each date)."""
+		params: tuple = ()
+		where = ""
+		if address is not None:
+			where = "AND address = ?"
+			params = (address,)
+		with self._lock:
+			rows = self.conn.execute(
+				f"""
+				SELECT address, substr(date, 1, 7) AS month, SUM(off_slots(packed)) / 2.0 AS off_hours
+				FROM schedule_versions v
+				WHERE date != '' {where} AND observed_at = (
+					SELECT MAX(observed_at) FROM schedule_versions
+					WHERE address = v.address AND date = v.date
+				)
+				GROUP BY address, month ORDER BY address, month
+				""",
+				params,
+			).fetchall()
+		return [dict(row) for row in rows]
+
+	def change_times(self, address: Optional[str] = None) -> List[str]:
+		"""Observed-at timestamps of every stored version (i.e. every change)."""
+		with self._lock:
+			if address is None:
+				rows = self.conn.execute("SELECT observed_at FROM schedule_versions ORDER BY observed_at").fetchall()
+			else:
+				rows = self.conn.execute(
+					"SELECT observed_at FROM schedule_versions WHERE address = ? ORDER BY observed_at",
+					(address,),
+				).fetchall()
+		return [row["observed_at"] for row in rows]
@@ -0,0 +1,390 @@
+"""Browserless fetch engine for the DTEK shutdowns page.
+
+The Selenium flow only exists to make the page call
+`DisconSchedule.ajax.formSubmit('getHomeNum')` and render `.discon-fact-tables`.
+This module performs the same exchange over plain HTTP:
+
+1. GET the shutdowns page to obtain the session cookies, the CSRF token
+   (`<meta name="csrf-token">`) and the embedded `DisconSchedule.fact` data.
+2. POST `method=getHomeNum` to the site's AJAX endpoint to resolve the house
+   to its outage group (`sub_type_reason`).
+3. Render the group's fact data into the same `.discon-fact-tables` markup the
+   browser would produce, so `main()` parses it unchanged.
+
+`fetch_fact_raw` stops before step 3 and returns what the site sent
+(`RawFact`), which is what SNAPSHOT_DIR archives; `raw_fact_html` renders it.
+"""
+import json
+import re
+from datetime import datetime, timezone, timedelta
+from http.cookiejar import CookieJar
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple, Union
+from urllib.error import HTTPError, URLError
+from urllib.parse import urlencode, urljoin
+from urllib.request import HTTPCookieProcessor, Request, build_opener
+try:
+	from zoneinfo import ZoneInfo
+except Exception:
+	ZoneInfo = None
+
+from day_schedule import DaySchedule
+from fact_parser import cell_slots, rel_to_date
+from tracing import span
+
+
+DEFAULT_USER_AGENT = (
+	"Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 "
+	"(KHTML, like Gecko) Chrome/124.0 Safari/537.36"
+)
+
+# Hour value in DisconSchedule.fact -> cell class rendered by the site
+FACT_CELL_CLASSES = {
+	"yes": "cell-non-scheduled",
+	"no": "cell-scheduled",
+	"first": "cell-first-half",
+	"second": "cell-second-half",
+	"maybe": "cell-scheduled-maybe",
+	"mfirst": "cell-scheduled-maybe",
+	"msecond": "cell-scheduled-maybe",
+}
+
+_CSRF_META_RE = re.compile(r'<meta[^>]+name=["\']csrf-token["\'][^>]*content=["\']([^"\']+)["\']', re.I)
+_CSRF_META_REV_RE = re.compile(r'<meta[^>]+content=["\']([^"\']+)["\'][^>]*name=["\']csrf-token["\']', re.I)
+_FACT_RE = re.compile(r"DisconSchedule\.fact\s*=\s*")
+
+
+class FetchError(RuntimeError):
+	"""Raised when the HTTP engine cannot produce the fact tables."""
+
+
+def kyiv_tz():
+	if ZoneInfo:
+		try:
+			return ZoneInfo("Europe/Kyiv")
+		except Exception:
+			pass
+	return timezone(timedelta(hours=2))
+
+
+def extract_csrf_token(page_html: str) -> Optional[str]:
+	m = _CSRF_META_RE.search(page_html) or _CSRF_META_REV_RE.search(page_html)
+	return m.group(1) if m else None
+
+
+def extract_fact(page_html: str) -> Optional[dict]:
+	"""Return the `DisconSchedule.fact` object embedded in the page, if any."""
+	m = _FACT_RE.search(page_html)
+	if not m:
+		return None
+	try:
+		fact, _ = json.JSONDecoder().raw_decode(page_html, m.end())
+	except ValueError:
+		return None
+	return fact if isinstance(fact, dict) else None
+
+
+def render_fact_tables_html(fact: dict, group: str, tz=None) -> str:
+	"""Render one group's fact data as a `.discon-fact-tables` container.
+
+	The markup mirrors what the site renders in the browser (wide layout):
+	a `.dates` strip with `span[rel=date]` labels and one `.discon-fact-table`
+	per day keyed by the same `rel` timestamp.
+	"""
+	days = (fact or {}).get("data") or {}
+	today = str((fact or {}).get("today") or "")
+	tz = tz or kyiv_tz()
+
+	date_parts: List[str] = []
+	table_parts: List[str] = []
+	for idx, rel in enumerate(_sorted_rels(days)):
+		hours = (days.get(rel) or {}).get(group)
+		if not hours:
+			continue
+		active = " active" if (str(rel) == today or (not today and idx == 0)) else ""
+		try:
+			label = datetime.fromtimestamp(int(rel), tz=timezone.utc).astimezone(tz).strftime("%d.%m.%y")
+		except (TypeError, ValueError):
+			label = ""
+		date_parts.append(
+			f'<div class="date{active}" rel="{rel}"><span rel="date">{label}</span></div>'
+		)
+
+		head = ['<th colspan="2">Часові проміжки</th>']
+		cells = ['<td colspan="2">&nbsp;</td>']
+		for h in range(24):
+			head.append(f'<th scope="col"><div>{h:02d}-{(h + 1) % 24:02d}</div></th>')
+			cls = FACT_CELL_CLASSES.get(str(hours.get(str(h + 1), "")), "")
+			cells.append(f'<td class="{cls}"></td>' if cls else "<td></td>")
+		row_cls = ' class="current-day"' if active else ""
+		table_parts.append(
+			f'<div class="discon-fact-table{active}" rel="{rel}"><table>'
+			f'<thead><tr>{"".join(head)}</tr></thead>'
+			f'<tbody><tr{row_cls}>{"".join(cells)}</tr></tbody>'
+			"</table></div>"
+		)
+
+	if not table_parts:
+		return ""
+	return (
+		'<div class="discon-fact-tables">'
+		f'<div class="dates">{"".join(date_parts)}</div>'
+		f'{"".join(table_parts)}'
+		"</div>"
+	)
+
+
+def _sorted_rels(days: dict) -> List[str]:
+	return sorted(days, key=lambda k: int(k) if str(k).isdigit() else 0)
+
+
+def fact_group_results(fact: dict, tz=None) -> Dict[str, List[dict]]:
+	"""{group: [{date, off_ranges, slots}]} for every group and day in `DisconSchedule.fact`.
+
+	Reads the hour values directly instead of rendering and re-parsing HTML;
+	the output matches `extract_results(render_fact_tables_html(fact, group))`.
+	"""
+	days = (fact or {}).get("data") or {}
+	results: Dict[str, List[dict]] = {}
+	for rel in _sorted_rels(days):
+		date_str = rel_to_date(str(rel), tz)
+		for group, hours in (days.get(rel) or {}).items():
+			if not hours:
+				continue
+			slots: List[str] = []
+			for h in range(24):
+				slots.extend(cell_slots(FACT_CELL_CLASSES.get(str(hours.get(str(h + 1), "")), "")))
+			results.setdefault(group, []).append({
+				"date": date_str,
+				"off_ranges": DaySchedule.from_slots(slots).ranges("off"),
+				"slots": slots,
+			})
+	return results
+
+
+class RawFact(NamedTuple):
+	"""The site's data behind one address's fact tables."""
+	fact: dict  # DisconSchedule.fact as sent by the site
+	group: str
+	house: str
+	houses: Optional[dict] = None  # getHomeNum `data` of the street, when it was called
+
+
+def fact_has_group(fact: dict, group: str) -> bool:
+	return any((hours_by_group or {}).get(group) for hours_by_group in ((fact or {}).get("data") or {}).values())
+
+
+def raw_fact_html(raw: RawFact, tz=None) -> str:
+	"""Render a RawFact; with `houses` the group is resolved from them again."""
+	info = _match_house(raw.houses, raw.house) if raw.houses else None
+	reasons = (info or {}).get("sub_type_reason") or []
+	group = str(reasons[0]) if reasons else raw.group
+	return render_fact_tables_html(raw.fact, group, tz)
+
+
+def _match_house(houses: Dict[str, dict], house: str) -> Optional[dict]:
+	if house in houses:
+		return houses[house]
+	target = house.strip().lower()
+	for key, val in houses.items():
+		if str(key).strip().lower() == target:
+			return val
+	return None
+
+
+class HttpFactFetcher:
+	"""Keeps one cookie/CSRF session to the site and answers address queries.
+
+	The session is established lazily on the first request and re-established
+	once if the server rejects the token (expired session, 419/403). The page
+	is loaded again when the fact data no longer covers today, so a fetcher
+	kept across polls does not serve yesterday's schedule.
+	"""
+
+	def __init__(
+		self,
+		url: str,
+		timeout: float = 15.0,
+		user_agent: str = DEFAULT_USER_AGENT,
+		group_index=None,
+		tz=None,
+		ajax_path: str = "ajax",
+	):
+		self.url = url
+		self.group_index = group_index
+		self.tz = tz or kyiv_tz()
+		self.ajax_url = urljoin(url, ajax_path)
+		self.timeout = timeout
+		self.user_agent = user_agent
+		self.cookies = CookieJar()
+		self.opener = build_opener(HTTPCookieProcessor(self.cookies))
+		self.csrf_token: Optional[str] = None
+		self.fact: Optional[dict] = None
+		# Local date the fact data was loaded, for facts without `today`
+		self.fact_loaded_on: Optional[str] = None
+		# Last getHomeNum `data` per (city, street)
+		self.street_data: Dict[tuple, dict] = {}
+
+	def _set_fact(self, fact: Optional[dict]) -> None:
+		self.fact = fact
+		self.fact_loaded_on = datetime.now(self.tz).date().isoformat()
+
+	def fact_is_current(self) -> bool:
+		"""True if the fact data's `today` (or its load date) is the current local date."""
+		if not self.fact:
+			return False
+		today = self.fact.get("today")
+		day = rel_to_date(str(today), self.tz) if today else self.fact_loaded_on
+		return day == datetime.now(self.tz).date().isoformat()
+
+	def _open(self, req: Request) -> str:
+		req.add_header("User-Agent", self.user_agent)
+		with self.opener.open(req, timeout=self.timeout) as resp:
+			charset = resp.headers.get_content_charset() or "utf-8"
+			return resp.read().decode(charset, errors="replace")
+
+	def handshake(self) -> None:
+		"""Load the page to obtain session cookies, CSRF token and fact data."""
+		req = Request(self.url, headers={"Accept": "text/html,application/xhtml+xml"})
+		try:
+			with span("http.handshake"):
+				page_html = self._open(req)
+		except (HTTPError, URLError) as e:
+			raise FetchError(f"Failed to load {self.url}: {e}") from e
+		token = extract_csrf_token(page_html)
+		if not token:
+			raise FetchError("CSRF token not found on page")
+		self.csrf_token = token
+		self._set_fact(extract_fact(page_html))
+
+	def form_submit(self, city: str, street: str) -> dict:
+		"""POST the `getHomeNum` form the page submits after the address is picked."""
+		if not self.csrf_token:
+			self.handshake()
+		update_fact = datetime.now(self.tz).strftime("%d.%m.%Y %H:%M")
+		payload = urlencode({
+			"method": "getHomeNum",
+			"data[0][name]": "city",
+			"data[0][value]": city,
+			"data[1][name]": "street",
+			"data[1][value]": street,
+			"data[2][name]": "updateFact",
+			"data[2][value]": update_fact,
+		}).encode("utf-8")
+
+		for attempt in range(2):
+			req = Request(self.ajax_url, data=payload, method="POST", headers={
+				"Accept": "application/json, text/javascript, */*; q=0.01",
+				"Content-Type": "application/x-www-form-urlencoded; charset=UTF-8",
+				"X-Requested-With": "XMLHttpRequest",
+				"X-CSRF-Token": self.csrf_token or "",
+				"Referer": self.url,
+			})
+			try:
+				with span("http.form_submit"):
+					body = self._open(req)
+			except HTTPError as e:
+				if attempt == 0 and e.code in (401, 403, 419):
+					# Session/CSRF expired: redo the handshake once
+					self.handshake()
+					continue
+				raise FetchError(f"formSubmit failed: HTTP {e.code}") from e
+			except URLError as e:
+				raise FetchError(f"formSubmit failed: {e}") from e
+			try:
+				data = json.loads(body)
+			except ValueError as e:
+				raise FetchError("formSubmit returned non-JSON response") from e
+			if not isinstance(data, dict) or not data.get("result", True):
+				raise FetchError(f"formSubmit rejected: {str(data)[:200]}")
+			return data
+		raise FetchError("formSubmit failed after re-handshake")
+
+	def street_houses(self, city: str, street: str) -> dict:
+		"""{house: info} for one street (one getHomeNum call)."""
+		data = self.form_submit(city, street)
+		if isinstance(data.get("fact"), dict):
+			self._set_fact(data["fact"])
+		houses = data.get("data") or {}
+		houses = houses if isinstance(houses, dict) else {}
+		self.street_data[(city, street)] = houses
+		return houses
+
+	def resolve_group(self, city: str, street: str, house: str, houses: Optional[dict] = None) -> str:
+		if houses is None:
+			houses = self.street_houses(city, street)
+		info = _match_house(houses, house)
+		if not info:
+			raise FetchError(f"House {house!r} not found for {city!r}, {street!r}")
+		reasons = info.get("sub_type_reason") or []
+		if not reasons:
+			raise FetchError(f"No outage group for house {house!r}")
+		return str(reasons[0])
+
+	def resolve_groups(self, addresses: Iterable[Tuple[str, str, str]]) -> Dict[tuple, Union[str, Exception]]:
+		"""Groups for many (city, street, house): one getHomeNum call per street.
+
+		Failures are returned per address instead of raised.
+		"""
+		streets: Dict[tuple, Union[dict, Exception]] = {}
+		groups: Dict[tuple, Union[str, Exception]] = {}
+		for city, street, house in addresses:
+			houses = streets.get((city, street))
+			if houses is None:
+				try:
+					houses = self.street_houses(city, street)
+				except FetchError as e:
+					houses = e
+				streets[(city, street)] = houses
+			try:
+				if isinstance(houses, Exception):
+					raise houses
+				groups[(city, street, house)] = self.resolve_group(city, street, house, houses)
+			except FetchError as e:
+				groups[(city, street, house)] = e
+		return groups
+
+	def fetch_group_results(self) -> Dict[str, List[dict]]:
+		"""Parsed schedules of every group from the current fact data (reloaded if outdated)."""
+		if not self.fact_is_current():
+			self.handshake()
+		if not self.fact:
+			raise FetchError("DisconSchedule.fact not found in page")
+		with span("http.group_results"):
+			return fact_group_results(self.fact, self.tz)
+
+	def fetch_fact_raw(self, city: str, street: str, house: str) -> RawFact:
+		"""The site's fact data and the address's group.
+
+		With a `group_index` a known address costs a single page load (for
+		fresh fact data) instead of the `getHomeNum` round trip; an indexed
+		group missing from the fact data is dropped and resolved again.
+		"""
+		houses = None
+		group = self.group_index.get(city, street, house) if self.group_index is not None else None
+		if group is not None:
+			self.handshake()
+		else:
+			houses = self.street_houses(city, street)
+			group = self.resolve_group(city, street, house, houses)
+			if self.group_index is not None:
+				self.group_index.put(city, street, house, group)
+			if not self.fact_is_current():
+				# A reused session's cached token skips the page load; the POST may not carry the fact
+				self.handshake()
+		if not self.fact:
+			raise FetchError("DisconSchedule.fact not found in page or response")
+		if not fact_has_group(self.fact, group) and self.group_index is not None:
+			self.group_index.invalidate(city, street, house)
+			houses = self.street_houses(city, street)
+			group = self.resolve_group(city, street, house, houses)
+			self.group_index.put(city, street, house, group)
+		if not fact_has_group(self.fact, group):
+			raise FetchError(f"No fact data for group {group}")
+		return RawFact(self.fact, group, house, houses)
+
+	def fetch_fact_table_html(self, city: str, street: str, house: str) -> str:
+		"""Fact tables for one address (see `fetch_fact_raw`)."""
+		raw = self.fetch_fact_raw(city, street, house)
+		with span("http.render"):
+			return render_fact_tables_html(raw.fact, raw.group, self.tz)
+
@@ -0,0 +1,159 @@
+"""Per-address iCalendar feeds of the published off intervals.
+
+With ICAL_DIR set, every parsed schedule is passed to `IcalFeeds.update`.
+The feed of an address (`<ICAL_DIR>/<hash of key>.ics`) is rewritten only
+when its off intervals differ from the ones it was last written with, and
+always atomically (temp file + rename), so a static web server's
+Last-Modified / ETag only change with the schedule and clients can poll it
+with conditional requests. `index.json` in the same directory maps address
+keys to feed files.
+
+Each off range is one VEVENT in UTC. Its UID is derived from the address
+key, the date and the range, so an unchanged interval keeps its UID across
+regenerations and calendar apps update rather than duplicate it.
+"""
+import hashlib
+import json
+import os
+import threading
+from datetime import date as date_cls, datetime, time as time_cls, timedelta, timezone, tzinfo
+from typing import Dict, List, Optional, Tuple
+
+from http_fetch import kyiv_tz
+
+
+ICAL_DIR = os.environ.get("ICAL_DIR", "")
+ICAL_INDEX = "index.json"
+PRODID = "-//py-actions//DTEK outage schedule//UK"
+
+
+def _escape(text: str) -> str:
+	return text.replace("\\", "\\\\").replace(";", "\\;").replace(",", "\\,").replace("\n", "\\n")
+
+
+def _fold(line: str) -> str:
+	"""Fold a content line at 75 octets (RFC 5545 3.1) without splitting UTF-8 sequences."""
+	out, current, size = [], "", 0
+	for ch in line:
+		n = len(ch.encode("utf-8"))
+		if size + n > 75:
+			out.append(current)
+			current, size = " ", 1
+		current += ch
+		size += n
+	out.append(current)
+	return "\r\n".join(out)
+
+
+def _utc(value: datetime) -> str:
+	return value.astimezone(timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+
+
+def range_bounds(day: str, off_range: str, tz: tzinfo) -> Tuple[datetime, datetime]:
+	"""Aware start/end of an 'HH:MM - HH:MM' range on `day` ('24:00' is next midnight)."""
+	base = date_cls.fromisoformat(day)
+
+	def at(hhmm: str) -> datetime:
+		h, m = (int(x) for x in hhmm.strip().split(":"))
+		local = datetime.combine(base + timedelta(days=h // 24), time_cls(h % 24, m))
+		return local.replace(tzinfo=tz)
+
+	start, end = off_range.split("-")
+	return at(start), at(end)
+
+
+def event_uid(key: str, day: str, off_range: str) -> str:
+	digest = hashlib.sha1(f"{key}|{day}|{off_range}".encode("utf-8")).hexdigest()[:24]
+	return f"{digest}@py-actions"
+
+
+def feed_fingerprint(label: str, results: List[dict]) -> str:
+	"""Hash of everything the feed shows: the label and each date's off ranges."""
+	shown = [label] + [[r.get("date"), r.get("off_ranges") or []] for r in results if r.get("date")]
+	return hashlib.md5(json.dumps(shown, ensure_ascii=False).encode("utf-8")).hexdigest()
+
+
+def render_feed(key: str, label: str, results: List[dict], tz: Optional[tzinfo] = None, stamp: Optional[datetime] = None) -> str:
+	tz = tz or kyiv_tz()
+	dtstamp = _utc(stamp or datetime.now(timezone.utc))
+	lines = [
+		"BEGIN:VCALENDAR",
+		"VERSION:2.0",
+		f"PRODID:{PRODID}",
+		"CALSCALE:GREGORIAN",
+		"METHOD:PUBLISH",
+		f"X-WR-CALNAME:{_escape('Відключення: ' + label)}",
+		"REFRESH-INTERVAL;VALUE=DURATION:PT30M",
+		"X-PUBLISHED-TTL:PT30M",
+	]
+	for res in results:
+		day = res.get("date")
+		if not day:
+			continue
+		for off_range in res.get("off_ranges") or []:
+			try:
+				start, end = range_bounds(day, off_range, tz)
+			except ValueError:
+				print(f"DEBUG: Skipping unparsable range {off_range!r} on {day} for the calendar")
+				continue
+			lines += [
+				"BEGIN:VEVENT",
+				f"UID:{event_uid(key, day, off_range)}",
+				f"DTSTAMP:{dtstamp}",
+				f"DTSTART:{_utc(start)}",
+				f"DTEND:{_utc(end)}",
+				f"SUMMARY:{_escape('Відключення світла ' + off_range.replace(' ', ''))}",
+				f"DESCRIPTION:{_escape(label)}",
+				"TRANSP:OPAQUE",
+				"END:VEVENT",
+			]
+	lines.append("END:VCALENDAR")
+	return "".join(_fold(line) + "\r\n" for line in lines)
+
+
+class IcalFeeds:
+	"""Feed files under `directory` plus an index of what each was written from."""
+
+	def __init__(self, directory: str = ICAL_DIR):
+		self.directory = directory
+		self.index_path = os.path.join(directory, ICAL_INDEX)
+		self._lock = threading.Lock()
+		os.makedirs(directory, exist_ok=True)
+		self._index: Dict[str, dict] = self._load()
+
+	def _load(self) -> dict:
+		try:
+			with open(self.index_path, "r", encoding="utf-8") as f:
+				data = json.load(f)
+			return data if isinstance(data, dict) else {}
+		except FileNotFoundError:
+			return {}
+		except ValueError as e:
+			print(f"DEBUG: Ignoring unreadable calendar index {self.index_path}: {e}")
+			return {}
+
+	@staticmethod
+	def file_name(key: str) -> str:
+		return hashlib.sha1(key.encode("utf-8")).hexdigest()[:16] + ".ics"
+
+	def _write(self, path: str, data: str) -> None:
+		tmp = f"{path}.tmp"
+		with open(tmp, "w", encoding="utf-8", newline="") as f:
+			f.write(data)
+		os.replace(tmp, path)
+
+	def update(self, key: str, label: str, results: List[dict], tz: Optional[tzinfo] = None) -> Optional[str]:
+		"""Rewrite the feed of `key` if its off intervals changed; returns the path written."""
+		fingerprint = feed_fingerprint(label, results)
+		name = self.file_name(key)
+		path = os.path.join(self.directory, name)
+		with self._lock:
+			entry = self._index.get(key)
+			if entry and entry.get("fingerprint") == fingerprint and os.path.exists(path):
+				return None
+			now = datetime.now(timezone.utc)
+			self._write(path, render_feed(key, label, results, tz, now))
+			self._index[key] = {"file": name, "label": label, "fingerprint": fingerprint, "updated_at": now.isoformat()}
+			self._write(self.index_path, json.dumps(self._index, ensure_ascii=False, indent=1))
+		print(f"DEBUG: Calendar feed for {key} written to {path}")
+		return path
@@ -0,0 +1,194 @@
+"""Lean page-load profile for the headless browser.
+
+The shutdowns page pulls in images, fonts, analytics and third-party widgets
+that play no part in the address form or the fact tables. With LEAN_LOAD=1
+the browser session:
+
+- blocks them through the DevTools protocol (`Network.setBlockedURLs`): the
+  URL patterns of LEAN_BLOCK_TYPES (file extensions per resource type) plus
+  the LEAN_BLOCK_URLS deny list. A pattern that would match the page itself
+  is dropped.
+- with LEAN_ALLOW_HOSTS, resolves only those hosts (`--host-resolver-rules`),
+  so every other third-party host fails without a connection.
+- waits for the form to be ready instead of the fixed settle delay.
+
+Lean page loads are measured from Chrome's performance log (requests sent,
+bytes transferred, requests blocked) and report what they saved against the
+full-profile loads in LEAN_BASELINE_FILE. That file is only written when
+asked: run once with LEAN_RECORD_BASELINE=1 (and LEAN_LOAD=0) to record
+the full-profile loads per URL; other sessions leave performance logging off.
+"""
+import json
+import os
+import re
+import threading
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+
+LEAN_LOAD = os.environ.get("LEAN_LOAD", "0") == "1"
+# Comma-separated resource types to block: image, font, media, stylesheet
+LEAN_BLOCK_TYPES = os.environ.get("LEAN_BLOCK_TYPES", "image,font,media")
+# Comma-separated URL patterns (`*` wildcard) added to the defaults below; `-` replaces them
+LEAN_BLOCK_URLS = os.environ.get("LEAN_BLOCK_URLS", "")
+# Comma-separated hosts (`*.example.com` allowed); when set, no other host is resolved
+LEAN_ALLOW_HOSTS = os.environ.get("LEAN_ALLOW_HOSTS", "")
+LEAN_BASELINE_FILE = os.environ.get("LEAN_BASELINE_FILE", "page_load_baseline.json")
+# 1 = measure full-profile page loads and record them in LEAN_BASELINE_FILE
+LEAN_RECORD_BASELINE = os.environ.get("LEAN_RECORD_BASELINE", "0") == "1"
+
+# Sessions of a SessionPool share the baseline file
+_baseline_lock = threading.Lock()
+
+TYPE_PATTERNS = {
+	"image": ("png", "jpg", "jpeg", "gif", "webp", "avif", "svg", "ico"),
+	"font": ("woff", "woff2", "ttf", "otf", "eot"),
+	"media": ("mp4", "webm", "mp3", "ogg", "wav"),
+	"stylesheet": ("css",),
+}
+# Analytics, ads and embedded widgets seen on the DTEK sites
+DEFAULT_BLOCK_URLS = (
+	"*google-analytics.com/*",
+	"*googletagmanager.com/*",
+	"*doubleclick.net/*",
+	"*googlesyndication.com/*",
+	"*googleadservices.com/*",
+	"*facebook.net/*",
+	"*facebook.com/tr*",
+	"*mc.yandex.ru/*",
+	"*hotjar.com/*",
+	"*youtube.com/*",
+	"*ytimg.com/*",
+	"*tiktok.com/*",
+	"*maps.googleapis.com/*",
+	"*binotel.com/*",
+)
+
+
+def _split(value: str) -> List[str]:
+	return [v.strip() for v in value.split(",") if v.strip()]
+
+
+def _pattern_regex(pattern: str) -> "re.Pattern":
+	return re.compile(".*".join(re.escape(part) for part in pattern.split("*")) + r"\Z")
+
+
+class LeanProfile(NamedTuple):
+	block_types: Tuple[str, ...] = ("image", "font", "media")
+	block_urls: Tuple[str, ...] = DEFAULT_BLOCK_URLS
+	allow_hosts: Tuple[str, ...] = ()
+
+	@classmethod
+	def from_env(cls) -> "LeanProfile":
+		extra = _split(LEAN_BLOCK_URLS)
+		if extra[:1] == ["-"]:
+			urls = tuple(extra[1:])
+		else:
+			urls = DEFAULT_BLOCK_URLS + tuple(extra)
+		return cls(
+			block_types=tuple(t.lower() for t in _split(LEAN_BLOCK_TYPES)),
+			block_urls=urls,
+			allow_hosts=tuple(_split(LEAN_ALLOW_HOSTS)),
+		)
+
+	def blocked_patterns(self, page_url: str) -> List[str]:
+		"""`Network.setBlockedURLs` patterns, minus any that would block `page_url`."""
+		patterns: List[str] = []
+		for kind in self.block_types:
+			exts = TYPE_PATTERNS.get(kind)
+			if exts is None:
+				print(f"DEBUG: Unknown LEAN_BLOCK_TYPES entry {kind!r} (known: {', '.join(TYPE_PATTERNS)})")
+				continue
+			for ext in exts:
+				patterns += [f"*.{ext}", f"*.{ext}?*"]
+		patterns += self.block_urls
+		kept = []
+		for p in dict.fromkeys(patterns):
+			if _pattern_regex(p).match(page_url):
+				print(f"DEBUG: Not blocking {p!r}: it matches the page itself")
+			else:
+				kept.append(p)
+		return kept
+
+	def chrome_arguments(self) -> List[str]:
+		if not self.allow_hosts:
+			return []
+		excludes = ", ".join(f"EXCLUDE {h}" for h in self.allow_hosts)
+		return [f"--host-resolver-rules=MAP * ~NOTFOUND , {excludes}"]
+
+
+class LoadStats(NamedTuple):
+	requests: int
+	bytes: int
+	blocked: int
+
+	def __str__(self) -> str:
+		return f"{self.requests} requests, {self.bytes / 1024:.1f} KiB, {self.blocked} blocked"
+
+
+def load_stats(log_entries: Iterable[dict]) -> LoadStats:
+	"""Requests, transferred bytes and blocked requests from Chrome's performance log."""
+	requests = blocked = 0
+	sizes: Dict[str, int] = {}
+	for entry in log_entries:
+		try:
+			message = json.loads(entry["message"])["message"]
+		except (KeyError, TypeError, ValueError):
+			continue
+		method = message.get("method")
+		params = message.get("params") or {}
+		if method == "Network.requestWillBeSent":
+			# Redirects reuse the request id and are not new requests
+			if not params.get("redirectResponse") and not (params.get("request") or {}).get("url", "").startswith("data:"):
+				requests += 1
+		elif method == "Network.loadingFinished":
+			sizes[params.get("requestId")] = int(params.get("encodedDataLength") or 0)
+		elif method == "Network.loadingFailed":
+			if params.get("blockedReason") or "ERR_NAME_NOT_RESOLVED" in (params.get("errorText") or ""):
+				blocked += 1
+	# Blocked requests are announced before they fail; count only those that went out
+	return LoadStats(max(0, requests - blocked), sum(sizes.values()), blocked)
+
+
+class LoadBaseline:
+	"""Full-profile load stats per page URL and load kind, kept in a JSON file."""
+
+	def __init__(self, path: str = LEAN_BASELINE_FILE):
+		self.path = path
+
+	def _load(self) -> dict:
+		try:
+			with open(self.path, "r", encoding="utf-8") as f:
+				data = json.load(f)
+			return data if isinstance(data, dict) else {}
+		except (FileNotFoundError, ValueError):
+			return {}
+
+	def get(self, url: str, kind: str) -> Optional[LoadStats]:
+		with _baseline_lock:
+			entry = self._load().get(url, {}).get(kind)
+		return LoadStats(*entry) if isinstance(entry, list) and len(entry) == 3 else None
+
+	def put(self, url: str, kind: str, stats: LoadStats) -> None:
+		with _baseline_lock:
+			data = self._load()
+			data.setdefault(url, {})[kind] = list(stats)
+			tmp = f"{self.path}.tmp"
+			with open(tmp, "w", encoding="utf-8") as f:
+				json.dump(data, f, indent=1)
+			os.replace(tmp, self.path)
+
+
+def report(url: str, kind: str, stats: LoadStats, lean: bool, baseline: LoadBaseline, record: bool = False) -> str:
+	"""One-line summary of a page load; with `record`, full-profile loads become the baseline."""
+	if not lean:
+		if record:
+			baseline.put(url, kind, stats)
+			return f"Page {kind}: {stats} (recorded as the full-profile baseline)"
+		return f"Page {kind}: {stats}"
+	full = baseline.get(url, kind)
+	if full is None:
+		return f"Lean page {kind}: {stats} (no full-profile baseline yet)"
+	return (
+		f"Lean page {kind}: {stats}; saved {full.requests - stats.requests} requests, "
+		f"{(full.bytes - stats.bytes) / 1024:.1f} KiB vs full profile"
+	)
@@ -1,10 +1,6 @@
 import time
-from typing import List, Optional
-from datetime import datetime, timezone, timedelta
-try:
-	from zoneinfo import ZoneInfo
-except Exception:
-	ZoneInfo = None
+from typing import Dict, Iterator, List, Optional, Tuple, Union
+from datetime import datetime, timezone
 
 from bs4 import BeautifulSoup
 import os
@@ -14,10 +10,47 @@ import json
 import hashlib
 import subprocess
 import asyncio
-from telegram_notification import send_telegram_notification
-
-
-URL = "https://www.dtek-dnem.com.ua/ua/shutdowns"
+import threading
+from telegram_notification import chats_for, fan_out, load_subscribers, send_telegram_notification
+from http_fetch import FetchError, HttpFactFetcher, RawFact, raw_fact_html
+from browser_session import BrowserSession, SessionPool
+from addresses import Address, load_addresses
+from tracing import TRACER, span
+from autocomplete_cache import DEFAULT_AUTOCOMPLETE_CACHE_FILE, AutocompleteCache
+from group_index import DEFAULT_GROUP_INDEX_FILE, GroupIndex
+from providers import Provider, get_provider, load_provider_addresses, load_providers
+from email_pool import SmtpPool, SmtpSettings
+from adaptive_poll import AdaptiveSchedule
+from lean_load import LEAN_LOAD, LeanProfile
+from ical_feed import ICAL_DIR, IcalFeeds
+from reminders import ReminderScheduler
+from read_api import READ_API_HOST, READ_API_PORT, ReadApiServer, ResultCache, serve_in_background
+import fact_parser
+from day_schedule import DaySchedule, pack_results, unpack_results
+from history_store import HistoryStore
+from snapshot_store import SnapshotStore
+from schedule_diff import day_fingerprints, describe_delta, diff_results, state_fingerprints
+from fact_parser import cell_slots, extract_results, slots_to_ranges  # noqa: F401
+
+
+# Site to poll (PROVIDER, default 'dnem'); see providers.py for the other regions
+PROVIDER = get_provider()
+URL = PROVIDER.url
+
+# Fetch engine: 'http' (no browser), 'selenium', or 'auto' (http, then Selenium fallback)
+FETCH_ENGINE = os.environ.get("FETCH_ENGINE", "auto").strip().lower()
+
+# Seconds between polls in --watch / --daemon mode
+POLL_INTERVAL = int(os.environ.get("POLL_INTERVAL", "300"))
+# --daemon: random +/- seconds added to each interval, and how often in-memory state is written
+DAEMON_JITTER = float(os.environ.get("DAEMON_JITTER", "30"))
+STATE_FLUSH_INTERVAL = int(os.environ.get("STATE_FLUSH_INTERVAL", "600"))
+# Adaptive polling (--adaptive / ADAPTIVE_POLL=1): interval learned from past changes, within these bounds
+ADAPTIVE_POLL = os.environ.get("ADAPTIVE_POLL", "0") == "1"
+ADAPTIVE_MIN_INTERVAL = int(os.environ.get("ADAPTIVE_MIN_INTERVAL", "60"))
+ADAPTIVE_MAX_INTERVAL = int(os.environ.get("ADAPTIVE_MAX_INTERVAL", "1800"))
+# How many recent change times last_state.json keeps
+CHANGE_LOG_SIZE = 500
 
 # Values per your spec (now configurable via env)
 CITY = os.environ.get("CITY", "")
@@ -41,53 +74,24 @@ DEFAULT_SMTP_PORT = 465
 DEFAULT_SMTP_USE_SSL = True
 DEFAULT_SMTP_STARTTLS = False
 DEFAULT_STATE_FILE = "last_state.json"
+# Per-address state for batch mode, keyed by Address.key
+DEFAULT_BATCH_STATE_FILE = os.environ.get("BATCH_STATE_FILE", "batch_state.json")
+BATCH_WORKERS = int(os.environ.get("BATCH_WORKERS", "4"))
+# Set AUTOCOMPLETE_CACHE=0 to always type into the autocomplete inputs
+USE_AUTOCOMPLETE_CACHE = os.environ.get("AUTOCOMPLETE_CACHE", "1") != "0"
+# Set GROUP_INDEX=0 to resolve every address's group on every HTTP fetch
+USE_GROUP_INDEX = os.environ.get("GROUP_INDEX", "1") != "0"
 EMAIL_RECIPIENT = os.environ.get("EMAIL_RECIPIENT", "")
-
-
-def parse_fact_table_to_slots(table_html: str) -> Optional[List[str]]:
-	"""Parse a rendered fact table into 48 half-hour slots.
-
-	Slot values: 'on', 'off', 'maybe', 'unknown'.
-	"""
-	soup = BeautifulSoup(table_html, "html.parser")
-	table = soup.find("table")
-	if not table:
-		return None
-
-	tbody = table.find("tbody")
-	if not tbody:
-		return None
-
-	tr = tbody.find("tr", class_="current-day") or tbody.find("tr")
-	if not tr:
-		return None
-
-	tds = tr.find_all("td")
-	# Day name cells usually have colspan; hour cells do not.
-	hour_tds = [td for td in tds if not td.has_attr("colspan")]
-	if not hour_tds:
-		return None
-
-	slots: List[str] = []
-	for td in hour_tds[:24]:
-		classes = td.get("class") or []
-		cls = " ".join(classes)
-		if "cell-scheduled" in cls:
-			slots.extend(["off", "off"])
-		elif "cell-non-scheduled" in cls:
-			slots.extend(["on", "on"])
-		elif "cell-first-half" in cls:
-			slots.extend(["off", "on"])
-		elif "cell-second-half" in cls:
-			slots.extend(["on", "off"])
-		elif "cell-scheduled-maybe" in cls:
-			slots.extend(["maybe", "maybe"])
-		else:
-			slots.extend(["unknown", "unknown"])
-
-	while len(slots) < 48:
-		slots.append("unknown")
-	return slots[:48]
+# Comma-separated list; email goes out only with EMAIL_NOTIFY=1
+EMAIL_RECIPIENTS = [r.strip() for r in EMAIL_RECIPIENT.split(",") if r.strip()]
+EMAIL_NOTIFY = os.environ.get("EMAIL_NOTIFY", "0") == "1"
+EMAIL_POOL_SIZE = int(os.environ.get("EMAIL_POOL_SIZE", "3"))
+# SQLite schedule history; when set it is the source of truth for change detection
+HISTORY_DB = os.environ.get("HISTORY_DB", "")
+# Set STATE_JSON=0 to stop exporting last_state.json (and amending it into git)
+STATE_JSON = os.environ.get("STATE_JSON", "1") != "0"
+# Directory for compressed raw HTML snapshots (enables --replay); empty disables
+SNAPSHOT_DIR = os.environ.get("SNAPSHOT_DIR", "")
 
 
 def _human_date(date_iso: Optional[str]) -> str:
@@ -121,382 +125,275 @@ def _human_date(date_iso: Optional[str]) -> str:
 		return date_iso
 
 
-def slots_to_ranges(slots: List[str], status: str) -> List[str]:
-	ranges: List[str] = []
-	i = 0
-	n = len(slots)
-	while i < n:
-		if slots[i] == status:
-			start = i
-			while i < n and slots[i] == status:
-				i += 1
-			end = i
-
-			sh, sm = divmod(start, 2)
-			eh, em = divmod(end, 2)
-			start_time = f"{sh:02d}:{'00' if sm == 0 else '30'}"
-			end_time = f"{eh:02d}:{'00' if em == 0 else '30'}"
-			ranges.append(f"{start_time} - {end_time}")
-		else:
-			i += 1
-	return ranges
-
-
-def selenium_get_fact_table_html() -> str:
-	from selenium import webdriver
-	from selenium.webdriver.common.by import By
-	from selenium.webdriver.common.keys import Keys
-	from selenium.webdriver.support.ui import WebDriverWait
-	from selenium.webdriver.support import expected_conditions as EC
-	from selenium.webdriver.chrome.service import Service
-	from selenium.common.exceptions import ElementNotInteractableException
-	from webdriver_manager.chrome import ChromeDriverManager
-
-	options = webdriver.ChromeOptions()
-	options.add_argument("--headless=new")
-	options.add_argument("--no-sandbox")
-	options.add_argument("--disable-dev-shm-usage")
-	# Force a wide viewport so the site renders the full-hour table layout
-	options.add_argument("--window-size=1400,900")
-
-	driver = webdriver.Chrome(service=Service(ChromeDriverManager().install()), options=options)
-	try:
-		# Ensure window size is applied in headless mode
-		driver.set_window_size(1400, 900)
-	except Exception:
-		pass
-	try:
-		driver.get(URL)
+def _default_address() -> Address:
+	return Address(CITY, STREET, HOUSE_NUM)
 
-		# Per spec: wait 5 seconds after opening the page
-		time.sleep(5)
 
-		wait = WebDriverWait(driver, 60)
+_history: Optional[HistoryStore] = None
+_snapshots: Optional[SnapshotStore] = None
 
-		def dismiss_blocking_modal() -> None:
-			"""Close/remove first-load modal that can intercept clicks."""
-			# Try a few different strategies. If none work, we fall back to JS remove.
-			try:
-				# Wait briefly to see if modal is present
-				modal_present = driver.execute_script(
-					"return !!document.querySelector('.modal__container[aria-modal=" + '"true"' + "]') || !!document.querySelector('.modal__container--firstPopup') || !!document.querySelector('.m-attention__container');"
-				)
-			except Exception:
-				modal_present = False
-
-			if not modal_present:
-				return
-
-			# 1) Click common close buttons
-			close_selectors = [
-				".modal__container [data-modal-close]",
-				".modal__container .modal__close",
-				".modal__container .close",
-				".modal__container button[aria-label='Close']",
-				".modal__container button",
-			]
-			for sel in close_selectors:
-				try:
-					btn = driver.find_element(By.CSS_SELECTOR, sel)
-					driver.execute_script("arguments[0].scrollIntoView({block:'center'});", btn)
-					btn.click()
-					time.sleep(0.3)
-					# If modal gone, stop
-					gone = driver.execute_script(
-						"return !document.querySelector('.modal__container[aria-modal=" + '"true"' + "]') && !document.querySelector('.modal__container--firstPopup') && !document.querySelector('.m-attention__container');"
-					)
-					if gone:
-						return
-				except Exception:
-					pass
-
-			# 2) Press Escape
-			try:
-				body = driver.find_element(By.TAG_NAME, "body")
-				body.send_keys(Keys.ESCAPE)
-				time.sleep(0.3)
-				gone = driver.execute_script(
-					"return !document.querySelector('.modal__container[aria-modal=" + '"true"' + "]') && !document.querySelector('.modal__container--firstPopup') && !document.querySelector('.m-attention__container');"
-				)
-				if gone:
-					return
-			except Exception:
-				pass
-
-			# 3) Force-remove modal + backdrops (last resort)
-			try:
-				driver.execute_script(
-					"""
-					for (const sel of ['.modal__container[aria-modal="true"]', '.modal__container--firstPopup', '.m-attention__container']) {
-						const el = document.querySelector(sel);
-						if (el) el.remove();
-					}
-					// remove common backdrops/locks
-					for (const sel of ['.modal__overlay', '.modal__backdrop', '.ps__rail-x', '.ps__rail-y']) {
-						const els = document.querySelectorAll(sel);
-						els.forEach(e => e.remove());
-					}
-					document.documentElement.style.overflow = 'auto';
-					document.body.style.overflow = 'auto';
-					"""
-				)
-				time.sleep(0.2)
-			except Exception:
-				pass
-
-		# Dismiss modal (if it appears)
-		dismiss_blocking_modal()
-
-		def pick_autocomplete_exact(input_id: str, value: str) -> None:
-			print(f"Selecting {input_id} -> {value}")
-			# Always re-fetch an enabled element (DOM may change after selection)
-			def enabled_visible(d):
-				el = d.find_element(By.ID, input_id)
-				return el if el.is_displayed() and el.is_enabled() else False
-			inp = wait.until(enabled_visible)
-			# Ensure any modal isn't intercepting clicks
-			dismiss_blocking_modal()
-			driver.execute_script("arguments[0].scrollIntoView({block:'center'});", inp)
-			wait.until(EC.element_to_be_clickable((By.ID, input_id)))
-
-			# Type using WebElement send_keys to mimic real user input
-			try:
-				inp.click()
-			except Exception:
-				pass
-			try:
-				inp.send_keys(Keys.COMMAND, 'a')
-				inp.send_keys(Keys.BACKSPACE)
-			except Exception:
-				pass
-			try:
-				inp.send_keys(value)
-			except ElementNotInteractableException:
-				# Some states report enabled but still block typing; use JS input event.
-				driver.execute_script(
-					"arguments[0].focus(); arguments[0].value = arguments[1]; arguments[0].dispatchEvent(new Event('input', {bubbles:true}));",
-					inp,
-					value,
-				)
-
-			# Find and click an item from this input's autocomplete list
-			deadline = time.time() + 25
-			picked = False
-			last_error = None
-			while time.time() < deadline and not picked:
-				try:
-					input_el = driver.find_element(By.ID, input_id)
-					wrap = input_el.find_element(By.XPATH, "ancestor::div[contains(@class,'autocomplete')]")
-					# Some UIs only show suggestions after clicking the dropdown icon
-					try:
-						items_wrap = wrap.find_element(By.CSS_SELECTOR, ".autocomplete-items")
-						items = items_wrap.find_elements(By.CSS_SELECTOR, "div")
-					except Exception:
-						items = []
-
-					if not items:
-						try:
-							icon = wrap.find_element(By.CSS_SELECTOR, "img")
-							icon.click()
-						except Exception:
-							pass
-						time.sleep(0.3)
-						continue
-
-					target = value.strip().lower()
-					# exact match first
-					for it in items:
-						t = (it.text or '').strip().lower()
-						if t == target:
-							it.click()
-							picked = True
-							break
-					if picked:
-						break
-					# contains fallback
-					for it in items:
-						t = (it.text or '').strip().lower()
-						if target in t:
-							it.click()
-							picked = True
-							break
-					if picked:
-						break
-					items[0].click()
-					picked = True
-					break
-				except Exception as e:
-					last_error = e
-					time.sleep(0.3)
+# Guards the lazy process-wide stores below; batch workers reach them concurrently
+_singletons_lock = threading.Lock()
 
-			if not picked:
-				# Dump wrapper HTML for debugging
-				try:
-					wrap_html = driver.execute_script(
-						"const inp = document.getElementById(arguments[0]); const w = inp && inp.closest('.autocomplete'); return w ? w.outerHTML : null;",
-						input_id,
-					)
-				except Exception:
-					wrap_html = None
-				if wrap_html:
-					with open(f"dtek_autocomplete_{input_id}.html", "w", encoding="utf-8") as f:
-						f.write(wrap_html)
-				raise RuntimeError(f"Autocomplete suggestions not selectable for {input_id}: {last_error}")
-			# Some flows rely on change/blur events after selecting from list
-			try:
-				driver.execute_script(
-					"arguments[0].dispatchEvent(new Event('change', {bubbles:true})); arguments[0].blur();",
-					inp,
-				)
-			except Exception:
-				pass
-			try:
-				final_val = inp.get_attribute('value')
-			except Exception:
-				final_val = None
-			print(f"Selected {input_id} (value now: {final_val!r})")
-
-		# Fill fields strictly in order
-		pick_autocomplete_exact("city", CITY)
-		# Diagnostics + nudge: some versions require an explicit street-list load
-		try:
-			city_state = driver.execute_script(
-				"const el = document.getElementById('city'); if (!el) return null; return {value: el.value, className: el.className};"
-			)
-			# print('City state after pick:', city_state)
-		except Exception:
-			pass
-		try:
-			driver.execute_script(
-				"if (typeof DisconSchedule !== 'undefined' && DisconSchedule.ajax) {"
-				"  const keys = Object.keys(DisconSchedule.ajax);"
-				"  for (const k of keys) {"
-				"    if (k.toLowerCase().includes('street')) { try { DisconSchedule.ajax[k](); } catch(e) {} }"
-				"  }"
-				"}"
-			)
-		except Exception:
-			pass
-		# Give the page a moment to unlock street after city selection
-		time.sleep(0.5)
-		# Some sessions keep street disabled until an internal flag is set by the popup.
-		# If it's still disabled, force-enable it so we can proceed with sequential filling.
-		try:
-			driver.execute_script(
-				"const el = document.getElementById('street'); if (el) { el.disabled = false; el.removeAttribute('disabled'); }"
-			)
-		except Exception:
-			pass
-		try:
-			street_state = driver.execute_script(
-				"const el = document.getElementById('street'); if (!el) return null; return {disabled: !!el.disabled, className: el.className, value: el.value};"
-			)
-			# print('Street state after city:', street_state)
-		except Exception:
-			pass
-
-		# Wait until street becomes enabled after selecting city; if stuck, try to trigger invisible load
-		try:
-			wait.until(lambda d: d.find_element(By.ID, "street").is_enabled())
-		except Exception:
-			try:
-				ajax_keys = driver.execute_script(
-					"return (typeof DisconSchedule !== 'undefined' && DisconSchedule.ajax) ? Object.keys(DisconSchedule.ajax) : [];"
-				)
-				print('DisconSchedule.ajax keys:', ajax_keys)
-			except Exception:
-				pass
-			# Attempt to trigger street list population if the site exposes helpers
-			try:
-				driver.execute_script(
-					"if (typeof DisconSchedule !== 'undefined' && DisconSchedule.ajax) {"
-					" if (DisconSchedule.ajax.getStreetInvisibly) DisconSchedule.ajax.getStreetInvisibly();"
-					" if (DisconSchedule.ajax.getStreet) DisconSchedule.ajax.getStreet();"
-					" }"
-				)
-			except Exception:
-				pass
-			wait.until(lambda d: d.find_element(By.ID, "street").is_enabled())
-		pick_autocomplete_exact("street", STREET)
-
-		# Kick off async home list load if the site uses it
-		try:
-			driver.execute_script(
-				"if (typeof DisconSchedule !== 'undefined' && DisconSchedule.ajax && DisconSchedule.ajax.getHomeNumInvisibly) DisconSchedule.ajax.getHomeNumInvisibly();"
-			)
-		except Exception:
-			pass
-
-		# Per spec: wait 2 seconds before house
-		time.sleep(2)
-		# Force-enable house input if still disabled
+
+_result_cache: Optional[ResultCache] = None
+_ical_feeds: Optional[IcalFeeds] = None
+_reminders: Optional[ReminderScheduler] = None
+
+
+def ical_feeds() -> Optional[IcalFeeds]:
+	global _ical_feeds
+	with _singletons_lock:
+		if _ical_feeds is None and ICAL_DIR:
+			_ical_feeds = IcalFeeds(ICAL_DIR)
+	return _ical_feeds
+
+
+def publish_results(key: str, results: List[dict], label: str = "", provider: Optional[Provider] = None) -> None:
+	"""Hand fresh results to the read API (--serve), reminders (--reminders) and calendar feeds (ICAL_DIR)."""
+	if not results:
+		return
+	if _result_cache is not None:
+		_result_cache.put(key, results, label, tz=(provider or PROVIDER).tz())
+	if _reminders is not None:
+		_reminders.update(key, results, label, (provider or PROVIDER).tz())
+	feeds = ical_feeds()
+	if feeds is not None:
 		try:
-			driver.execute_script(
-				"const el = document.getElementById('house_num'); if (el) { el.disabled = false; el.removeAttribute('disabled'); }"
-			)
-		except Exception:
-			pass
-
-		# Ensure house input becomes enabled before interacting
-		def house_enabled(d):
+			with span("ical.update"):
+				feeds.update(key, label or key, results, (provider or PROVIDER).tz())
+		except OSError as e:
+			print(f"DEBUG: Failed to write calendar feed: {e}")
+
+
+def saved_states() -> Iterator[Tuple[str, str, dict, Provider]]:
+	"""(key, label, state entry, provider) of every address in the saved state files."""
+	if CITY and STREET and HOUSE_NUM:
+		address = _default_address()
+		yield address.key, address.label, load_json_state(DEFAULT_STATE_FILE), PROVIDER
+	for provider in load_providers().values():
+		state = load_json_state(provider.scope_path(DEFAULT_BATCH_STATE_FILE))
+		for key, entry in (state.get("addresses") or {}).items():
 			try:
-				el = d.find_element(By.ID, "house_num")
-				return el.is_displayed() and el.is_enabled()
-			except Exception:
-				return False
-		wait.until(house_enabled)
+				label = Address(**entry["address"]).label
+			except (KeyError, TypeError):
+				label = key
+			yield provider.scope_key(key), label, entry, provider
+
+
+def start_read_api(host: str = READ_API_HOST, port: int = READ_API_PORT) -> ReadApiServer:
+	"""Serve cached results over HTTP, seeded from the saved state files."""
+	global _result_cache
+	cache = ResultCache()
+	for key, label, entry, provider in saved_states():
+		cache.put_state(key, entry, label, provider.tz())
+	print(f"DEBUG: Read API cache seeded with {len(cache)} addresses")
+	_result_cache = cache
+	return serve_in_background(cache, host, port)
+
+
+def start_reminders() -> ReminderScheduler:
+	"""Dispatch pre-outage reminders to subscribers, seeded from the saved state files."""
+	global _reminders
+	scheduler = ReminderScheduler(notify_subscribers)
+	for key, label, entry, provider in saved_states():
+		if entry.get("data"):
+			scheduler.update(key, unpack_results(entry["data"]), label, provider.tz())
+	print(f"DEBUG: {len(scheduler)} reminders pending")
+	_reminders = scheduler
+	return scheduler.start()
+
+
+def snapshot_store() -> Optional[SnapshotStore]:
+	"""The process-wide SNAPSHOT_DIR store, or None when snapshots are disabled."""
+	global _snapshots
+	with _singletons_lock:
+		if SNAPSHOT_DIR and _snapshots is None:
+			_snapshots = SnapshotStore(SNAPSHOT_DIR)
+	return _snapshots
+
+
+def history_store() -> Optional[HistoryStore]:
+	"""The process-wide HISTORY_DB store, or None when history is disabled."""
+	global _history
+	with _singletons_lock:
+		if HISTORY_DB and _history is None:
+			_history = HistoryStore(HISTORY_DB)
+	return _history
+
+
+_autocomplete_caches: Dict[str, AutocompleteCache] = {}
+
+
+def new_browser_session(url: Optional[str] = None, provider: Optional[Provider] = None) -> BrowserSession:
+	"""Build a BrowserSession sharing the process-wide autocomplete cache of `provider`."""
+	provider = provider or PROVIDER
+	cache = None
+	if USE_AUTOCOMPLETE_CACHE:
+		with _singletons_lock:
+			cache = _autocomplete_caches.get(provider.name)
+			if cache is None:
+				cache = _autocomplete_caches[provider.name] = AutocompleteCache(provider.scope_path(DEFAULT_AUTOCOMPLETE_CACHE_FILE))
+	return BrowserSession(
+		url or provider.url,
+		autocomplete_cache=cache,
+		tables_selector=provider.tables_selector,
+		lean=LeanProfile.from_env() if LEAN_LOAD else None,
+	)
+
+
+_group_indexes: Dict[str, GroupIndex] = {}
+
+
+def group_index(provider: Optional[Provider] = None) -> Optional[GroupIndex]:
+	"""The process-wide address -> group index of `provider`, or None when disabled."""
+	provider = provider or PROVIDER
+	if not USE_GROUP_INDEX:
+		return None
+	with _singletons_lock:
+		if provider.name not in _group_indexes:
+			_group_indexes[provider.name] = GroupIndex(provider.scope_path(DEFAULT_GROUP_INDEX_FILE))
+		return _group_indexes[provider.name]
+
+
+def new_http_fetcher(url: Optional[str] = None, provider: Optional[Provider] = None) -> HttpFactFetcher:
+	"""Build an HttpFactFetcher for `provider` sharing its group index."""
+	provider = provider or PROVIDER
+	return HttpFactFetcher(
+		url or provider.url,
+		group_index=group_index(provider),
+		tz=provider.tz(),
+		ajax_path=provider.quirk("ajax_path", "ajax"),
+	)
+
+
+def refresh_group_index(provider: Optional[Provider] = None) -> None:
+	"""Re-resolve stale group index entries on a background thread."""
+	provider = provider or PROVIDER
+	index = group_index(provider)
+	if index is not None:
+		index.refresh_in_background(lambda addrs: new_http_fetcher(provider=provider).resolve_groups(addrs))
+
+
+def selenium_get_fact_table_html(
+	session: Optional[BrowserSession] = None,
+	address: Optional[Address] = None,
+	provider: Optional[Provider] = None,
+) -> str:
+	"""Fill the address form in Chrome and return the `.discon-fact-tables` HTML.
+
+	With a `session`, the already-running browser is reused; otherwise a
+	one-off browser is started and closed again. The group the page shows
+	is fed back into the group index.
+	"""
+	address = address or _default_address()
+	if session is not None:
+		html = session.fetch(*address)
+		remember_group(session.group, address, provider)
+		return html
+	with new_browser_session(provider=provider) as one_off:
+		html = one_off.fetch(*address)
+		remember_group(one_off.group, address, provider)
+		return html
 
-		pick_autocomplete_exact("house_num", HOUSE_NUM)
 
-		# After selecting house, trigger the site's submit that builds the table
-		try:
-			driver.execute_script("if (typeof DisconSchedule !== 'undefined' && DisconSchedule.ajax && DisconSchedule.ajax.formSubmit) DisconSchedule.ajax.formSubmit('getHomeNum');")
-		except Exception:
-			pass
+def remember_group(group: Optional[str], address: Address, provider: Optional[Provider] = None) -> None:
+	"""Record a scraped group; an indexed group that differs is replaced."""
+	index = group_index(provider)
+	if group and index is not None:
+		index.put(*address, group)
 
-		# Wait until the fact tables container appears and an active table is rendered
-		wait.until(EC.presence_of_element_located((By.CSS_SELECTOR, ".discon-fact-tables")))
-		# Wait for an active table or at least any table to be present
-		wait.until(lambda d: d.execute_script("return !!(document.querySelector('.discon-fact-tables .discon-fact-table.active') || document.querySelector('.discon-fact-tables .discon-fact-table'))"))
 
-		# Also wait for #group-name to show something (helps ensure selection applied)
+def flush_group_indexes(provider: Optional[Provider] = None) -> None:
+	"""Write the group indexes changed since their last flush (only `provider`'s, if given)."""
+	if provider is not None:
+		indexes = [group_index(provider)]
+	else:
+		with _singletons_lock:
+			indexes = list(_group_indexes.values())
+	for index in filter(None, indexes):
 		try:
-			wait.until(lambda d: d.execute_script("const g=document.getElementById('group-name'); return g && g.innerText && g.innerText.trim().length>0;"))
-		except Exception:
-			# not critical, continue
-			pass
-
-		# Return the whole tables container so we can parse all dates (today/tomorrow)
-		html = driver.execute_script(
-			"const wrap = document.querySelector('.discon-fact-tables'); return wrap ? wrap.outerHTML : '';"
-		)
-		if not html:
-			raise RuntimeError("Fact table not found after filling form")
-		return html
-	finally:
+			index.flush()
+		except OSError as e:
+			print(f"DEBUG: Failed to write group index {index.path}: {e}")
+
+
+def fetch_engine(provider: Optional[Provider] = None) -> str:
+	"""Engine for `provider`: its `fetch_engine` quirk, else FETCH_ENGINE."""
+	return str((provider or PROVIDER).quirk("fetch_engine", FETCH_ENGINE)).strip().lower()
+
+
+def fetch_fact_table_html(
+	session: Optional[BrowserSession] = None,
+	http_fetcher: Optional[HttpFactFetcher] = None,
+	address: Optional[Address] = None,
+	provider: Optional[Provider] = None,
+) -> str:
+	"""Return the `.discon-fact-tables` HTML using the configured FETCH_ENGINE.
+
+	`session` / `http_fetcher` are reused across polls in --watch mode; without
+	them each call sets up (and tears down) its own browser or HTTP session.
+	`address` defaults to CITY/STREET/HOUSE_NUM and `provider` to PROVIDER,
+	whose `fetch_engine` quirk overrides FETCH_ENGINE. With SNAPSHOT_DIR set,
+	what the site sent is also archived for --replay: the browser's HTML, or
+	for the HTTP engine the fact JSON and getHomeNum data it is rendered from.
+	"""
+	address = address or _default_address()
+	provider = provider or PROVIDER
+	engine = fetch_engine(provider)
+	snapshots = snapshot_store()
+	if engine in ("auto", "http"):
 		try:
-			driver.quit()
-		except Exception:
-			pass
+			started = time.time()
+			fetcher = http_fetcher or new_http_fetcher(provider=provider)
+			raw = fetcher.fetch_fact_raw(*address)
+			with span("http.render"):
+				html = raw_fact_html(raw, fetcher.tz)
+			print(f"DEBUG: HTTP fetch took {time.time() - started:.2f}s")
+		except Exception as e:
+			if engine == "http":
+				raise
+			print(f"DEBUG: HTTP fetch failed ({e}), falling back to Selenium")
+		else:
+			if snapshots is not None:
+				store_snapshot(snapshots.put_http, *raw, address=provider.scope_key(address.key))
+			return html
+	html = selenium_get_fact_table_html(session, address, provider)
+	if snapshots is not None and html:
+		store_snapshot(snapshots.put, html, provider.scope_key(address.key))
+	return html
 
 
-def send_off_intervals_via_email(
+def store_snapshot(put, *args, **kwargs) -> None:
+	"""Archive one fetch with a SnapshotStore `put` method; failures are only logged."""
+	try:
+		with span("snapshot.put"):
+			put(*args, **kwargs)
+	except OSError as e:
+		print(f"DEBUG: Failed to store snapshot: {e}")
+
+
+def range_lines(res: dict) -> List[str]:
+	"""' - HH:MM - HH:MM' lines of one day's off ranges, with its 'maybe' ranges marked as possible."""
+	lines = [(r, "") for r in res.get('off_ranges') or []]
+	slots = res.get('slots') or []
+	if slots:
+		lines += [(r, " (возможно)") for r in DaySchedule.from_slots(slots).ranges("maybe")]
+	if not lines:
+		return [" - Нет интервалов отключения"]
+	return [f" - {r}{note}" for r, note in sorted(lines)]
+
+
+def intervals_email(
 	recipient: str,
 	results: Optional[List[dict]] = None,
 	off_ranges: Optional[List[str]] = None,
 	date_str: Optional[str] = None,
-) -> None:
-	"""Send the "Интервалы отключения" section via email.
+) -> EmailMessage:
+	"""Build the "Интервалы отключения" email for one recipient.
 
 	Can accept either `results` (list of {date, off_ranges, slots}) to include multiple
 	dates, or the legacy `off_ranges` + `date_str` for a single-day message.
-
-	Reads SMTP settings from environment variables:
-	- SMTP_HOST (default: localhost)
-	- SMTP_PORT (default: 25)
-	- SMTP_USER, SMTP_PASS (optional)
-	- SMTP_USE_SSL (if '1' uses SMTP_SSL)
-	- SMTP_STARTTLS (if '1' calls starttls() before login)
 	"""
 	lines = ["Интервалы отключения:"]
 	if results:
@@ -506,12 +403,7 @@ def send_off_intervals_via_email(
 			if idx > 0:
 				lines.append("")
 			lines.append(header)
-			ors = res.get('off_ranges') or []
-			if ors:
-				for r in ors:
-					lines.append(f" - {r}")
-			else:
-				lines.append(" - Нет интервалов отключения")
+			lines.extend(range_lines(res))
 	else:
 		if off_ranges:
 			for r in off_ranges:
@@ -526,6 +418,28 @@ def send_off_intervals_via_email(
 	msg["Subject"] = f"Интервалы отключения{subj_date}"
 	msg["From"] = os.environ.get("SMTP_FROM", f"no-reply@{os.uname().nodename}")
 	msg["To"] = recipient
+	return msg
+
+
+def send_off_intervals_via_email(
+	recipient: str,
+	results: Optional[List[dict]] = None,
+	off_ranges: Optional[List[str]] = None,
+	date_str: Optional[str] = None,
+) -> None:
+	"""Send the "Интервалы отключения" section via email.
+
+	Can accept either `results` (list of {date, off_ranges, slots}) to include multiple
+	dates, or the legacy `off_ranges` + `date_str` for a single-day message.
+
+	Reads SMTP settings from environment variables:
+	- SMTP_HOST (default: localhost)
+	- SMTP_PORT (default: 25)
+	- SMTP_USER, SMTP_PASS (optional)
+	- SMTP_USE_SSL (if '1' uses SMTP_SSL)
+	- SMTP_STARTTLS (if '1' calls starttls() before login)
+	"""
+	msg = intervals_email(recipient, results, off_ranges, date_str)
 
 	# Use hardcoded defaults for host/port/ssl/starttls; only credentials/from are required
 	host = DEFAULT_SMTP_HOST
@@ -550,261 +464,726 @@ def send_off_intervals_via_email(
 		srv.send_message(msg)
 
 
-def main() -> None:
-	# Get the rendered fact table HTML via Selenium and output raw HTML
-	table_html = selenium_get_fact_table_html()
+def smtp_settings() -> SmtpSettings:
+	"""Pool settings: the hardcoded defaults, overridable via SMTP_HOST/SMTP_PORT/SMTP_USE_SSL/SMTP_STARTTLS."""
+	return SmtpSettings(
+		host=os.environ.get("SMTP_HOST") or DEFAULT_SMTP_HOST,
+		port=int(os.environ.get("SMTP_PORT") or DEFAULT_SMTP_PORT),
+		user=os.environ.get("SMTP_USER"),
+		password=os.environ.get("SMTP_PASS"),
+		use_ssl=os.environ.get("SMTP_USE_SSL", "1" if DEFAULT_SMTP_USE_SSL else "0") == "1",
+		starttls=os.environ.get("SMTP_STARTTLS", "1" if DEFAULT_SMTP_STARTTLS else "0") == "1",
+	)
+
+
+def send_intervals_bulk(recipients: List[str], results: List[dict], pool: Optional[SmtpPool] = None) -> List[dict]:
+	"""Email `results` to every recipient over a pool of SMTP connections."""
+	messages = [intervals_email(r, results=results) for r in recipients]
+	own_pool = pool is None
+	pool = pool or SmtpPool(smtp_settings(), size=EMAIL_POOL_SIZE)
+	started = time.time()
+	try:
+		with span("notify.email", recipients=len(messages)):
+			sent = pool.send_all(messages)
+	finally:
+		if own_pool:
+			pool.close()
+	failed = [r for r in sent if not r["ok"]]
+	for r in failed:
+		print(f"Ошибка при отправке email на {r['to']}: {r['error']}")
+	print(
+		f"Email: {len(sent) - len(failed)} sent, {len(failed)} failed, "
+		f"{pool.connects} connections, {time.time() - started:.1f}s"
+	)
+	return sent
+
+
+def build_results(table_html: str, tz=None) -> List[dict]:
+	"""Parse all `.discon-fact-table` entries into [{date, off_ranges, slots}].
+
+	Single pass over one parsed tree (see fact_parser).
+	`tz` is the provider's timezone for tables dated only by `rel`.
+	"""
+	with span("parse.soup"):
+		soup_all = BeautifulSoup(table_html, fact_parser.PARSER_BACKEND)
+	with span("parse.tables"):
+		return extract_results(soup_all, tz=tz)
+
+
+def results_md5(results: List[dict]) -> str:
+	# combine for md5: include date markers so change in any table affects MD5
+	joined = "\n".join(f"{r['date'] or ''}||" + ";".join(r['off_ranges']) for r in results)
+	return hashlib.md5(joined.encode("utf-8")).hexdigest()
+
+
+def format_intervals(results: List[dict]) -> str:
+	"""Render the "Интервалы отключения" message body for all dates."""
+	parts = []
+	for idx, res in enumerate(results):
+		d = res.get('date') or ''
+		if idx > 0:
+			parts.append("")
+		parts.append(_human_date(d))
+		parts.extend(range_lines(res))
+	return "Интервалы отключения:\n\n" + "\n".join(parts)
+
+
+def commit_state_file(path: str) -> None:
+	"""Amend the last commit with the updated state file."""
+	try:
+		with span("git.amend"):
+			subprocess.run(["git", "add", path], check=True)
+			subprocess.run(["git", "commit", "--amend", "--no-edit"], check=True)
+		print("Git commit amended with updated state.")
+	except subprocess.CalledProcessError as e:
+		print(f"Failed to amend git commit: {e}")
+
+
+def format_changes(results: List[dict], deltas: List[dict]) -> str:
+	"""Message body covering only the dates listed in `deltas`."""
+	by_date = {res.get('date') or '': res for res in results}
+	parts = []
+	for idx, delta in enumerate(deltas):
+		res = by_date.get(delta['date']) or {}
+		if idx > 0:
+			parts.append("")
+		parts.append(_human_date(delta['date']))
+		parts.extend(range_lines(res))
+		parts.append("Изменения:")
+		parts.extend(describe_delta(delta))
+	return "Интервалы отключения:\n\n" + "\n".join(parts)
+
+
+def updated_day_fingerprints(prev_fps: dict, results: List[dict], deltas: List[dict]) -> dict:
+	"""Carry over unchanged dates, replace changed ones, drop dates no longer published."""
+	current = day_fingerprints(results)
+	changed = {d['date'] for d in deltas}
+	return {date: (current[date] if date in changed else prev_fps.get(date, fp)) for date, fp in current.items()}
+
+
+def process_fact_html(table_html: str, memory: Optional["MemoryState"] = None) -> bool:
+	"""Parse the fact tables, print them, notify on change and persist state.
+
+	Returns True when any date changed.
+
+	With `memory` (--daemon) the previous state is read from and written to
+	memory instead of DEFAULT_STATE_FILE; `MemoryState.flush` persists it.
+	"""
 	if not table_html:
 		raise RuntimeError("Fact table HTML not found")
 
 	# Save to a file for inspection and also print raw HTML to stdout
 	# (Do not save or print raw HTML here; proceed to parse and display results)
 
-	def _normalize_table(html: str) -> str:
-		"""If site returned a two-column table layout, normalize it into the single-row wide table.
+	with span("parse"):
+		results = build_results(table_html, PROVIDER.tz())
 
-		This reconstructs a table with a single tbody row containing 24 hourly td cells.
-		"""
+	if not results:
+		print('\nНе удалось извлечь статусы из таблицы (парсер вернул None)')
+		return False
+
+	# Load previous state (per-date fingerprints) if present
+	history = history_store()
+	address_key = _default_address().key
+	publish_results(address_key, results, _default_address().label)
+	prev_state: dict = {}
+	with span("state.load"):
+		# The JSON state is read even with HISTORY_DB: its `changes` log carries on
+		if memory is not None:
+			prev_state = memory.state
+		elif STATE_JSON or history is None:
+			prev_state = load_json_state(DEFAULT_STATE_FILE)
+			if prev_state:
+				print(f"DEBUG: Loaded state from {DEFAULT_STATE_FILE}: md5={prev_state.get('md5')}")
+			else:
+				print(f"DEBUG: State file not found at {DEFAULT_STATE_FILE}")
+		if history is not None:
+			prev_fps = history.latest_fingerprints(address_key)
+			print(f"DEBUG: Loaded {len(prev_fps)} dates from {HISTORY_DB}")
+		else:
+			prev_fps = state_fingerprints(prev_state)
+
+	print("\nИнтервалы отключения:\n\n")
+	for idx, res in enumerate(results):
+		d = res.get('date') or ''
+		if idx > 0:
+			print()
+		print(_human_date(d))
+		for line in range_lines(res):
+			print(line)
+
+	# Send only the dates that changed since last run
+	deltas: List[dict] = []
+	try:
+		with span("diff"):
+			deltas = diff_results(prev_fps, results)
+		if not deltas:
+			print("Данные не изменились — уведомление не отправлено")
+			return False
+
+		print(f"Данные изменились ({', '.join(d['date'] or '-' for d in deltas)}), отправляю уведомление")
+		# Email is off by default (disabled by request); EMAIL_NOTIFY=1 re-enables it
+		if EMAIL_NOTIFY and EMAIL_RECIPIENTS:
+			try:
+				send_intervals_bulk(EMAIL_RECIPIENTS, results)
+			except Exception as e:
+				print(f"Ошибка при отправке email: {e}")
+		else:
+			print("DEBUG: Email sending is disabled (set EMAIL_NOTIFY=1)")
+		# Send Telegram notification for the changed dates only
+		body = format_changes(results, deltas)
+		print(f"DEBUG: Sending Telegram message: {body}")
+		with span("notify.telegram"):
+			asyncio.run(send_telegram_notification(body))
+
+		# Write state only when something changed
+		print("Сохраняю состояние...")
 		try:
-			soup = BeautifulSoup(html, "html.parser")
-			# if already wide (has a single table with hour cols), return as-is
-			if soup.find('table') and soup.find('table').find('thead') and len(soup.find_all('th')) >= 24:
-				return html
-
-			# detect possible multi-column block
-			wrap = soup.find(class_='table2col') or soup
-			tables = wrap.find_all('table')
-			if not tables or len(tables) < 2:
-				return html
-
-			# collect hour-cell classes from both tables; each table row has third td with class
-			classes = []
-			for t in tables:
-				for tr in t.find_all('tr'):
-					tds = tr.find_all('td')
-					if len(tds) >= 3:
-						cls = ' '.join(tds[2].get('class') or [])
-						classes.append(cls)
-
-			# If we didn't find 24 cells, return original
-			if len(classes) < 24:
-				return html
-
-			# build new single-row table
-			new_div = BeautifulSoup('', 'html.parser').new_tag('div')
-			new_div['rel'] = wrap.get('rel', '')
-			new_div['class'] = 'discon-fact-table active'
-
-			table_tag = BeautifulSoup('', 'html.parser').new_tag('table')
-			head = BeautifulSoup('', 'html.parser').new_tag('thead')
-			tr_head = BeautifulSoup('', 'html.parser').new_tag('tr')
-			th0 = BeautifulSoup('', 'html.parser').new_tag('th', colspan='2')
-			th0.string = 'Часові'
-			tr_head.append(th0)
-			for h in range(24):
-				th = BeautifulSoup('', 'html.parser').new_tag('th', scope='col')
-				div = BeautifulSoup('', 'html.parser').new_tag('div')
-				div.string = f"{h:02d}-{(h+1)%24:02d}"
-				th.append(div)
-				tr_head.append(th)
-			head.append(tr_head)
-			table_tag.append(head)
-
-			tbody = BeautifulSoup('', 'html.parser').new_tag('tbody')
-			tr_body = BeautifulSoup('', 'html.parser').new_tag('tr')
-			td_empty = BeautifulSoup('', 'html.parser').new_tag('td', colspan='2')
-			td_empty.string = '\xa0'
-			tr_body.append(td_empty)
-			for cls in classes[:24]:
-				td = BeautifulSoup('', 'html.parser').new_tag('td')
-				if cls:
-					td['class'] = cls
-				tr_body.append(td)
-			tbody.append(tr_body)
-			table_tag.append(tbody)
-
-			new_div.append(table_tag)
-
-			legend = wrap.find(class_='discon-fact-legend')
-			if legend:
-				new_div.append(legend)
-
-			return str(new_div)
-		except Exception:
-			return html
+			if history is not None:
+				with span("history.record"):
+					history.record(address_key, results)
+				print(f"История обновлена в {HISTORY_DB}")
+			if not STATE_JSON:
+				return True
+			now_iso = datetime.now(timezone.utc).isoformat()
+			state_data = {
+				'md5': results_md5(results),
+				'timestamp': now_iso,
+				'version': 2,
+				'dates': updated_day_fingerprints(prev_fps, results, deltas),
+				'data': pack_results(results),  # ranges + packed slots for all dates
+				# Recent change times, for the adaptive poll interval
+				'changes': state_change_times(prev_state)[-(CHANGE_LOG_SIZE - 1):] + [now_iso],
+			}
+			if memory is not None:
+				memory.update(state_data)
+				return True
+			with span("state.save"):
+				save_json_state(DEFAULT_STATE_FILE, state_data)
+			print(f"Состояние сохранено в {DEFAULT_STATE_FILE}")
+			# Amend the last commit with the updated state file
+			commit_state_file(DEFAULT_STATE_FILE)
+		except Exception as e:
+			print(f"Не удалось сохранить состояние: {e}")
+			import traceback
+			traceback.print_exc()
+	except Exception as e:
+		print(f"Ошибка при обработке: {e}")
+	return bool(deltas)
+
+
+def state_change_times(state: dict) -> List[str]:
+	"""Change times kept in a saved state (states before 'changes' only have 'timestamp')."""
+	if state.get('changes'):
+		return list(state['changes'])
+	return [state['timestamp']] if state.get('timestamp') else []
+
+
+def adaptive_schedule(memory: Optional["MemoryState"] = None) -> AdaptiveSchedule:
+	"""Schedule seeded from the history DB, else from the saved state's change times."""
+	history = history_store()
+	if history is not None:
+		times = history.change_times(_default_address().key)
+	else:
+		times = state_change_times(memory.state if memory is not None else load_json_state(DEFAULT_STATE_FILE))
+	schedule = AdaptiveSchedule(times, ADAPTIVE_MIN_INTERVAL, ADAPTIVE_MAX_INTERVAL, fallback=POLL_INTERVAL)
+	print(f"DEBUG: Adaptive polling from {len(schedule.changes)} past changes, {ADAPTIVE_MIN_INTERVAL}-{ADAPTIVE_MAX_INTERVAL}s")
+	return schedule
 
-	# Parse all .discon-fact-table entries (может быть сегодня и завтра)
-	soup_all = BeautifulSoup(table_html, "html.parser")
-	
-	# Parse dates from .dates .date
-	date_map = {}
-	dates_div = soup_all.find("div", class_="dates")
-	if dates_div:
-		date_divs = dates_div.find_all("div", class_="date")
-		for d in date_divs:
-			rel = d.get("rel")
-			span = d.find("span", {"rel": "date"})
-			if span and rel:
-				date_text = span.get_text().strip()  # e.g., "04.01.26" or "04.01.2026"
-				parts = date_text.split(".")
-				if len(parts) == 3:
-					day, month, year = parts
-					year = year.strip()
-					# support two-digit years (assume 2000s) and four-digit years
-					if len(year) == 2:
-						full_year = "20" + year
-					else:
-						full_year = year
-					try:
-						date_iso = f"{int(full_year):04d}-{int(month):02d}-{int(day):02d}"
-						date_map[rel] = date_iso
-					except Exception:
-						# ignore malformed date parts
-						pass
-	
-	table_els = soup_all.select(".discon-fact-table")
-	results = []
-	for tbl in table_els:
-		rel = tbl.get("rel") or tbl.get("data-rel")
-		date_str_tbl = date_map.get(rel)
-		if not date_str_tbl and rel:
-			# Fallback to timestamp calculation: convert UTC timestamp -> Europe/Kyiv
+
+class MemoryState:
+	"""last_state.json kept in memory by --daemon and written out on flush()."""
+
+	def __init__(self, path: str):
+		self.path = path
+		self.state = load_json_state(path)
+		self.dirty = False
+
+	def update(self, state: dict) -> None:
+		self.state = state
+		self.dirty = True
+
+	def flush(self) -> None:
+		if not self.dirty:
+			return
+		with span("state.save"):
+			save_json_state(self.path, self.state)
+		self.dirty = False
+		print(f"Состояние сохранено в {self.path}")
+
+
+def load_json_state(path: str) -> dict:
+	try:
+		with open(path, 'r', encoding='utf-8') as sf:
+			return json.load(sf)
+	except FileNotFoundError:
+		return {}
+	except Exception as e:
+		print(f"DEBUG: Error reading state file {path}: {e}")
+		return {}
+
+
+def save_json_state(path: str, state: dict) -> None:
+	state_dir = os.path.dirname(path) or '.'
+	os.makedirs(state_dir, exist_ok=True)
+	with open(path, 'w', encoding='utf-8') as sf:
+		json.dump(state, sf, ensure_ascii=False, indent=2)
+
+
+def notify_subscribers(outbox: List[tuple]) -> None:
+	"""Fan (address key, body) pairs out to each address's Telegram subscribers in one event loop."""
+	try:
+		subscribers = load_subscribers()
+	except (OSError, ValueError) as e:
+		print(f"Ошибка чтения подписчиков Telegram: {e}")
+		return
+	messages = [(chat_id, body) for key, body in outbox for chat_id in chats_for(subscribers, key)]
+	if not messages:
+		print("DEBUG: No Telegram subscribers for changed addresses")
+		return
+	try:
+		with span("notify.telegram", messages=len(messages)):
+			asyncio.run(fan_out(messages))
+	except Exception as e:
+		print(f"Ошибка при отправке Telegram: {e}")
+
+
+def scrape_addresses(
+	addresses: List[Address],
+	workers: int,
+	provider: Optional[Provider] = None,
+) -> Iterator[Tuple[Address, Union[List[dict], Exception]]]:
+	"""(address, results or error) as each address finishes, `workers` sessions at a time."""
+	from concurrent.futures import ThreadPoolExecutor, as_completed
+
+	provider = provider or PROVIDER
+	browsers = SessionPool(provider.url, workers, factory=lambda url: new_browser_session(url, provider))
+	fetchers = SessionPool(provider.url, workers, factory=lambda url: new_http_fetcher(url, provider))
+	with browsers, fetchers:
+		def scrape(address: Address) -> List[dict]:
+			with span("fetch", address=address.key):
+				html = fetch_fact_table_html(browsers.get(), fetchers.get(), address, provider)
+			if not html:
+				raise RuntimeError("Fact table HTML not found")
+			with span("parse", address=address.key):
+				return build_results(html, provider.tz())
+
+		with ThreadPoolExecutor(max_workers=workers) as pool:
+			futures = {pool.submit(scrape, addr): addr for addr in addresses}
+			for fut in as_completed(futures):
+				try:
+					yield futures[fut], fut.result()
+				except Exception as e:
+					yield futures[fut], e
+
+
+def scrape_by_group(
+	addresses: List[Address],
+	provider: Optional[Provider] = None,
+) -> Iterator[Tuple[Address, Union[List[dict], Exception]]]:
+	"""Answer every address from one page load of all groups' schedules.
+
+	Addresses are resolved to their outage group through the group index, with
+	one getHomeNum call per street for addresses it does not know yet; the
+	schedules themselves come from the page's `DisconSchedule.fact`, parsed
+	once per group. HTTP engine only.
+	"""
+	provider = provider or PROVIDER
+	fetcher = new_http_fetcher(provider=provider)
+	index = group_index(provider)
+	with span("fetch.groups"):
+		fetcher.handshake()
+		groups: dict = dict(index.lookup_many(addresses)) if index is not None else {}
+		missing = [a for a in addresses if tuple(a) not in groups]
+		if missing:
+			resolved = fetcher.resolve_groups(missing)
+			groups.update(resolved)
+			if index is not None:
+				index.put_many({a: g for a, g in resolved.items() if isinstance(g, str)})
+		schedules = fetcher.fetch_group_results()
+	print(f"DEBUG: {len(addresses) - len(missing)} groups from index, {len(missing)} resolved")
+	print(f"DEBUG: {len(schedules)} groups in fact data, {len(set(g for g in groups.values() if isinstance(g, str)))} used")
+	snapshots = snapshot_store()
+	for address in addresses:
+		group = groups.get(tuple(address))
+		if isinstance(group, Exception):
+			yield address, group
+			continue
+		if group not in schedules:
+			if index is not None:
+				# The indexed group may be outdated; resolve it again next time
+				index.invalidate(*address)
+			yield address, FetchError(f"No fact data for group {group}")
+			continue
+		if snapshots is not None:
+			houses = fetcher.street_data.get((address.city, address.street))
+			store_snapshot(snapshots.put_http, fetcher.fact, group, address.house_num, houses, provider.scope_key(address.key))
+		yield address, schedules[group]
+
+
+def run_batch(
+	addresses: List[Address],
+	workers: int = BATCH_WORKERS,
+	by_group: bool = False,
+	provider: Optional[Provider] = None,
+) -> int:
+	"""Scrape many addresses with at most `workers` concurrent browser/HTTP sessions.
+
+	Each address keeps its own per-date fingerprints and results under its key
+	in DEFAULT_BATCH_STATE_FILE; only addresses with changed dates are notified
+	and rewritten, and the file is saved only if any address changed.
+	Notifications are queued and fanned out to subscribers once scraping ends.
+	With `by_group` all addresses are answered from one page load
+	(`scrape_by_group`) instead of one scrape each. For a non-default
+	`provider` the state file, history and subscriber keys are prefixed with
+	its name. Returns the number of addresses that changed.
+	"""
+	provider = provider or PROVIDER
+	workers = max(1, min(workers, len(addresses) or 1))
+	history = history_store()
+	state_file = provider.scope_path(DEFAULT_BATCH_STATE_FILE)
+	state = load_json_state(state_file)
+	entries = state.setdefault("addresses", {})
+	started = time.time()
+	changed = failed = 0
+	outbox = []
+
+	scraped = scrape_by_group(addresses, provider) if by_group else scrape_addresses(addresses, workers, provider)
+	for address, results in scraped:
+		if isinstance(results, Exception):
+			failed += 1
+			print(f"Ошибка для адреса {address.label}: {results}")
+			continue
+		if not results:
+			continue
+		key = provider.scope_key(address.key)
+		publish_results(key, results, address.label, provider)
+		if history is not None:
+			prev_fps = history.latest_fingerprints(key)
+		else:
+			prev_fps = state_fingerprints(entries.get(address.key) or {})
+		deltas = diff_results(prev_fps, results)
+		if not deltas:
+			continue
+		if history is not None:
+			history.record(key, results)
+		changed += 1
+		body = f"{address.label}\n\n" + format_changes(results, deltas)
+		print(f"DEBUG: Queued Telegram message: {body}")
+		outbox.append((key, body))
+		entries[address.key] = {
+			'address': address._asdict(),
+			'md5': results_md5(results),
+			'timestamp': datetime.now(timezone.utc).isoformat(),
+			'dates': updated_day_fingerprints(prev_fps, results, deltas),
+			'data': pack_results(results),
+		}
+
+	if changed and STATE_JSON:
+		with span("state.save"):
+			save_json_state(state_file, state)
+	flush_group_indexes(provider)
+	if outbox:
+		notify_subscribers(outbox)
+	mode = "1 page load" if by_group else f"{workers} workers"
+	print(
+		f"Batch [{provider.name}]: {len(addresses)} addresses, {changed} changed, {failed} failed, "
+		f"{mode}, {time.time() - started:.1f}s"
+	)
+	return changed
+
+
+def run_providers(
+	addresses_by_provider: Dict[str, List[Address]],
+	workers: int = BATCH_WORKERS,
+	by_group: bool = False,
+) -> None:
+	"""Run one batch per provider concurrently, each with its own `workers` budget.
+
+	A slow or failing region only delays or fails its own batch.
+	"""
+	from concurrent.futures import ThreadPoolExecutor, as_completed
+
+	providers = load_providers()
+	unknown = sorted(set(addresses_by_provider) - set(providers))
+	if unknown:
+		raise ValueError(f"Unknown provider(s): {', '.join(unknown)}")
+	jobs = {name: addrs for name, addrs in addresses_by_provider.items() if addrs}
+	started = time.time()
+	with ThreadPoolExecutor(max_workers=max(1, len(jobs))) as pool:
+		futures = {}
+		for name, addrs in jobs.items():
+			provider = providers[name]
+			refresh_group_index(provider)
+			futures[pool.submit(run_batch, addrs, workers, by_group, provider)] = name
+		for fut in as_completed(futures):
+			name = futures[fut]
 			try:
-				ts = int(rel)
-				# normalize milliseconds -> seconds
-				if ts > 10 ** 12:
-					ts = ts // 1000
-				dt_utc = datetime.fromtimestamp(ts, tz=timezone.utc)
-				if ZoneInfo:
-					kyiv_tz = ZoneInfo("Europe/Kyiv")
-				else:
-					kyiv_tz = timezone(timedelta(hours=2))
-				dt_local = dt_utc.astimezone(kyiv_tz)
-				date_str_tbl = dt_local.strftime('%Y-%m-%d')
-			except Exception:
-				date_str_tbl = None
-		tbl_html = _normalize_table(str(tbl))
-		slots = parse_fact_table_to_slots(tbl_html) or []
-		off_ranges_tbl = slots_to_ranges(slots, "off")
-		results.append({"date": date_str_tbl, "off_ranges": off_ranges_tbl, "slots": slots})
+				fut.result()
+			except Exception as e:
+				print(f"Ошибка для провайдера {name}: {e}")
+	print(f"Providers: {len(jobs)} polled in {time.time() - started:.1f}s")
+
+
+def provider_for_key(key: str) -> Provider:
+	"""Provider of a scoped address key (`<name>:city|street|house`, bare for PROVIDER)."""
+	name, sep, _ = key.partition(":")
+	return (load_providers().get(name) if sep else None) or PROVIDER
+
+
+def snapshot_html(snapshots: SnapshotStore, entry: dict) -> str:
+	"""Fact tables HTML of an indexed fetch; HTTP engine fetches are rendered again."""
+	kind = entry.get("kind", "html")
+	if kind == "html":
+		return snapshots.get(entry["hash"])
+	if kind == "http":
+		with span("replay.render"):
+			return raw_fact_html(RawFact(**snapshots.get_http(entry["hash"])), provider_for_key(entry["address"]).tz())
+	raise ValueError(f"Unknown snapshot kind {kind!r}")
+
+
+def replay(address: Optional[str] = None, since: Optional[str] = None, until: Optional[str] = None) -> None:
+	"""Re-run parse -> diff -> render over stored snapshots; nothing is sent or saved."""
+	snapshots = snapshot_store()
+	if snapshots is None:
+		raise RuntimeError("--replay needs SNAPSHOT_DIR")
+	started = time.time()
+	prev_by_address: dict = {}
+	parsed_by_hash: dict = {}
+	count = changes = 0
+	for entry in snapshots.iter_index(address, since, until):
+		count += 1
+		digest = entry["hash"]
+		# Unchanged fetches point at the same object; parse each object once
+		results = parsed_by_hash.get(digest)
+		if results is None:
+			with span("replay.parse"):
+				results = build_results(snapshot_html(snapshots, entry), provider_for_key(entry["address"]).tz())
+			parsed_by_hash[digest] = results
+		prev_fps = prev_by_address.get(entry["address"], {})
+		with span("replay.diff"):
+			deltas = diff_results(prev_fps, results)
+		if not deltas:
+			continue
+		changes += 1
+		prev_by_address[entry["address"]] = updated_day_fingerprints(prev_fps, results, deltas)
+		print(f"\n[{entry['fetched_at']}] {entry['address']}")
+		print(format_changes(results, deltas))
+	print(
+		f"\nReplay: {count} snapshots ({len(parsed_by_hash)} distinct), {changes} changes, "
+		f"{time.time() - started:.2f}s"
+	)
+
+
+def export_schedules(path: str) -> None:
+	"""Write every known address-day (history DB, then state files) to CSV / Parquet."""
+	from itertools import chain
+
+	from schedule_analytics import ScheduleMatrix, state_days
+
+	sources = []
+	history = history_store()
+	if history is not None:
+		sources.append(history.latest_days())
+	if CITY and STREET and HOUSE_NUM:
+		sources.append(state_days(load_json_state(DEFAULT_STATE_FILE), _default_address().key))
+	for provider in load_providers().values():
+		state = load_json_state(provider.scope_path(DEFAULT_BATCH_STATE_FILE))
+		sources.append((provider.scope_key(k), d, p) for k, d, p in state_days(state))
+	# Later sources win, so the current state overrides the history's last version
+	matrix = ScheduleMatrix.from_packed(chain(*sources))
+	with span("export"):
+		rows = matrix.export(path)
+	addresses, dates, _ = matrix.shape
+	peak = int(matrix.concurrent("off").max()) if rows else 0
+	print(
+		f"Exported {rows} address-days ({addresses} addresses, {dates} dates) to {path}; "
+		f"{matrix.hours('off').sum():.1f} off hours, at most {peak} addresses off at once"
+	)
+
+
+def report_trace() -> None:
+	"""Print the per-stage timing table, export spans (TRACE_FILE) and reset."""
+	print("\nTiming summary:")
+	print(TRACER.summary())
+	try:
+		path = TRACER.export()
+		if path:
+			print(f"DEBUG: Trace written to {path}")
+	except OSError as e:
+		print(f"DEBUG: Failed to write trace: {e}")
+	TRACER.reset()
 
-	if results:
-		# combine for md5: include date markers so change in any table affects MD5
-		joined = "\n".join(f"{r['date'] or ''}||" + ";".join(r['off_ranges']) for r in results)
-		current_md5 = hashlib.md5(joined.encode("utf-8")).hexdigest()
-		# For backward compatibility, expose first result in debug prints below
-		off_ranges = results[0]["off_ranges"]
-
-		# Load previous state (md5, timestamp, version) if present
-		prev_md5 = None
-		prev_version = 0
-		import os.path as osp
-		abs_state_file = osp.abspath(DEFAULT_STATE_FILE)
-		# print(f"DEBUG: Looking for state file at: {abs_state_file}")
-		# print(f"DEBUG: File exists: {osp.exists(abs_state_file)}")
-		try:
-			with open(DEFAULT_STATE_FILE, 'r', encoding='utf-8') as sf:
-				st = json.load(sf)
-				prev_md5 = st.get('md5')
-				print(f"DEBUG: Loaded state from {DEFAULT_STATE_FILE}: md5={prev_md5}")
-		except FileNotFoundError:
-			print(f"DEBUG: State file not found at {DEFAULT_STATE_FILE}")
-			prev_md5 = None
-		except Exception as e:
-			print(f"DEBUG: Error reading state file: {e}")
-			prev_md5 = None
 
-		# use first table's date for human-readable prints (if available)
-		date_str = results[0]['date'] if results and results[0].get('date') else None
-		if date_str:
-			print(f"\n{_human_date(date_str)}")
+def watch(interval: int, adaptive: bool = ADAPTIVE_POLL) -> None:
+	"""Poll forever, keeping one browser/HTTP session warm between polls.
 
-		# Normalize current ranges (first table) as strings for printing/sending
-		off_ranges = [str(r).strip() for r in off_ranges]
+	With `adaptive` the interval comes from `AdaptiveSchedule` instead.
+	"""
+	http_fetcher = new_http_fetcher()
+	schedule = adaptive_schedule() if adaptive else None
+	with new_browser_session() as session:
+		while True:
+			started = time.time()
+			refresh_group_index()
+			try:
+				with span("fetch"):
+					table_html = fetch_fact_table_html(session, http_fetcher)
+				if process_fact_html(table_html) and schedule is not None:
+					schedule.observe()
+			except Exception as e:
+				print(f"Ошибка при опросе: {e}")
+			flush_group_indexes()
+			report_trace()
+			if schedule is not None:
+				interval = schedule.next_interval()
+			elapsed = time.time() - started
+			print(f"DEBUG: Poll took {elapsed:.1f}s, next in {max(0, interval - elapsed):.0f}s")
+			time.sleep(max(0, interval - elapsed))
+
+
+def daemon(
+	interval: int,
+	jitter: float = DAEMON_JITTER,
+	flush_interval: int = STATE_FLUSH_INTERVAL,
+	adaptive: bool = ADAPTIVE_POLL,
+	addresses: Optional[List[Address]] = None,
+	workers: int = BATCH_WORKERS,
+	by_group: bool = False,
+) -> None:
+	"""Stay resident: poll every `interval` ± `jitter` seconds until SIGTERM/SIGINT.
+
+	Sessions stay warm across polls, state is held in memory and flushed to
+	DEFAULT_STATE_FILE every `flush_interval` seconds and on shutdown (no git
+	amend; that is the cron workflow's job). A signal lets the current poll
+	finish, then the browser is closed and state flushed. With `adaptive`
+	the interval comes from `AdaptiveSchedule`. With `addresses` each poll
+	is a `run_batch` over them (state goes to the batch state file as usual).
+	"""
+	import random
+	import signal
 
-		# print(f"DEBUG off_ranges: {off_ranges}")
-		# print(f"DEBUG current_md5: {current_md5!r}")
-		# print(f"DEBUG prev_md5: {prev_md5!r}")
-		# print(f"DEBUG match: {prev_md5 == current_md5}")
+	stop = threading.Event()
 
-		print("\nИнтервалы отключения:\n\n")
-		for idx, res in enumerate(results):
-			d = res.get('date') or ''
-			header = f"Дата: {d}" if d else "Дата: -"
-			if idx > 0:
-				print()
-			print(_human_date(d))
-			ors = res.get('off_ranges') or []
-			if ors:
-				for r in ors:
-					print(f" - {r}")
-			else:
-				print(" - Нет интервалов отключения")
+	def request_stop(signum, _frame) -> None:
+		print(f"DEBUG: Got signal {signum}, shutting down after the current poll")
+		stop.set()
 
-		# Send only if data changed since last run
-		try:
-			print(f"DEBUG: prev_md5: {prev_md5!r}, current_md5: {current_md5!r}")
-			if prev_md5 != current_md5:
-				print("Данные изменились (md5 differ), отправляю email")
-				# Email sending disabled by request — comment out to prevent sending
-				# try:
-				# 	send_off_intervals_via_email(EMAIL_RECIPIENT, results=results)
-				# except Exception as e:
-				# 	print(f"Ошибка при отправке email: {e}")
-				print("DEBUG: Email sending is disabled (commented out)")
-				# Send Telegram notification including all dates
-				parts = []
-				for idx, res in enumerate(results):
-					d = res.get('date') or ''
-					if idx > 0:
-						parts.append("")
-					parts.append(_human_date(d))
-					ors = res.get('off_ranges') or []
-					if ors:
-						parts.extend([f" - {r}" for r in ors])
+	signal.signal(signal.SIGTERM, request_stop)
+	signal.signal(signal.SIGINT, request_stop)
+
+	memory = MemoryState(DEFAULT_STATE_FILE) if STATE_JSON else None
+	schedule = adaptive_schedule(memory) if adaptive else None
+	http_fetcher = new_http_fetcher()
+	polls = 0
+	try:
+		with new_browser_session() as session:
+			if fetch_engine() == "selenium" and not addresses:
+				# Provision the driver and load the page before the first poll
+				session.start()
+			next_at = time.monotonic()
+			last_flush = next_at
+			while not stop.is_set():
+				started = time.monotonic()
+				refresh_group_index()
+				try:
+					if addresses:
+						changed = run_batch(addresses, workers, by_group) > 0
 					else:
-						parts.append(" - Нет интервалов отключения")
-						
-				body = "Интервалы отключения:\n\n" + "\n".join(parts)
-				print(f"DEBUG: Sending Telegram message: {body}")
-				asyncio.run(send_telegram_notification(body))
+						with span("fetch"):
+							table_html = fetch_fact_table_html(session, http_fetcher)
+						changed = process_fact_html(table_html, memory)
+					if changed and schedule is not None:
+						schedule.observe()
+				except Exception as e:
+					print(f"Ошибка при опросе: {e}")
+				polls += 1
+				flush_group_indexes()
+				report_trace()
+				if memory is not None and time.monotonic() - last_flush >= flush_interval:
+					memory.flush()
+					last_flush = time.monotonic()
+				step = schedule.next_interval() if schedule is not None else interval
+				# Jitter keeps many daemons from hitting the site in lockstep
+				spread = min(jitter, step / 4)
+				next_at = max(next_at + step + random.uniform(-spread, spread), time.monotonic() + 1)
+				print(f"DEBUG: Poll took {time.monotonic() - started:.1f}s, next in {next_at - time.monotonic():.0f}s")
+				stop.wait(next_at - time.monotonic())
+	finally:
+		if memory is not None:
+			memory.flush()
+		print(f"Daemon stopped after {polls} polls")
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+	import argparse
+
+	parser = argparse.ArgumentParser(description="DTEK outage schedule scraper")
+	parser.add_argument("--watch", action="store_true", help="keep polling with a warm browser session")
+	parser.add_argument("--daemon", action="store_true", help="stay resident: jittered polls, in-memory state, clean SIGTERM shutdown")
+	parser.add_argument("--adaptive", action="store_true", default=ADAPTIVE_POLL, help="--watch / --daemon: learn the poll interval from past changes")
+	parser.add_argument("--interval", type=int, default=POLL_INTERVAL, help="seconds between polls in --watch / --daemon mode")
+	parser.add_argument("--batch", action="store_true", help="scrape every address from ADDRESSES_FILE / ADDRESSES")
+	parser.add_argument("--addresses", help="address list file for --batch (overrides ADDRESSES_FILE)")
+	parser.add_argument("--by-group", action="store_true", help="--batch: answer all addresses from one page load of every group's schedule")
+	parser.add_argument("--workers", type=int, default=BATCH_WORKERS, help="concurrent browser/HTTP sessions for --batch (per provider)")
+	parser.add_argument("--providers", help="JSON file {provider: [addresses]}: poll every listed region concurrently")
+	parser.add_argument("--serve", action="store_true", help="serve cached results over HTTP while polling (implies --daemon unless --watch)")
+	parser.add_argument("--reminders", action="store_true", help="send Telegram reminders before outages and when power is due back (implies --daemon unless --watch)")
+	parser.add_argument("--export", metavar="PATH", help="write all stored address-days to CSV (or .parquet) and exit (needs numpy)")
+	parser.add_argument("--replay", action="store_true", help="re-process snapshots from SNAPSHOT_DIR without fetching")
+	parser.add_argument("--replay-address", help="only replay this address key (city|street|house)")
+	parser.add_argument("--since", help="replay snapshots fetched at or after this ISO time")
+	parser.add_argument("--until", help="replay snapshots fetched at or before this ISO time")
+	args = parser.parse_args(argv)
+
+	if args.daemon or args.watch or args.serve or args.reminders:
+		server = start_read_api() if args.serve else None
+		reminders = start_reminders() if args.reminders else None
+		try:
+			if args.watch:
+				watch(args.interval, args.adaptive)
 			else:
-				print("Данные не изменились (md5 equal) — письмо не отправлено")
-			
-			# Always write state file (even if MD5 didn't change)
-			print("Сохраняю состояние...")
-			try:
-				state_dir = os.path.dirname(DEFAULT_STATE_FILE) or '.'
-				print(f"DEBUG: State dir: {state_dir}")
-				print(f"DEBUG: Absolute state dir: {os.path.abspath(state_dir)}")
-				os.makedirs(state_dir, exist_ok=True)
-				print(f"DEBUG: Directory created/verified")
-				state_data = {
-					'md5': current_md5,
-					'timestamp': datetime.now(timezone.utc).isoformat(),
-					'version': 1,
-					'data': results  # store ranges for all dates
-				}
-				abs_path = os.path.abspath(DEFAULT_STATE_FILE)
-				print(f"DEBUG: Writing to absolute path: {abs_path}")
-				with open(DEFAULT_STATE_FILE, 'w', encoding='utf-8') as sf:
-					json.dump(state_data, sf, ensure_ascii=False, indent=2)
-				print(f"Состояние сохранено в {DEFAULT_STATE_FILE}")
-				print(f"DEBUG: File exists after write: {os.path.exists(DEFAULT_STATE_FILE)}")
-				# Amend the last commit with the updated state file
-				try:
-					subprocess.run(["git", "add", DEFAULT_STATE_FILE], check=True)
-					subprocess.run(["git", "commit", "--amend", "--no-edit"], check=True)
-					print("Git commit amended with updated state.")
-				except subprocess.CalledProcessError as e:
-					print(f"Failed to amend git commit: {e}")
-			except Exception as e:
-				print(f"Не удалось сохранить состояние: {e}")
-				import traceback
-				traceback.print_exc()
-		except Exception as e:
-			print(f"Ошибка при обработке: {e}")
-	else:
-		print('\nНе удалось извлечь статусы из таблицы (парсер вернул None)')
+				addresses = None
+				if args.batch:
+					addresses = load_addresses(args.addresses)
+					if not addresses:
+						raise RuntimeError("No addresses configured for --batch (set ADDRESSES_FILE or ADDRESSES)")
+				daemon(args.interval, adaptive=args.adaptive, addresses=addresses, workers=args.workers, by_group=args.by_group)
+		finally:
+			if server is not None:
+				server.shutdown()
+			if reminders is not None:
+				reminders.stop()
+		return
+
+	try:
+		with span("run"):
+			if args.export:
+				export_schedules(args.export)
+			elif args.replay:
+				replay(args.replay_address, args.since, args.until)
+			elif args.providers:
+				run_providers(load_provider_addresses(args.providers), args.workers, args.by_group)
+			elif args.batch:
+				addresses = load_addresses(args.addresses)
+				if not addresses:
+					raise RuntimeError("No addresses configured for --batch (set ADDRESSES_FILE or ADDRESSES)")
+				refresh_group_index()
+				run_batch(addresses, args.workers, args.by_group)
+			else:
+				refresh_group_index()
+				# Get the rendered fact table HTML (HTTP engine or Selenium fallback)
+				with span("fetch"):
+					table_html = fetch_fact_table_html()
+				process_fact_html(table_html)
+	finally:
+		with _singletons_lock:
+			indexes = list(_group_indexes.values())
+		for index in indexes:
+			index.wait(timeout=60)
+		flush_group_indexes()
+		report_trace()
 
 
 if __name__ == "__main__":
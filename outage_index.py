@@ -0,0 +1,166 @@
+"""In-memory index of absolute off intervals across many addresses.
+
+Answers "is X off at t", "when does X next go off / come back" and "which
+addresses go off (or come back) within the next N minutes" without walking
+`slots` lists or parsing 'HH:MM - HH:MM' strings on every query.
+
+Each address's results are turned into aware, non-overlapping
+[start, end) intervals (UTC epoch seconds; runs that touch across
+midnight are merged) straight from the packed `DaySchedule` masks. Per
+address they are kept sorted; fleet-wide there are two sorted arrays of
+(start, key) and (end, key). Queries are a bisect plus the matches:
+
+- `interval_at(key, t)` / `next_transition(key, t)`: O(log n) per address
+- `starting_within(t, window)` / `ending_within(t, window)`: O(log N + k)
+- `off_at(t)`: O(log N + k), scanning back at most the longest interval
+
+`update(key, results)` replaces one address's intervals incrementally.
+"""
+import threading
+from bisect import bisect_left, bisect_right, insort
+from datetime import date as date_cls, datetime, time as time_cls, timedelta, tzinfo
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+from day_schedule import DaySchedule, mask_ranges
+from http_fetch import kyiv_tz
+
+
+class Interval(NamedTuple):
+	start: float
+	end: float
+	key: str
+
+	def as_dict(self, tz: Optional[tzinfo] = None) -> dict:
+		return {
+			"address": self.key,
+			"start": datetime.fromtimestamp(self.start, tz or kyiv_tz()).isoformat(),
+			"end": datetime.fromtimestamp(self.end, tz or kyiv_tz()).isoformat(),
+		}
+
+
+def _slot_epoch(day: date_cls, slot: int, tz: tzinfo) -> float:
+	h, m = divmod(slot * 30, 60)
+	local = datetime.combine(day + timedelta(days=h // 24), time_cls(h % 24, m))
+	return local.replace(tzinfo=tz).timestamp()
+
+
+def result_intervals(
+	results: Iterable[dict],
+	tz: Optional[tzinfo] = None,
+	statuses: Tuple[str, ...] = ("off",),
+) -> List[Tuple[float, float]]:
+	"""Sorted, merged [start, end) epoch intervals where a slot has one of `statuses`."""
+	tz = tz or kyiv_tz()
+	spans: List[Tuple[float, float]] = []
+	for res in results:
+		slots = res.get("slots")
+		if not res.get("date") or not slots:
+			continue
+		try:
+			day = date_cls.fromisoformat(res["date"])
+		except ValueError:
+			continue
+		sched = DaySchedule.from_slots(slots)
+		mask = 0
+		for status in statuses:
+			mask |= sched.mask(status)
+		for s, e in mask_ranges(mask):
+			spans.append((_slot_epoch(day, s, tz), _slot_epoch(day, e, tz)))
+	spans.sort()
+	merged: List[Tuple[float, float]] = []
+	for start, end in spans:
+		if merged and start <= merged[-1][1]:
+			merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+		else:
+			merged.append((start, end))
+	return merged
+
+
+class OutageIndex:
+	"""Thread-safe; times are datetimes or epoch seconds, results are datetimes in `tz`."""
+
+	def __init__(self, tz: Optional[tzinfo] = None, statuses: Tuple[str, ...] = ("off",)):
+		self.tz = tz or kyiv_tz()
+		self.statuses = statuses
+		self._lock = threading.Lock()
+		self._by_key: Dict[str, List[Tuple[float, float]]] = {}
+		self._starts: List[Tuple[float, float, str]] = []  # (start, end, key)
+		self._ends: List[Tuple[float, float, str]] = []  # (end, start, key)
+		self._longest = 0.0
+
+	def __len__(self) -> int:
+		return len(self._by_key)
+
+	@staticmethod
+	def _ts(when) -> float:
+		return when.timestamp() if isinstance(when, datetime) else float(when)
+
+	def update(self, key: str, results: List[dict], tz: Optional[tzinfo] = None) -> None:
+		"""Replace the intervals of `key` with those of `results`."""
+		intervals = result_intervals(results, tz or self.tz, self.statuses)
+		with self._lock:
+			self._remove(key)
+			self._by_key[key] = intervals
+			for start, end in intervals:
+				insort(self._starts, (start, end, key))
+				insort(self._ends, (end, start, key))
+				self._longest = max(self._longest, end - start)
+
+	def remove(self, key: str) -> None:
+		with self._lock:
+			self._remove(key)
+
+	def _remove(self, key: str) -> None:
+		for start, end in self._by_key.pop(key, ()):
+			del self._starts[bisect_left(self._starts, (start, end, key))]
+			del self._ends[bisect_left(self._ends, (end, start, key))]
+
+	def _interval_at(self, key: str, t: float) -> Optional[Tuple[float, float]]:
+		intervals = self._by_key.get(key) or []
+		i = bisect_right(intervals, (t, float("inf"))) - 1
+		if i >= 0 and intervals[i][0] <= t < intervals[i][1]:
+			return intervals[i]
+		return None
+
+	def interval_at(self, key: str, when) -> Optional[Interval]:
+		"""The off interval of `key` covering `when`, if any."""
+		with self._lock:
+			found = self._interval_at(key, self._ts(when))
+		return Interval(found[0], found[1], key) if found else None
+
+	def next_transition(self, key: str, when) -> Optional[Tuple[datetime, str]]:
+		"""(time, 'off' | 'on') of the next change for `key` after `when`, as far as published."""
+		t = self._ts(when)
+		with self._lock:
+			current = self._interval_at(key, t)
+			if current is not None:
+				return datetime.fromtimestamp(current[1], self.tz), "on"
+			intervals = self._by_key.get(key) or []
+			i = bisect_right(intervals, (t, float("inf")))
+			if i < len(intervals):
+				return datetime.fromtimestamp(intervals[i][0], self.tz), "off"
+		return None
+
+	def starting_within(self, when, window: float) -> List[Interval]:
+		"""Intervals starting in [when, when + window) seconds, by start time."""
+		t = self._ts(when)
+		with self._lock:
+			lo = bisect_left(self._starts, (t,))
+			hi = bisect_left(self._starts, (t + window,))
+			return [Interval(s, e, k) for s, e, k in self._starts[lo:hi]]
+
+	def ending_within(self, when, window: float) -> List[Interval]:
+		"""Intervals ending (power back) in (when, when + window] seconds, by end time."""
+		t = self._ts(when)
+		with self._lock:
+			lo = bisect_right(self._ends, (t, float("inf")))
+			hi = bisect_right(self._ends, (t + window, float("inf")))
+			return [Interval(s, e, k) for e, s, k in self._ends[lo:hi]]
+
+	def off_at(self, when) -> List[Interval]:
+		"""Every address off at `when`."""
+		t = self._ts(when)
+		with self._lock:
+			hi = bisect_right(self._starts, (t, float("inf")))
+			lo = bisect_left(self._starts, (t - self._longest,))
+			return [Interval(s, e, k) for s, e, k in self._starts[lo:hi] if e > t]
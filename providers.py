@@ -0,0 +1,117 @@
+"""Registry of DTEK regional sites.
+
+The regional sites serve the same shutdowns page (`discon-fact-table`
+markup, `DisconSchedule.fact`, `getHomeNum` AJAX call), so a provider only
+records where the page lives and how the site deviates:
+
+- `url`: the shutdowns page
+- `timezone`: used to turn table timestamps into dates
+- `tables_selector`: the container read from the rendered page
+- `quirks`: per-site overrides, currently `fetch_engine` ('http', 'selenium'
+  or 'auto') and `ajax_path` (AJAX endpoint relative to `url`)
+
+The built-in registry can be extended or overridden with PROVIDERS_FILE, a
+JSON object of `{name: {url, timezone, tables_selector, quirks}}`.
+
+State, history and index keys of the default provider (PROVIDER, `dnem`)
+are left as they were; every other provider's keys and files are prefixed
+with its name.
+"""
+import json
+import os
+from datetime import timedelta, timezone, tzinfo
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
+try:
+	from zoneinfo import ZoneInfo
+except Exception:
+	ZoneInfo = None
+
+from addresses import Address, parse_address_items
+
+
+DEFAULT_PROVIDER = os.environ.get("PROVIDER", "dnem")
+PROVIDERS_FILE = os.environ.get("PROVIDERS_FILE", "")
+
+
+class Provider(NamedTuple):
+	name: str
+	url: str
+	timezone: str = "Europe/Kyiv"
+	tables_selector: str = ".discon-fact-tables"
+	quirks: Tuple[Tuple[str, Any], ...] = ()
+
+	def quirk(self, name: str, default: Any = None) -> Any:
+		return dict(self.quirks).get(name, default)
+
+	def tz(self) -> tzinfo:
+		if ZoneInfo:
+			try:
+				return ZoneInfo(self.timezone)
+			except Exception:
+				pass
+		return timezone(timedelta(hours=2))
+
+	@property
+	def is_default(self) -> bool:
+		return self.name == DEFAULT_PROVIDER
+
+	def scope_key(self, key: str) -> str:
+		"""State/history/subscriber key for an address key of this provider."""
+		return key if self.is_default else f"{self.name}:{key}"
+
+	def scope_path(self, path: str) -> str:
+		"""Per-provider variant of a state file path (`state.json` -> `state.oem.json`)."""
+		if self.is_default:
+			return path
+		root, ext = os.path.splitext(path)
+		return f"{root}.{self.name}{ext}"
+
+
+BUILTIN_PROVIDERS = [
+	Provider("dnem", "https://www.dtek-dnem.com.ua/ua/shutdowns"),  # Dnipro region
+	Provider("kem", "https://www.dtek-kem.com.ua/ua/shutdowns"),  # Kyiv
+	Provider("krem", "https://www.dtek-krem.com.ua/ua/shutdowns"),  # Kyiv region
+	Provider("oem", "https://www.dtek-oem.com.ua/ua/shutdowns"),  # Odesa region
+	Provider("dem", "https://www.dtek-dem.com.ua/ua/shutdowns"),  # Donetsk region
+]
+
+
+def _from_config(name: str, cfg: dict, base: Optional[Provider]) -> Provider:
+	fields = base._asdict() if base is not None else {"name": name}
+	for field in ("url", "timezone", "tables_selector"):
+		if cfg.get(field):
+			fields[field] = cfg[field]
+	if isinstance(cfg.get("quirks"), dict):
+		fields["quirks"] = tuple(sorted({**dict(fields.get("quirks") or ()), **cfg["quirks"]}.items()))
+	if not fields.get("url"):
+		raise ValueError(f"Provider {name!r} has no url")
+	return Provider(**fields)
+
+
+def load_providers(path: Optional[str] = None) -> Dict[str, Provider]:
+	"""Built-in providers, extended/overridden by PROVIDERS_FILE."""
+	providers = {p.name: p for p in BUILTIN_PROVIDERS}
+	path = path or PROVIDERS_FILE
+	if path:
+		with open(path, "r", encoding="utf-8") as f:
+			config = json.load(f)
+		for name, cfg in config.items():
+			providers[name] = _from_config(name, cfg or {}, providers.get(name))
+	return providers
+
+
+def get_provider(name: Optional[str] = None, providers: Optional[Dict[str, Provider]] = None) -> Provider:
+	providers = providers if providers is not None else load_providers()
+	name = name or DEFAULT_PROVIDER
+	if name not in providers:
+		raise ValueError(f"Unknown provider {name!r} (known: {', '.join(sorted(providers))})")
+	return providers[name]
+
+
+def load_provider_addresses(path: str) -> Dict[str, List[Address]]:
+	"""{provider name: addresses} from a JSON object keyed by provider name."""
+	with open(path, "r", encoding="utf-8") as f:
+		data = json.load(f)
+	if not isinstance(data, dict):
+		raise ValueError(f"{path}: expected a JSON object keyed by provider name")
+	return {name: parse_address_items(items or []) for name, items in data.items()}
@@ -0,0 +1,210 @@
+"""Local read-only HTTP API over the latest parsed schedules.
+
+The scrape loop (`--daemon` / `--watch`) publishes each address's results
+into a `ResultCache`; requests are answered from it alone, so a read never
+starts a browser or touches the site. Each entry's JSON body and ETag are
+built once when its schedule changes, and `If-None-Match` gets a 304.
+
+Routes:
+- `GET /schedules` — `{addresses: [{address, label, etag, updated_at}]}`
+- `GET /schedules/<address key>` — `{address, label, updated_at, results}`
+  with `results` as `[{date, off_ranges, slots}]`; the key is
+  `city|street|house` (prefixed `<provider>:` for non-default providers),
+  URL-encoded
+- `GET /schedules/<address key>/next` — `{address, off, next: {at, state}}`:
+  the current off interval (or null) and the next transition
+- `GET /outages?within=<seconds>` — `{at, off, going_off, coming_back}`
+  across all addresses, from the `OutageIndex` (default window 1800 s)
+- `GET /health` — `{ok, addresses}`
+"""
+import hashlib
+import json
+import os
+import threading
+import time
+from datetime import datetime, timezone, tzinfo
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, NamedTuple, Optional
+from urllib.parse import parse_qs, unquote, urlsplit
+
+from day_schedule import unpack_results
+from outage_index import OutageIndex
+
+
+READ_API_HOST = os.environ.get("READ_API_HOST", "127.0.0.1")
+READ_API_PORT = int(os.environ.get("READ_API_PORT", "8080"))
+
+
+class CachedBody(NamedTuple):
+	body: bytes
+	etag: str
+
+
+def _encode(payload: dict) -> CachedBody:
+	body = json.dumps(payload, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+	return CachedBody(body, '"' + hashlib.sha1(body).hexdigest() + '"')
+
+
+class _Entry(NamedTuple):
+	results: List[dict]
+	label: str
+	updated_at: str
+	cached: CachedBody
+
+
+class ResultCache:
+	"""Latest results per address key, with pre-encoded responses. Thread-safe."""
+
+	def __init__(self, outages: Optional[OutageIndex] = None):
+		self._lock = threading.Lock()
+		self._entries: Dict[str, _Entry] = {}
+		self._index: Optional[CachedBody] = None
+		self.outages = outages if outages is not None else OutageIndex()
+
+	def __len__(self) -> int:
+		return len(self._entries)
+
+	def put(
+		self,
+		key: str,
+		results: List[dict],
+		label: str = "",
+		updated_at: Optional[str] = None,
+		tz: Optional[tzinfo] = None,
+	) -> bool:
+		"""Publish `results` for `key`; True if they differ from the cached ones."""
+		results = [{"date": r.get("date"), "off_ranges": r.get("off_ranges") or [], "slots": r.get("slots") or []} for r in results]
+		with self._lock:
+			old = self._entries.get(key)
+			if old is not None and old.results == results and old.label == (label or old.label):
+				return False
+			updated_at = updated_at or datetime.now(timezone.utc).isoformat()
+			label = label or (old.label if old is not None else key)
+			cached = _encode({"address": key, "label": label, "updated_at": updated_at, "results": results})
+			self._entries[key] = _Entry(results, label, updated_at, cached)
+			self._index = None
+			self.outages.update(key, results, tz)
+		return True
+
+	def put_state(self, key: str, state: dict, label: str = "", tz: Optional[tzinfo] = None) -> bool:
+		"""Seed `key` from a saved state entry (`data` as written by pack_results)."""
+		if not state.get("data"):
+			return False
+		return self.put(key, unpack_results(state["data"]), label, state.get("timestamp"), tz)
+
+	def get(self, key: str) -> Optional[CachedBody]:
+		entry = self._entries.get(key)
+		return entry.cached if entry is not None else None
+
+	def __contains__(self, key: str) -> bool:
+		return key in self._entries
+
+	def index(self) -> CachedBody:
+		with self._lock:
+			if self._index is None:
+				self._index = _encode({"addresses": [
+					{"address": key, "label": e.label, "etag": e.cached.etag, "updated_at": e.updated_at}
+					for key, e in sorted(self._entries.items())
+				]})
+			return self._index
+
+
+def _etag_matches(header: Optional[str], etag: str) -> bool:
+	if not header:
+		return False
+	# Weak comparison (RFC 9110 13.1.2): W/ prefixes are ignored
+	tags = [t.strip() for t in header.split(",")]
+	return "*" in tags or etag in (t[2:] if t.startswith("W/") else t for t in tags)
+
+
+class ReadApiHandler(BaseHTTPRequestHandler):
+	server: "ReadApiServer"
+	protocol_version = "HTTP/1.1"
+
+	def do_GET(self) -> None:
+		self._respond(send_body=True)
+
+	def do_HEAD(self) -> None:
+		self._respond(send_body=False)
+
+	def _respond(self, send_body: bool) -> None:
+		url = urlsplit(self.path)
+		path = url.path.rstrip("/")
+		cache = self.server.cache
+		if path == "/schedules":
+			cached = cache.index()
+		elif path.startswith("/schedules/") and path.endswith("/next"):
+			cached = self._next(unquote(path[len("/schedules/"):-len("/next")]))
+		elif path == "/outages":
+			cached = self._outages(parse_qs(url.query))
+		elif path.startswith("/schedules/"):
+			cached = cache.get(unquote(path[len("/schedules/"):]))
+		elif path == "/health":
+			cached = _encode({"ok": True, "addresses": len(cache)})
+		else:
+			cached = None
+		if cached is None:
+			self._send(404, _encode({"error": "not found"}), send_body)
+		elif _etag_matches(self.headers.get("If-None-Match"), cached.etag):
+			self._send(304, cached, False)
+		else:
+			self._send(200, cached, send_body)
+
+	def _next(self, key: str) -> Optional[CachedBody]:
+		cache = self.server.cache
+		if key not in cache:
+			return None
+		now = time.time()
+		current = cache.outages.interval_at(key, now)
+		upcoming = cache.outages.next_transition(key, now)
+		return _encode({
+			"address": key,
+			"off": current.as_dict(cache.outages.tz) if current else None,
+			"next": {"at": upcoming[0].isoformat(), "state": upcoming[1]} if upcoming else None,
+		})
+
+	def _outages(self, query: dict) -> CachedBody:
+		outages = self.server.cache.outages
+		try:
+			window = float((query.get("within") or ["1800"])[0])
+		except ValueError:
+			window = 1800.0
+		now = time.time()
+		return _encode({
+			"at": datetime.fromtimestamp(now, outages.tz).isoformat(),
+			"off": [i.as_dict(outages.tz) for i in outages.off_at(now)],
+			"going_off": [i.as_dict(outages.tz) for i in outages.starting_within(now, window)],
+			"coming_back": [i.as_dict(outages.tz) for i in outages.ending_within(now, window)],
+		})
+
+	def _send(self, status: int, cached: CachedBody, send_body: bool) -> None:
+		self.send_response(status)
+		self.send_header("ETag", cached.etag)
+		self.send_header("Cache-Control", "no-cache")
+		if status != 304:
+			self.send_header("Content-Type", "application/json; charset=utf-8")
+			self.send_header("Content-Length", str(len(cached.body)))
+		self.end_headers()
+		if send_body:
+			self.wfile.write(cached.body)
+
+	def log_message(self, format: str, *args) -> None:
+		# Dashboards poll often; keep request lines out of the scrape log
+		pass
+
+
+class ReadApiServer(ThreadingHTTPServer):
+	daemon_threads = True
+
+	def __init__(self, cache: ResultCache, host: str = READ_API_HOST, port: int = READ_API_PORT):
+		super().__init__((host, port), ReadApiHandler)
+		self.cache = cache
+
+
+def serve_in_background(cache: ResultCache, host: str = READ_API_HOST, port: int = READ_API_PORT) -> ReadApiServer:
+	"""Start the API on a daemon thread; stop it with `server.shutdown()`."""
+	server = ReadApiServer(cache, host, port)
+	threading.Thread(target=server.serve_forever, name="read-api", daemon=True).start()
+	host, port = server.server_address[:2]
+	print(f"DEBUG: Read API listening on http://{host}:{port}/schedules")
+	return server
@@ -0,0 +1,183 @@
+"""Timed reminders before each off interval and when power is due back.
+
+Schedules are turned into absolute intervals (`outage_index.result_intervals`,
+so a run across midnight is one outage). Each interval yields a reminder
+REMINDER_LEAD_MINUTES before it starts (one per lead, if several are given)
+and, with REMINDER_RESTORE_NOTICE, a notice when it ends. Times are shown
+in the address's timezone (Europe/Kyiv for the DTEK sites).
+
+Pending events live in one heap ordered by fire time. Rescheduling an
+address bumps its version and pushes the new events. Entries of older
+versions stay in the heap and are dropped when they reach the top (lazy
+deletion), and the heap is rebuilt once stale entries outnumber live ones.
+The dispatcher thread sleeps on a Condition until the earliest event is
+due, or until an update brings an earlier one, so an idle scheduler costs
+no CPU however many events are pending. Events due together go to `send`
+as one batch.
+"""
+import heapq
+import itertools
+import os
+import threading
+import time
+from datetime import datetime, tzinfo
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+from http_fetch import kyiv_tz
+from outage_index import result_intervals
+
+
+# Minutes before an off interval to remind; comma-separated for several reminders
+REMINDER_LEAD_MINUTES = [int(m) for m in os.environ.get("REMINDER_LEAD_MINUTES", "30").split(",") if m.strip()]
+REMINDER_RESTORE_NOTICE = os.environ.get("REMINDER_RESTORE_NOTICE", "1") != "0"
+# Compact the heap when it holds more stale entries than this on top of live ones
+COMPACT_SLACK = 1024
+
+# (address key, message body)
+Outbox = List[Tuple[str, str]]
+
+
+class ReminderScheduler:
+	def __init__(
+		self,
+		send: Callable[[Outbox], None],
+		leads: List[int] = REMINDER_LEAD_MINUTES,
+		restore_notice: bool = REMINDER_RESTORE_NOTICE,
+		clock: Callable[[], float] = time.time,
+	):
+		self.send = send
+		self.leads = sorted(set(leads), reverse=True)
+		self.restore_notice = restore_notice
+		self.clock = clock
+		self._cond = threading.Condition()
+		# (fire_at, seq, key, version, event_id, body)
+		self._heap: List[tuple] = []
+		self._seq = itertools.count()
+		self._versions: Dict[str, int] = {}
+		self._intervals: Dict[str, List[Tuple[float, float]]] = {}
+		self._live: Dict[str, int] = {}
+		self._sent: Dict[str, float] = {}
+		self._thread: Optional[threading.Thread] = None
+		self._stopping = False
+		self.dispatched = 0
+
+	def __len__(self) -> int:
+		"""Pending (live) events."""
+		with self._cond:
+			return sum(self._live.values())
+
+	def _events(self, key: str, label: str, intervals: List[Tuple[float, float]], tz: tzinfo, now: float) -> Iterator[tuple]:
+		def hhmm(ts: float) -> str:
+			return datetime.fromtimestamp(ts, tz).strftime("%H:%M")
+
+		header = f"{label}\n\n" if label else ""
+		for start, end in intervals:
+			span = f"{hhmm(start)} - {hhmm(end)}"
+			if start > now:
+				# Of the leads whose time has already passed, only the shortest is sent
+				overdue = [lead for lead in self.leads if start - lead * 60 <= now]
+				for lead in self.leads:
+					event_id = f"{key}|remind|{start:.0f}|{lead}"
+					if lead in overdue and lead != min(overdue):
+						continue
+					if event_id not in self._sent:
+						# A reminder whose time has passed still goes out before the outage starts
+						fire_at = max(start - lead * 60, now)
+						minutes = max(1, round((start - fire_at) / 60))
+						yield fire_at, event_id, f"{header}Через {minutes} мин отключение света: {span}"
+			if self.restore_notice and end > now:
+				event_id = f"{key}|restore|{end:.0f}"
+				if event_id not in self._sent:
+					yield end, event_id, f"{header}Свет должен вернуться в {hhmm(end)} (отключение {span})"
+
+	def update(self, key: str, results: List[dict], label: str = "", tz: Optional[tzinfo] = None) -> int:
+		"""(Re)schedule `key` from its parsed results; returns the events now pending for it.
+
+		Unchanged off intervals keep the pending events as they are.
+		"""
+		tz = tz or kyiv_tz()
+		intervals = result_intervals(results, tz)
+		with self._cond:
+			if self._intervals.get(key) == intervals:
+				return self._live.get(key, 0)
+			self._intervals[key] = intervals
+			version = self._versions[key] = self._versions.get(key, 0) + 1
+			head = self._heap[0][0] if self._heap else float("inf")
+			earliest = float("inf")
+			count = 0
+			for fire_at, event_id, body in self._events(key, label, intervals, tz, self.clock()):
+				heapq.heappush(self._heap, (fire_at, next(self._seq), key, version, event_id, body))
+				earliest = min(earliest, fire_at)
+				count += 1
+			self._live[key] = count
+			self._compact()
+			if earliest < head:
+				# The dispatcher is waiting for a later event
+				self._cond.notify()
+			return count
+
+	def remove(self, key: str) -> None:
+		with self._cond:
+			self._versions[key] = self._versions.get(key, 0) + 1
+			self._intervals.pop(key, None)
+			self._live.pop(key, None)
+			self._compact()
+
+	def _compact(self) -> None:
+		live = sum(self._live.values())
+		if len(self._heap) > 2 * live + COMPACT_SLACK:
+			self._heap = [e for e in self._heap if e[3] == self._versions.get(e[2])]
+			heapq.heapify(self._heap)
+
+	def _pop_due(self, now: float) -> Outbox:
+		due = []
+		while self._heap and self._heap[0][0] <= now:
+			_, _, key, version, event_id, body = heapq.heappop(self._heap)
+			if version != self._versions.get(key):
+				continue
+			self._live[key] -= 1
+			if event_id in self._sent:
+				continue
+			self._sent[event_id] = now
+			due.append((key, body))
+		if len(self._sent) > 4 * COMPACT_SLACK:
+			# Ids only guard against re-sending within the same outage
+			cutoff = now - 2 * 86400
+			self._sent = {i: t for i, t in self._sent.items() if t >= cutoff}
+		return due
+
+	def _run(self) -> None:
+		while True:
+			with self._cond:
+				while True:
+					if self._stopping:
+						return
+					# Drop superseded entries so the wait targets a live event
+					while self._heap and self._heap[0][3] != self._versions.get(self._heap[0][2]):
+						heapq.heappop(self._heap)
+					now = self.clock()
+					if self._heap and self._heap[0][0] <= now:
+						break
+					self._cond.wait(self._heap[0][0] - now if self._heap else None)
+				due = self._pop_due(now)
+			if not due:
+				continue
+			try:
+				self.send(due)
+				self.dispatched += len(due)
+			except Exception as e:
+				print(f"DEBUG: Failed to dispatch {len(due)} reminders: {e}")
+
+	def start(self) -> "ReminderScheduler":
+		if self._thread is None or not self._thread.is_alive():
+			self._stopping = False
+			self._thread = threading.Thread(target=self._run, name="reminders", daemon=True)
+			self._thread.start()
+		return self
+
+	def stop(self, timeout: Optional[float] = 10) -> None:
+		with self._cond:
+			self._stopping = True
+			self._cond.notify_all()
+		if self._thread is not None:
+			self._thread.join(timeout)
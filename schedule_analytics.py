@@ -0,0 +1,168 @@
+"""Vectorised analytics over many addresses' schedules (needs NumPy).
+
+`ScheduleMatrix` holds slot statuses as a uint8 array of shape
+(addresses, dates, 48) with DaySchedule's codes (0 unknown, 1 on, 2 off,
+3 maybe). It is built from packed 12-byte days: state files and the history
+DB already store them, and parsed results are packed first. All days are
+decoded with one `unpackbits`. Aggregates are then array operations instead
+of loops over `results[*]['slots']`:
+
+- `hours(status)` / `hours_by_date(status)`: off, maybe, ... hours per address
+- `concurrent(statuses)`: addresses in a status per date and slot (fleet curve)
+- `overlap_hours(statuses)`: hours two addresses share a status, all pairs
+- `to_csv` / `to_parquet` (pyarrow): one row per address-day
+
+NumPy (and pyarrow for Parquet) are optional; main.py imports this module
+only for `--export`.
+"""
+import csv
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+try:
+	import numpy as np
+except ImportError:
+	np = None
+
+from day_schedule import CODE_STATUS, PACKED_SIZE, SLOTS_PER_DAY, STATUS_CODES, DaySchedule
+
+SLOT_HOURS = 0.5
+EMPTY_DAY = bytes(PACKED_SIZE)
+# (address key, ISO date, packed DaySchedule bytes)
+PackedDay = Tuple[str, str, bytes]
+
+
+def _require_numpy() -> None:
+	if np is None:
+		raise RuntimeError("schedule_analytics needs numpy (pip install numpy)")
+
+
+def decode_packed(packed: List[bytes]) -> "np.ndarray":
+	"""(n, 48) status codes of n packed days; an empty/short value is an unknown day."""
+	_require_numpy()
+	raw = b"".join(p if len(p) == PACKED_SIZE else EMPTY_DAY for p in packed)
+	buf = np.frombuffer(raw, dtype=np.uint8).reshape(-1, PACKED_SIZE)
+	# Little-endian int: slot i's low bit is bit i, its high bit is bit 48 + i
+	bits = np.unpackbits(buf, axis=1, bitorder="little")
+	return bits[:, :SLOTS_PER_DAY] | (bits[:, SLOTS_PER_DAY:] << 1)
+
+
+def state_days(state: dict, key: Optional[str] = None) -> Iterator[PackedDay]:
+	"""Packed days of a batch state (`addresses`), or of a single-address state under `key`."""
+	if "addresses" in state:
+		entries = [(k, e.get("data") or []) for k, e in (state.get("addresses") or {}).items()]
+	elif key is not None:
+		entries = [(key, state.get("data") or [])]
+	else:
+		entries = []
+	for k, data in entries:
+		for entry in data:
+			if entry.get("date"):
+				yield k, entry["date"], bytes.fromhex(entry.get("packed") or "")
+
+
+def results_days(results_by_key: Dict[str, List[dict]]) -> Iterator[PackedDay]:
+	for key, results in results_by_key.items():
+		for res in results:
+			if res.get("date"):
+				slots = res.get("slots") or []
+				yield key, res["date"], DaySchedule.from_slots(slots).to_bytes() if slots else EMPTY_DAY
+
+
+class ScheduleMatrix:
+	def __init__(self, keys: List[str], dates: List[str], codes: "np.ndarray"):
+		_require_numpy()
+		self.keys = keys
+		self.dates = dates
+		self.codes = codes
+
+	@classmethod
+	def from_packed(cls, days: Iterable[PackedDay]) -> "ScheduleMatrix":
+		"""Build from (key, date, packed) triples; a later triple for the same day wins."""
+		_require_numpy()
+		latest: Dict[Tuple[str, str], bytes] = {}
+		for key, date, packed in days:
+			latest[(key, date)] = packed
+		keys = sorted({k for k, _ in latest})
+		dates = sorted({d for _, d in latest})
+		key_pos = {k: i for i, k in enumerate(keys)}
+		date_pos = {d: i for i, d in enumerate(dates)}
+		codes = np.zeros((len(keys), len(dates), SLOTS_PER_DAY), dtype=np.uint8)
+		if latest:
+			rows = np.fromiter((key_pos[k] for k, _ in latest), dtype=np.intp, count=len(latest))
+			cols = np.fromiter((date_pos[d] for _, d in latest), dtype=np.intp, count=len(latest))
+			codes[rows, cols] = decode_packed(list(latest.values()))
+		return cls(keys, dates, codes)
+
+	@classmethod
+	def from_results(cls, results_by_key: Dict[str, List[dict]]) -> "ScheduleMatrix":
+		return cls.from_packed(results_days(results_by_key))
+
+	@classmethod
+	def from_history(cls, history, since: Optional[str] = None, until: Optional[str] = None) -> "ScheduleMatrix":
+		"""Final version of every date in a HistoryStore."""
+		return cls.from_packed(history.latest_days(since, until))
+
+	@property
+	def shape(self) -> Tuple[int, int, int]:
+		return self.codes.shape
+
+	def mask(self, statuses: Iterable[str] = ("off",)) -> "np.ndarray":
+		"""Boolean (addresses, dates, 48) array: slot has one of `statuses`."""
+		table = np.zeros(len(STATUS_CODES), dtype=bool)
+		table[[STATUS_CODES[s] for s in ([statuses] if isinstance(statuses, str) else statuses)]] = True
+		return table[self.codes]
+
+	def hours_by_date(self, statuses: Iterable[str] = ("off",)) -> "np.ndarray":
+		"""(addresses, dates) hours in `statuses`."""
+		return np.count_nonzero(self.mask(statuses), axis=2) * SLOT_HOURS
+
+	def hours(self, statuses: Iterable[str] = ("off",)) -> "np.ndarray":
+		"""(addresses,) total hours in `statuses` over all dates."""
+		return np.count_nonzero(self.mask(statuses), axis=(1, 2)) * SLOT_HOURS
+
+	def concurrent(self, statuses: Iterable[str] = ("off",)) -> "np.ndarray":
+		"""(dates, 48) number of addresses in `statuses` per slot."""
+		return self.mask(statuses).sum(axis=0, dtype=np.int32)
+
+	def overlap_hours(self, statuses: Iterable[str] = ("off",)) -> "np.ndarray":
+		"""(addresses, addresses) hours both addresses are in `statuses`; the diagonal is `hours`."""
+		flat = self.mask(statuses).reshape(len(self.keys), -1).astype(np.float32)
+		return (flat @ flat.T) * SLOT_HOURS
+
+	def day_rows(self) -> Iterator[dict]:
+		"""One row per address-day that has data: hours per status and the 48 slot codes."""
+		counts = {status: (self.codes == code).sum(axis=2) for code, status in CODE_STATUS.items()}
+		known = counts["unknown"] < SLOTS_PER_DAY
+		digits = (self.codes + ord("0")).view("S1")
+		for a, d in zip(*np.nonzero(known)):
+			row = {"address": self.keys[a], "date": self.dates[d]}
+			for status in ("off", "maybe", "on", "unknown"):
+				row[f"{status}_hours"] = float(counts[status][a, d]) * SLOT_HOURS
+			row["slots"] = digits[a, d].tobytes().decode("ascii")
+			yield row
+
+	def to_csv(self, path: str) -> int:
+		"""Write `day_rows` as CSV; returns the number of rows."""
+		n = 0
+		with open(path, "w", encoding="utf-8", newline="") as f:
+			writer = csv.DictWriter(f, fieldnames=["address", "date", "off_hours", "maybe_hours", "on_hours", "unknown_hours", "slots"])
+			writer.writeheader()
+			for row in self.day_rows():
+				writer.writerow(row)
+				n += 1
+		return n
+
+	def to_parquet(self, path: str) -> int:
+		"""Write `day_rows` as Parquet (needs pyarrow); returns the number of rows."""
+		try:
+			import pyarrow as pa
+			import pyarrow.parquet as pq
+		except ImportError as e:
+			raise RuntimeError("Parquet export needs pyarrow (pip install pyarrow)") from e
+		rows = list(self.day_rows())
+		pq.write_table(pa.Table.from_pylist(rows), path)
+		return len(rows)
+
+	def export(self, path: str) -> int:
+		"""`to_parquet` for a `.parquet` path, else `to_csv`."""
+		return self.to_parquet(path) if path.endswith(".parquet") else self.to_csv(path)
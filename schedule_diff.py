@@ -0,0 +1,128 @@
+"""Per-date change detection for parsed schedules.
+
+Every date keeps its own fingerprint (the packed `DaySchedule` hex, which is
+lossless), so a new table appearing or one day being revised only touches
+that date. For a changed date `diff_day` describes what happened to its
+'off' ranges, which 'maybe' slots resolved and which became 'maybe'.
+"""
+from typing import Dict, List, Optional, Tuple
+
+from day_schedule import DaySchedule, mask_ranges, slot_time
+
+
+Run = Tuple[int, int]
+
+
+def _fmt(run: Run) -> str:
+	return f"{slot_time(run[0])} - {slot_time(run[1])}"
+
+
+def _date_key(res: dict) -> str:
+	return res.get("date") or ""
+
+
+def result_fingerprint(res: dict) -> str:
+	slots = res.get("slots") or []
+	return DaySchedule.from_slots(slots).hex() if slots else ""
+
+
+def day_fingerprints(results: List[dict]) -> Dict[str, str]:
+	return {_date_key(res): result_fingerprint(res) for res in results}
+
+
+def state_fingerprints(state: dict) -> Dict[str, str]:
+	"""Per-date fingerprints from a saved state, including pre-'dates' states."""
+	if isinstance(state.get("dates"), dict):
+		return dict(state["dates"])
+	fps = {}
+	for entry in state.get("data") or []:
+		if "packed" in entry:
+			fps[_date_key(entry)] = entry.get("packed") or ""
+		else:
+			fps[_date_key(entry)] = result_fingerprint(entry)
+	return fps
+
+
+def _run_mask(run: Run) -> int:
+	return ((1 << (run[1] - run[0])) - 1) << run[0]
+
+
+def _overlaps(a: Run, b: Run) -> bool:
+	return a[0] < b[1] and b[0] < a[1]
+
+
+def diff_runs(old_runs: List[Run], new_runs: List[Run]) -> dict:
+	"""Classify 'off' runs: added, removed, extended, shortened or moved.
+
+	A new run overlapping exactly one old run (and vice versa) is compared with
+	it; merges and splits are reported as removed + added.
+	"""
+	delta = {"added": [], "removed": [], "extended": [], "shortened": [], "moved": []}
+	new_overlaps = [[o for o in old_runs if _overlaps(o, n)] for n in new_runs]
+	old_overlap_count = {o: sum(1 for n in new_runs if _overlaps(o, n)) for o in old_runs}
+	paired = set()
+	for n, overl in zip(new_runs, new_overlaps):
+		if len(overl) == 1 and old_overlap_count[overl[0]] == 1:
+			o = overl[0]
+			paired.add(o)
+			if o == n:
+				continue
+			if n[0] <= o[0] and n[1] >= o[1]:
+				delta["extended"].append((_fmt(o), _fmt(n)))
+			elif n[0] >= o[0] and n[1] <= o[1]:
+				delta["shortened"].append((_fmt(o), _fmt(n)))
+			else:
+				delta["moved"].append((_fmt(o), _fmt(n)))
+		else:
+			delta["added"].append(_fmt(n))
+	delta["removed"] = [_fmt(o) for o in old_runs if o not in paired]
+	return delta
+
+
+def diff_day(date: str, prev_fp: Optional[str], cur_fp: str) -> Optional[dict]:
+	"""Structured delta for one date, or None if it did not change."""
+	if prev_fp == cur_fp:
+		return None
+	cur = DaySchedule.from_hex(cur_fp) if cur_fp else DaySchedule()
+	prev = DaySchedule.from_hex(prev_fp) if prev_fp else None
+	delta = {"date": date, "kind": "new" if prev is None else "changed"}
+	old_runs = prev.slot_ranges("off") if prev is not None else []
+	delta.update(diff_runs(old_runs, cur.slot_ranges("off")))
+	if prev is not None:
+		was_maybe = prev.mask("maybe")
+		# An off run that was entirely 'maybe' is reported once, as resolved
+		resolved = {_fmt(r) for r in cur.slot_ranges("off") if not _run_mask(r) & ~was_maybe}
+		delta["added"] = [r for r in delta["added"] if r not in resolved]
+		delta["maybe_resolved"] = {
+			"off": [_fmt(r) for r in mask_ranges(was_maybe & cur.mask("off"))],
+			"on": [_fmt(r) for r in mask_ranges(was_maybe & cur.mask("on"))],
+		}
+		delta["maybe_added"] = [_fmt(r) for r in mask_ranges(cur.mask("maybe") & ~was_maybe)]
+	return delta
+
+
+def diff_results(prev_fps: Dict[str, str], results: List[dict]) -> List[dict]:
+	"""Deltas for the dates in `results` whose fingerprint changed."""
+	deltas = []
+	for res in results:
+		date = _date_key(res)
+		delta = diff_day(date, prev_fps.get(date), result_fingerprint(res))
+		if delta is not None:
+			deltas.append(delta)
+	return deltas
+
+
+def describe_delta(delta: dict) -> List[str]:
+	"""Human-readable change lines for one date."""
+	if delta.get("kind") == "new":
+		return [" Опубликован новый график"]
+	lines = [f" + новое отключение {r}" for r in delta.get("added", [])]
+	lines += [f" − отменено отключение {r}" for r in delta.get("removed", [])]
+	lines += [f" ↑ продлено {o} → {n}" for o, n in delta.get("extended", [])]
+	lines += [f" ↓ сокращено {o} → {n}" for o, n in delta.get("shortened", [])]
+	lines += [f" ~ перенесено {o} → {n}" for o, n in delta.get("moved", [])]
+	resolved = delta.get("maybe_resolved") or {}
+	lines += [f" ! возможное отключение подтверждено {r}" for r in resolved.get("off", [])]
+	lines += [f" ✓ возможное отключение не состоится {r}" for r in resolved.get("on", [])]
+	lines += [f" ? возможное отключение {r}" for r in delta.get("maybe_added", [])]
+	return lines or [" График уточнён"]
@@ -0,0 +1,136 @@
+"""Content-addressed store of raw fetch snapshots.
+
+Every object is kept compressed under its SHA-256
+(`objects/ab/<hash>.<kind>.zst`, or `.gz` without the optional
+`zstandard` package). Identical fetches share one object; each fetch only
+appends a pointer line to `index.jsonl`, so the fetch -> parse -> diff ->
+render pipeline can be replayed offline after a fix. Kinds:
+
+- `html`: a `.discon-fact-tables` container read from the browser (Selenium)
+- `http`: an HTTP engine fetch, `{fact, group, house, houses}` where `fact`
+  is the hash of a `fact` object (the site's `DisconSchedule.fact` JSON,
+  stored once per distinct content) and `houses` the getHomeNum data
+"""
+import gzip
+import hashlib
+import json
+import os
+import threading
+from datetime import datetime, timezone
+from typing import Iterator, Optional
+try:
+	import zstandard
+except ImportError:
+	zstandard = None
+
+
+def _json(obj) -> str:
+	# Stable text, so identical data shares one object
+	return json.dumps(obj, ensure_ascii=False, sort_keys=True, separators=(",", ":"))
+
+
+class SnapshotStore:
+	def __init__(self, root: str):
+		self.root = root
+		self.objects_dir = os.path.join(root, "objects")
+		self.index_path = os.path.join(root, "index.jsonl")
+		self._lock = threading.Lock()
+		os.makedirs(self.objects_dir, exist_ok=True)
+
+	def _object_path(self, digest: str, kind: str, ext: str) -> str:
+		return os.path.join(self.objects_dir, digest[:2], f"{digest}.{kind}.{ext}")
+
+	def _find_object(self, digest: str, kind: str) -> Optional[str]:
+		for ext in ("zst", "gz"):
+			path = self._object_path(digest, kind, ext)
+			if os.path.exists(path):
+				return path
+		return None
+
+	def put_object(self, content: str, kind: str = "html") -> str:
+		"""Store `content` once per distinct content; returns its hash."""
+		raw = content.encode("utf-8")
+		digest = hashlib.sha256(raw).hexdigest()
+		if self._find_object(digest, kind) is None:
+			if zstandard is not None:
+				path, data = self._object_path(digest, kind, "zst"), zstandard.ZstdCompressor(level=10).compress(raw)
+			else:
+				path, data = self._object_path(digest, kind, "gz"), gzip.compress(raw, compresslevel=9)
+			os.makedirs(os.path.dirname(path), exist_ok=True)
+			tmp = f"{path}.{threading.get_ident()}.tmp"
+			with open(tmp, "wb") as f:
+				f.write(data)
+			os.replace(tmp, path)
+		return digest
+
+	def put(self, content: str, address: str = "", fetched_at: Optional[str] = None, kind: str = "html") -> str:
+		"""Store `content` (once per distinct content) and index this fetch."""
+		digest = self.put_object(content, kind)
+		entry = {
+			"fetched_at": fetched_at or datetime.now(timezone.utc).isoformat(),
+			"address": address,
+			"hash": digest,
+		}
+		if kind != "html":
+			entry["kind"] = kind
+		with self._lock, open(self.index_path, "a", encoding="utf-8") as f:
+			f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+		return digest
+
+	def put_http(
+		self,
+		fact: dict,
+		group: str,
+		house: str,
+		houses: Optional[dict] = None,
+		address: str = "",
+		fetched_at: Optional[str] = None,
+	) -> str:
+		"""Index an HTTP engine fetch: the site's fact JSON and the address's getHomeNum data."""
+		fact_hash = self.put_object(_json(fact), "fact")
+		doc = {"fact": fact_hash, "group": group, "house": house, "houses": houses}
+		return self.put(_json(doc), address, fetched_at, kind="http")
+
+	def get_http(self, digest: str) -> dict:
+		"""`put_http` fields, with `fact` loaded."""
+		doc = json.loads(self.get(digest, "http"))
+		doc["fact"] = json.loads(self.get(doc["fact"], "fact"))
+		return doc
+
+	def get(self, digest: str, kind: str = "html") -> str:
+		path = self._find_object(digest, kind)
+		if path is None:
+			raise KeyError(digest)
+		with open(path, "rb") as f:
+			data = f.read()
+		if path.endswith(".zst"):
+			if zstandard is None:
+				raise RuntimeError(f"{path} needs the zstandard package")
+			raw = zstandard.ZstdDecompressor().decompress(data)
+		else:
+			raw = gzip.decompress(data)
+		return raw.decode("utf-8")
+
+	def iter_index(
+		self,
+		address: Optional[str] = None,
+		since: Optional[str] = None,
+		until: Optional[str] = None,
+	) -> Iterator[dict]:
+		"""Indexed fetches in recorded order, optionally filtered by address/ISO time."""
+		try:
+			f = open(self.index_path, "r", encoding="utf-8")
+		except FileNotFoundError:
+			return
+		with f:
+			for line in f:
+				try:
+					entry = json.loads(line)
+				except ValueError:
+					continue
+				if address is not None and entry.get("address") != address:
+					continue
+				ts = entry.get("fetched_at") or ""
+				if (since and ts < since) or (until and ts > until):
+					continue
+				yield entry
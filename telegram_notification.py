@@ -1,8 +1,24 @@
 import os
 import asyncio
 import json
+import time
 import traceback
+from datetime import timedelta
+from typing import Dict, Iterable, List, Optional, Tuple, Union
 from telegram import Bot
+from telegram.error import BadRequest, ChatMigrated, Forbidden, NetworkError, RetryAfter
+from telegram.request import HTTPXRequest
+
+
+# {address key: [chat ids]}; "*" subscribes a chat to every address
+TELEGRAM_SUBSCRIBERS_FILE = os.environ.get("TELEGRAM_SUBSCRIBERS_FILE", "")
+# Telegram allows ~30 messages/s per bot and ~1 message/s per chat
+TELEGRAM_GLOBAL_RATE = float(os.environ.get("TELEGRAM_GLOBAL_RATE", "25"))
+TELEGRAM_CHAT_INTERVAL = float(os.environ.get("TELEGRAM_CHAT_INTERVAL", "1.0"))
+TELEGRAM_CONCURRENCY = int(os.environ.get("TELEGRAM_CONCURRENCY", "16"))
+TELEGRAM_MAX_RETRIES = int(os.environ.get("TELEGRAM_MAX_RETRIES", "3"))
+
+ChatId = Union[int, str]
 
 
 async def send_telegram_notification(message: str) -> None:
@@ -75,4 +91,194 @@ async def send_telegram_notification(message: str) -> None:
         print("DEBUG: Telegram message sent")
     except Exception as e:
         print(f"DEBUG: Failed to send Telegram message: {e}")
-        traceback.print_exc()
\ No newline at end of file
+        traceback.print_exc()
+
+
+def _env_or_file(name: str) -> Optional[str]:
+    value = os.environ.get(name)
+    if value:
+        return value
+    try:
+        with open("env_vars.json", "r") as f:
+            return json.load(f).get(name)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return None
+
+
+def load_subscribers(path: Optional[str] = None) -> Dict[str, List[ChatId]]:
+    """{address key: [chat ids]} from TELEGRAM_SUBSCRIBERS_FILE.
+
+    Without a file, TELEGRAM_CHAT_ID (if set) is subscribed to every address.
+    """
+    path = path or TELEGRAM_SUBSCRIBERS_FILE
+    if not path:
+        chat_id = _env_or_file("TELEGRAM_CHAT_ID")
+        return {"*": [chat_id]} if chat_id else {}
+    with open(path, "r", encoding="utf-8") as f:
+        raw = json.load(f)
+    subscribers = {}
+    for key, chats in raw.items():
+        if not isinstance(chats, list):
+            chats = [chats]
+        subscribers[key.lower()] = chats
+    return subscribers
+
+
+def chats_for(subscribers: Dict[str, List[ChatId]], address_key: str) -> List[ChatId]:
+    """Chats subscribed to `address_key` (including "*"), each once."""
+    chats = []
+    seen = set()
+    for chat_id in subscribers.get(address_key.lower(), []) + subscribers.get("*", []):
+        if str(chat_id) not in seen:
+            seen.add(str(chat_id))
+            chats.append(chat_id)
+    return chats
+
+
+class RateLimiter:
+    """Hands out send slots at least `interval` seconds apart."""
+
+    def __init__(self, interval: float):
+        self.interval = interval
+        self._next = 0.0
+        self._lock = asyncio.Lock()
+
+    async def wait(self) -> None:
+        async with self._lock:
+            now = time.monotonic()
+            delay = self._next - now
+            self._next = max(now, self._next) + self.interval
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+    def pause(self, seconds: float) -> None:
+        self._next = max(self._next, time.monotonic() + seconds)
+
+
+def _retry_after_seconds(e: RetryAfter) -> float:
+    delay = e.retry_after
+    if isinstance(delay, timedelta):
+        return delay.total_seconds()
+    return float(delay)
+
+
+class TelegramFanout:
+    """Delivers many messages over one Bot and its HTTP connection pool.
+
+    Messages to the same chat go out in order, one per `chat_interval`
+    seconds; different chats are sent concurrently (at most `concurrency` in
+    flight) within a global budget of `global_rate` messages per second.
+    Use as an async context manager so the HTTP client is opened once.
+    A failure, whatever its type, only fails its own message.
+    """
+
+    def __init__(
+        self,
+        token: str,
+        global_rate: float = TELEGRAM_GLOBAL_RATE,
+        chat_interval: float = TELEGRAM_CHAT_INTERVAL,
+        concurrency: int = TELEGRAM_CONCURRENCY,
+        max_retries: int = TELEGRAM_MAX_RETRIES,
+        bot: Optional[Bot] = None,
+    ):
+        self.bot = bot or Bot(token=token, request=HTTPXRequest(connection_pool_size=concurrency))
+        self.chat_interval = chat_interval
+        self.max_retries = max_retries
+        self._global = RateLimiter(1.0 / global_rate if global_rate > 0 else 0.0)
+        self._inflight = asyncio.Semaphore(concurrency)
+
+    async def __aenter__(self) -> "TelegramFanout":
+        await self.bot.initialize()
+        return self
+
+    async def __aexit__(self, *exc) -> None:
+        await self.bot.shutdown()
+
+    async def _send_one(self, chat_id: ChatId, text: str, chat_limit: RateLimiter, queued_at: float) -> dict:
+        result = {"chat_id": chat_id, "ok": False, "attempts": 0, "latency_ms": 0.0, "error": None}
+        while result["attempts"] <= self.max_retries:
+            result["attempts"] += 1
+            await chat_limit.wait()
+            await self._global.wait()
+            try:
+                async with self._inflight:
+                    await self.bot.send_message(chat_id=chat_id, text=text)
+                result["ok"] = True
+                result["error"] = None
+                break
+            except RetryAfter as e:
+                # Flood wait: Telegram does not say which limit was hit, so back off everywhere
+                delay = _retry_after_seconds(e)
+                print(f"DEBUG: Telegram flood wait {delay:.0f}s for chat {chat_id}")
+                self._global.pause(delay)
+                chat_limit.pause(delay)
+                result["error"] = str(e)
+            except ChatMigrated as e:
+                # Group upgraded to a supergroup: deliver there, and report the new id
+                print(f"DEBUG: Telegram chat {chat_id} migrated to {e.new_chat_id}")
+                chat_id = result["migrated_to"] = e.new_chat_id
+                result["error"] = str(e)
+            except (BadRequest, Forbidden) as e:
+                # Blocked bot, deleted chat, malformed text: retrying will not help
+                result["error"] = str(e)
+                break
+            except NetworkError as e:
+                result["error"] = str(e)
+                if result["attempts"] <= self.max_retries:
+                    await asyncio.sleep(min(30.0, 2.0 ** result["attempts"]))
+            except Exception as e:
+                # InvalidToken, Conflict, EndPointNotFound, a bug...: fail this message, not the batch
+                result["error"] = f"{e.__class__.__name__}: {e}"
+                break
+        result["latency_ms"] = (time.monotonic() - queued_at) * 1000
+        return result
+
+    async def _send_chat(self, chat_id: ChatId, texts: List[str], queued_at: float) -> List[dict]:
+        chat_limit = RateLimiter(self.chat_interval)
+        return [await self._send_one(chat_id, text, chat_limit, queued_at) for text in texts]
+
+    async def send_all(self, messages: Iterable[Tuple[ChatId, str]]) -> List[dict]:
+        """Send (chat_id, text) pairs; returns one result dict per message."""
+        queued_at = time.monotonic()
+        by_chat: Dict[str, Tuple[ChatId, List[str]]] = {}
+        for chat_id, text in messages:
+            by_chat.setdefault(str(chat_id), (chat_id, []))[1].append(text)
+        per_chat = await asyncio.gather(*(
+            self._send_chat(chat_id, texts, queued_at) for chat_id, texts in by_chat.values()
+        ))
+        return [r for chat_results in per_chat for r in chat_results]
+
+
+def fanout_summary(results: List[dict]) -> str:
+    sent = [r for r in results if r["ok"]]
+    failed = len(results) - len(sent)
+    if not sent:
+        return f"Telegram: 0 sent, {failed} failed"
+    latencies = sorted(r["latency_ms"] for r in sent)
+    p50 = latencies[len(latencies) // 2]
+    p95 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))]
+    retried = sum(1 for r in results if r["attempts"] > 1)
+    return (
+        f"Telegram: {len(sent)} sent, {failed} failed, {retried} retried, "
+        f"latency p50 {p50:.0f} ms, p95 {p95:.0f} ms, max {latencies[-1]:.0f} ms"
+    )
+
+
+async def fan_out(messages: Iterable[Tuple[ChatId, str]], token: Optional[str] = None) -> List[dict]:
+    """Send all `messages` through one TelegramFanout; failures are reported, not raised."""
+    messages = list(messages)
+    token = token or _env_or_file("TELEGRAM_TOKEN")
+    if not token:
+        print("TELEGRAM_TOKEN not set, skipping Telegram fan-out")
+        return []
+    if not messages:
+        return []
+    async with TelegramFanout(token) as fanout:
+        results = await fanout.send_all(messages)
+    for r in results:
+        if not r["ok"]:
+            print(f"DEBUG: Failed to send Telegram message to {r['chat_id']}: {r['error']}")
+        if r.get("migrated_to"):
+            print(f"Чат Telegram {r['chat_id']} перенесён в {r['migrated_to']}: обновите список подписчиков")
+    print(fanout_summary(results))
+    return results
@@ -0,0 +1,48 @@
+"""AdaptiveSchedule intervals, including long-quiet histories."""
+import os
+import sys
+import unittest
+from datetime import datetime, timedelta, timezone
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from adaptive_poll import AdaptiveSchedule  # noqa: E402
+
+NOW = datetime(2025, 10, 16, 9, 0, tzinfo=timezone.utc)
+
+
+def history(days_ago: float, count: int = 6) -> list:
+	"""`count` changes at 17:00 UTC (20:00 Kyiv), the last one `days_ago` days before NOW."""
+	last = (NOW - timedelta(days=days_ago)).replace(hour=17, minute=0)
+	return [(last - timedelta(days=i)).isoformat() for i in range(count)]
+
+
+class AdaptiveScheduleTest(unittest.TestCase):
+	def test_fallback_until_enough_changes(self):
+		schedule = AdaptiveSchedule(history(1, count=4), 60, 1800, fallback=300)
+		self.assertEqual(schedule.next_interval(NOW), 300)
+
+	def test_minimum_right_after_a_change(self):
+		schedule = AdaptiveSchedule(history(1), 60, 1800)
+		schedule.observe(NOW)
+		self.assertEqual(schedule.next_interval(NOW), 60)
+
+	def test_very_old_history_does_not_overflow(self):
+		# 2 ** (quiet hours) overflowed a float after ~1024 h
+		for days in (43, 50, 365, 3650):
+			schedule = AdaptiveSchedule(history(days), 60, 1800)
+			interval = schedule.next_interval(NOW)
+			self.assertGreaterEqual(interval, 60, days)
+			self.assertLessEqual(interval, 1800, days)
+
+	def test_quiet_backoff_reaches_the_maximum(self):
+		schedule = AdaptiveSchedule(history(60), 60, 1800)
+		# A quiet morning hour, far from the evening bins
+		self.assertEqual(schedule.next_interval(NOW.replace(hour=2)), 1800)
+
+	def test_equal_bounds(self):
+		self.assertEqual(AdaptiveSchedule(history(50), 300, 300).next_interval(NOW), 300)
+
+
+if __name__ == "__main__":
+	unittest.main()
@@ -0,0 +1,87 @@
+"""DaySchedule packing against the plain slot lists it replaces."""
+import os
+import random
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from day_schedule import PACKED_SIZE, STATUS_CODES, DaySchedule, pack_results, unpack_results  # noqa: E402
+from fact_parser import cell_slots, extract_results, slots_to_ranges  # noqa: E402
+
+STATUSES = list(STATUS_CODES)
+
+
+def random_slots(rng: random.Random) -> list:
+	return [rng.choice(STATUSES) for _ in range(48)]
+
+
+def wide_table(classes: list) -> str:
+	cells = "".join(f'<td class="{c}"></td>' for c in classes)
+	return (
+		'<div class="discon-fact-tables"><div class="discon-fact-table" rel="1760648400"><table>'
+		f'<thead><tr>{"<th></th>" * 25}</tr></thead><tbody><tr><td colspan="2"></td>{cells}</tr></tbody>'
+		"</table></div></div>"
+	)
+
+
+class DayScheduleTest(unittest.TestCase):
+	def setUp(self):
+		self.rng = random.Random(7)
+
+	def test_slots_round_trip(self):
+		cases = [[s] * 48 for s in STATUSES] + [random_slots(self.rng) for _ in range(200)]
+		for slots in cases:
+			day = DaySchedule.from_slots(slots)
+			self.assertEqual(day.to_slots(), slots)
+			self.assertEqual(len(day.to_bytes()), PACKED_SIZE)
+			self.assertEqual(DaySchedule.from_bytes(day.to_bytes()), day)
+			self.assertEqual(DaySchedule.from_hex(day.hex()).to_slots(), slots)
+
+	def test_short_list_pads_unknown(self):
+		self.assertEqual(DaySchedule.from_slots(["off", "maybe"]).to_slots(), ["off", "maybe"] + ["unknown"] * 46)
+
+	def test_equal_schedules_hash_equal(self):
+		slots = random_slots(self.rng)
+		self.assertEqual(hash(DaySchedule.from_slots(slots)), hash(DaySchedule.from_slots(list(slots))))
+		self.assertEqual(len({DaySchedule.from_slots(slots), DaySchedule.from_slots(list(slots))}), 1)
+
+	def test_ranges_match_slots_to_ranges(self):
+		cases = [[s] * 48 for s in STATUSES] + [random_slots(self.rng) for _ in range(200)]
+		for slots in cases:
+			day = DaySchedule.from_slots(slots)
+			for status in STATUSES:
+				self.assertEqual(day.ranges(status), slots_to_ranges(slots, status), (status, slots))
+				self.assertEqual(day.count(status), slots.count(status))
+
+	def test_pack_results_round_trip(self):
+		results = [
+			{"date": "2025-10-16", "off_ranges": [], "slots": random_slots(self.rng)},
+			{"date": "2025-10-17", "off_ranges": [], "slots": []},
+		]
+		packed = pack_results(results)
+		self.assertNotIn("slots", packed[0])
+		self.assertEqual(packed[1]["packed"], "")
+		self.assertEqual(unpack_results(packed), results)
+
+
+class CellRulesTest(unittest.TestCase):
+	def test_cell_classes(self):
+		self.assertEqual(cell_slots("cell-scheduled"), ("off", "off"))
+		self.assertEqual(cell_slots("cell-non-scheduled"), ("on", "on"))
+		self.assertEqual(cell_slots("cell-first-half"), ("off", "on"))
+		self.assertEqual(cell_slots("cell-second-half"), ("on", "off"))
+		self.assertEqual(cell_slots(""), ("unknown", "unknown"))
+
+	def test_scheduled_maybe_is_not_off(self):
+		# 'cell-scheduled-maybe' contains 'cell-scheduled'; it used to be read as off
+		self.assertEqual(cell_slots("cell-scheduled-maybe"), ("maybe", "maybe"))
+		classes = ["cell-non-scheduled"] * 10 + ["cell-scheduled-maybe"] * 2 + ["cell-scheduled"] + ["cell-non-scheduled"] * 11
+		res = extract_results(wide_table(classes))[0]
+		self.assertEqual(res["slots"][20:26], ["maybe"] * 4 + ["off"] * 2)
+		self.assertEqual(res["off_ranges"], ["12:00 - 13:00"])
+		self.assertEqual(DaySchedule.from_slots(res["slots"]).ranges("maybe"), ["10:00 - 12:00"])
+
+
+if __name__ == "__main__":
+	unittest.main()
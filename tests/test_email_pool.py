@@ -0,0 +1,114 @@
+"""SmtpPool against an in-process aiosmtpd server."""
+import os
+import socket
+import sys
+import threading
+import unittest
+from email.message import EmailMessage
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from email_pool import SmtpPool, SmtpSettings  # noqa: E402
+
+try:
+	from aiosmtpd.controller import Controller
+except ImportError:
+	Controller = None
+
+
+class Handler:
+	"""Accepts mail; `drop@`, `busy@` and `reject@` recipients misbehave."""
+
+	def __init__(self):
+		self.lock = threading.Lock()
+		self.delivered = []
+		self.data_calls = {}
+		self.peers = set()
+
+	async def handle_DATA(self, server, session, envelope):
+		rcpt = envelope.rcpt_tos[0]
+		with self.lock:
+			self.peers.add(session.peer)
+			calls = self.data_calls[rcpt] = self.data_calls.get(rcpt, 0) + 1
+		if rcpt.startswith("drop@") and calls == 1:
+			# Connection lost mid-transaction
+			server.transport.close()
+			return "451 dropped"
+		if rcpt.startswith("busy@") and calls == 1:
+			return "421 Service not available, closing transmission channel"
+		if rcpt.startswith("reject@"):
+			return "554 Message rejected"
+		with self.lock:
+			self.delivered.append(rcpt)
+		return "250 Message accepted"
+
+
+def free_port() -> int:
+	# aiosmtpd's Controller cannot listen on port 0
+	with socket.socket() as s:
+		s.bind(("127.0.0.1", 0))
+		return s.getsockname()[1]
+
+
+def message(to: str) -> EmailMessage:
+	msg = EmailMessage()
+	msg["From"] = "bot@example.com"
+	msg["To"] = to
+	msg["Subject"] = "Графики отключений"
+	msg.set_content("04:00 - 08:00")
+	return msg
+
+
+@unittest.skipIf(Controller is None, "needs aiosmtpd")
+class SmtpPoolTest(unittest.TestCase):
+	def setUp(self):
+		self.handler = Handler()
+		port = free_port()
+		self.controller = Controller(self.handler, hostname="127.0.0.1", port=port)
+		self.controller.start()
+		self.addCleanup(self.controller.stop)
+		self.pool = SmtpPool(SmtpSettings("127.0.0.1", port, use_ssl=False, timeout=5), size=2)
+		self.addCleanup(self.pool.close)
+
+	def test_connections_reused_across_a_batch(self):
+		results = self.pool.send_all(message(f"user{i}@example.com") for i in range(20))
+		self.assertTrue(all(r["ok"] and r["attempts"] == 1 for r in results))
+		self.assertEqual([r["to"] for r in results], [f"user{i}@example.com" for i in range(20)])
+		self.assertEqual(len(self.handler.delivered), 20)
+		self.assertLessEqual(self.pool.connects, 2)
+		self.assertEqual(len(self.handler.peers), self.pool.connects)
+		# The next batch picks up the idle connections
+		connects = self.pool.connects
+		self.assertTrue(all(r["ok"] for r in self.pool.send_all([message("late@example.com")])))
+		self.assertEqual(self.pool.connects, connects)
+
+	def test_recycled_after_max_per_connection(self):
+		self.pool.size = 1
+		self.pool.max_per_connection = 3
+		results = self.pool.send_all(message(f"user{i}@example.com") for i in range(7))
+		self.assertTrue(all(r["ok"] for r in results))
+		self.assertEqual(self.pool.connects, 3)
+
+	def test_reconnect_after_dropped_connection(self):
+		results = self.pool.send_all([message("drop@example.com")])
+		self.assertEqual((results[0]["ok"], results[0]["attempts"]), (True, 2))
+		self.assertEqual(self.handler.delivered, ["drop@example.com"])
+		self.assertEqual(self.pool.connects, 2)
+
+	def test_reconnect_after_421(self):
+		results = self.pool.send_all([message("busy@example.com"), message("ok@example.com")])
+		self.assertTrue(all(r["ok"] for r in results))
+		self.assertEqual(results[0]["attempts"], 2)
+		self.assertEqual(self.handler.data_calls["busy@example.com"], 2)
+
+	def test_permanent_error_not_retried(self):
+		results = self.pool.send_all([message("reject@example.com"), message("ok@example.com")])
+		self.assertFalse(results[0]["ok"])
+		self.assertEqual(results[0]["attempts"], 1)
+		self.assertTrue(results[0]["error"].startswith("554"))
+		self.assertEqual(self.handler.data_calls["reject@example.com"], 1)
+		self.assertTrue(results[1]["ok"])
+
+
+if __name__ == "__main__":
+	unittest.main()
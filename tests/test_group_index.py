@@ -0,0 +1,79 @@
+"""GroupIndex batching of writes, invalidation and refresh."""
+import os
+import sys
+import tempfile
+import time
+import unittest
+from unittest import mock
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from group_index import GroupIndex  # noqa: E402
+
+ADDRESSES = [("Дніпро", "вул. Тестова", str(n)) for n in range(1, 51)]
+
+
+class GroupIndexTest(unittest.TestCase):
+	def setUp(self):
+		self.tmp = tempfile.TemporaryDirectory()
+		self.addCleanup(self.tmp.cleanup)
+		self.path = os.path.join(self.tmp.name, "group_index.json")
+		self.index = GroupIndex(self.path)
+
+	def reopened(self) -> GroupIndex:
+		return GroupIndex(self.path)
+
+	def test_one_write_per_batch(self):
+		with mock.patch.object(self.index, "_save", wraps=self.index._save) as save:
+			for address in ADDRESSES:
+				self.index.put(*address, "GPV3.1")
+			self.index.put_many({a: "GPV3.1" for a in ADDRESSES[:10]})
+			self.assertEqual(save.call_count, 0)
+			self.assertFalse(os.path.exists(self.path))
+			self.assertTrue(self.index.flush())
+			self.assertFalse(self.index.flush())
+			self.assertEqual(save.call_count, 1)
+		self.assertEqual(len(self.reopened().lookup_many(ADDRESSES)), len(ADDRESSES))
+
+	def test_changed_group_replaces_entry(self):
+		self.assertFalse(self.index.put(*ADDRESSES[0], "GPV3.1"))
+		self.assertFalse(self.index.put(*ADDRESSES[0], "GPV3.1"))
+		self.assertTrue(self.index.put(*ADDRESSES[0], "GPV1.2"))
+		self.index.flush()
+		self.assertEqual(self.reopened().get(*ADDRESSES[0]), "GPV1.2")
+
+	def test_invalidate(self):
+		self.index.put_many({a: "GPV3.1" for a in ADDRESSES[:2]})
+		self.index.flush()
+		self.index.invalidate(*ADDRESSES[0])
+		self.assertIsNone(self.index.get(*ADDRESSES[0]))
+		self.assertTrue(self.index.flush())
+		reopened = self.reopened()
+		self.assertIsNone(reopened.get(*ADDRESSES[0]))
+		self.assertEqual(reopened.get(*ADDRESSES[1]), "GPV3.1")
+		# Invalidating an address that is not indexed writes nothing
+		self.index.invalidate(*ADDRESSES[5])
+		self.assertFalse(self.index.flush())
+
+	def test_expired_entries_are_not_served(self):
+		index = GroupIndex(self.path, ttl=60)
+		index.put(*ADDRESSES[0], "GPV3.1")
+		with mock.patch("group_index.time.time", return_value=time.time() + 120):
+			self.assertIsNone(index.get(*ADDRESSES[0]))
+
+	def test_refresh_stale_entries(self):
+		index = GroupIndex(self.path, refresh_after=60)
+		index.put_many({a: "GPV3.1" for a in ADDRESSES[:3]})
+		index.flush()
+		self.assertEqual(index.stale(), [])
+		later = time.time() + 120
+		with mock.patch("group_index.time.time", return_value=later):
+			self.assertEqual(len(index.stale()), 3)
+			resolved = {ADDRESSES[0]: "GPV1.2", ADDRESSES[1]: "GPV3.1", ADDRESSES[2]: RuntimeError("timeout")}
+			self.assertEqual(index.refresh(lambda addresses: resolved), 1)
+			self.assertEqual(index.stale(), [ADDRESSES[2]])
+		self.assertEqual(self.reopened().get(*ADDRESSES[0]), "GPV1.2")
+
+
+if __name__ == "__main__":
+	unittest.main()
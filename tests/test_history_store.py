@@ -0,0 +1,126 @@
+"""HistoryStore queries, and the JSON change log kept alongside HISTORY_DB."""
+import contextlib
+import io
+import json
+import os
+import sys
+import tempfile
+import unittest
+from unittest import mock
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import main  # noqa: E402
+from day_schedule import DaySchedule  # noqa: E402
+from history_store import HistoryStore  # noqa: E402
+
+ADDR = "Дніпро|вул. Тестова|12"
+
+
+def result(date: str, off: tuple = ()) -> dict:
+	"""One day, on except half-hour slots in `off`."""
+	slots = ["off" if i in off else "on" for i in range(48)]
+	return {"date": date, "off_ranges": [], "slots": slots}
+
+
+def fact_html(off_cells: range) -> str:
+	cells = "".join(
+		f'<td class="{"cell-scheduled" if h in off_cells else "cell-non-scheduled"}"></td>' for h in range(24)
+	)
+	return (
+		'<div class="discon-fact-tables"><div class="discon-fact-table" rel="1760648400"><table>'
+		f'<thead><tr>{"<th></th>" * 25}</tr></thead><tbody><tr><td colspan="2"></td>{cells}</tr></tbody>'
+		"</table></div></div>"
+	)
+
+
+class HistoryStoreTest(unittest.TestCase):
+	def setUp(self):
+		self.tmp = tempfile.TemporaryDirectory()
+		self.store = HistoryStore(os.path.join(self.tmp.name, "history.db"))
+
+	def tearDown(self):
+		self.store.close()
+		self.tmp.cleanup()
+
+	def test_writes_only_changed_dates(self):
+		day1, day2 = result("2025-10-16", (8, 9)), result("2025-10-17")
+		self.assertEqual(self.store.record(ADDR, [day1, day2], "2025-10-16T10:00:00+00:00"), ["2025-10-16", "2025-10-17"])
+		self.assertEqual(self.store.record(ADDR, [day1, day2], "2025-10-16T10:05:00+00:00"), [])
+		changed = result("2025-10-17", (20, 21, 22))
+		self.assertEqual(self.store.record(ADDR, [day1, changed], "2025-10-16T19:00:00+00:00"), ["2025-10-17"])
+		self.assertEqual(len(self.store.change_times(ADDR)), 3)
+		self.assertEqual(self.store.change_times("other"), [])
+
+	def test_versions_and_as_of(self):
+		first, second = result("2025-10-17", (8, 9)), result("2025-10-17", (8, 9, 10, 11))
+		self.store.record(ADDR, [first], "2025-10-16T10:00:00+00:00")
+		self.store.record(ADDR, [second], "2025-10-16T19:00:00+00:00")
+		versions = self.store.versions(ADDR, "2025-10-17")
+		self.assertEqual([v["slots"] for v in versions], [first["slots"], second["slots"]])
+		self.assertEqual(versions[0]["observed_at"], "2025-10-16T10:00:00+00:00")
+		self.assertEqual(self.store.schedule_as_of(ADDR, "2025-10-16T09:00:00+00:00"), [])
+		self.assertEqual(self.store.schedule_as_of(ADDR, "2025-10-16T12:00:00+00:00")[0]["slots"], first["slots"])
+		self.assertEqual(self.store.schedule_as_of(ADDR, "2025-10-17T00:00:00+00:00")[0]["slots"], second["slots"])
+		self.assertEqual(self.store.latest_fingerprints(ADDR), {"2025-10-17": DaySchedule.from_slots(second["slots"]).hex()})
+
+	def test_monthly_off_hours_uses_final_versions(self):
+		self.store.record(ADDR, [result("2025-10-30", range(8))], "2025-10-29T10:00:00+00:00")
+		self.store.record(ADDR, [result("2025-10-30", range(4))], "2025-10-29T19:00:00+00:00")
+		self.store.record(ADDR, [result("2025-10-31", range(6)), result("2025-11-01", range(48))], "2025-10-30T19:00:00+00:00")
+		self.store.record("other", [result("2025-10-30", range(2))], "2025-10-29T10:00:00+00:00")
+		self.assertEqual(self.store.monthly_off_hours(ADDR), [
+			{"address": ADDR, "month": "2025-10", "off_hours": 5.0},
+			{"address": ADDR, "month": "2025-11", "off_hours": 24.0},
+		])
+		self.assertEqual(len(self.store.monthly_off_hours()), 3)
+		self.assertEqual(
+			[(a, d) for a, d, _ in self.store.latest_days("2025-10-31", "2025-10-31")],
+			[(ADDR, "2025-10-31")],
+		)
+
+
+class ChangeLogWithHistoryTest(unittest.TestCase):
+	"""process_fact_html with HISTORY_DB keeps appending to last_state.json's `changes`."""
+
+	def setUp(self):
+		self.tmp = tempfile.TemporaryDirectory()
+		self.state_file = os.path.join(self.tmp.name, "last_state.json")
+
+		async def no_send(_message):
+			return None
+
+		patches = [
+			mock.patch.object(main, "HISTORY_DB", os.path.join(self.tmp.name, "history.db")),
+			mock.patch.object(main, "DEFAULT_STATE_FILE", self.state_file),
+			mock.patch.object(main, "STATE_JSON", True),
+			mock.patch.object(main, "EMAIL_NOTIFY", False),
+			mock.patch.object(main, "_history", None),
+			mock.patch.object(main, "send_telegram_notification", no_send),
+			mock.patch.object(main, "commit_state_file", lambda path: None),
+			mock.patch.object(main, "CITY", "Дніпро"),
+			mock.patch.object(main, "STREET", "вул. Тестова"),
+			mock.patch.object(main, "HOUSE_NUM", "12"),
+		]
+		for p in patches:
+			p.start()
+			self.addCleanup(p.stop)
+		self.addCleanup(self.tmp.cleanup)
+		self.addCleanup(lambda: main._history and main._history.close())
+
+	def process(self, html: str) -> bool:
+		with contextlib.redirect_stdout(io.StringIO()):
+			return main.process_fact_html(html)
+
+	def test_changes_log_keeps_growing(self):
+		self.assertTrue(self.process(fact_html(range(4, 8))))
+		self.assertFalse(self.process(fact_html(range(4, 8))))
+		self.assertTrue(self.process(fact_html(range(4, 10))))
+		with open(self.state_file, encoding="utf-8") as f:
+			state = json.load(f)
+		self.assertEqual(len(state["changes"]), 2)
+		self.assertEqual(len(main.history_store().change_times(main._default_address().key)), 2)
+
+
+if __name__ == "__main__":
+	unittest.main()
@@ -0,0 +1,139 @@
+"""HttpFactFetcher against a local stand-in for the DTEK shutdowns page.
+
+The server hands out a session cookie and CSRF token with the page (which
+embeds `DisconSchedule.fact`) and answers the getHomeNum POST only when both
+come back, like the site does.
+"""
+import json
+import os
+import sys
+import threading
+import unittest
+from datetime import datetime, time, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fact_parser import extract_results  # noqa: E402
+from http_fetch import HttpFactFetcher, fact_group_results, kyiv_tz, render_fact_tables_html  # noqa: E402
+
+TOKEN = "tok123"
+HOUSES = {"12": {"sub_type_reason": ["GPV3.1"]}, "14": {"sub_type_reason": ["GPV1.2"]}}
+
+
+def day_rel(offset: int = 0) -> str:
+	"""`rel` of a local day as the site writes it: UTC epoch of its Kyiv midnight."""
+	tz = kyiv_tz()
+	day = datetime.now(tz).date() + timedelta(days=offset)
+	return str(int(datetime.combine(day, time(0), tzinfo=tz).timestamp()))
+
+
+def make_fact(offset: int = 0) -> dict:
+	values = ["yes"] * 4 + ["no"] * 3 + ["first", "second", "maybe", "mfirst", "msecond"] + ["yes"] * 12
+	return {
+		"data": {
+			day_rel(offset): {
+				"GPV3.1": {str(h + 1): v for h, v in enumerate(values)},
+				"GPV1.2": {str(h + 1): "no" if 18 <= h < 22 else "yes" for h in range(24)},
+			},
+			day_rel(offset + 1): {
+				"GPV3.1": {str(h + 1): "no" if h in (10, 11) else "yes" for h in range(24)},
+				"GPV1.2": {str(h + 1): "yes" for h in range(24)},
+			},
+		},
+		"today": int(day_rel(offset)),
+	}
+
+
+class FakeSite(BaseHTTPRequestHandler):
+	fact: dict = {}
+	page_loads = 0
+
+	def log_message(self, format, *args) -> None:
+		pass
+
+	def do_GET(self) -> None:
+		type(self).page_loads += 1
+		body = (
+			f'<html><head><meta name="csrf-token" content="{TOKEN}"></head><body>'
+			f"<script>DisconSchedule.fact = {json.dumps(self.fact)}\n</script></body></html>"
+		).encode("utf-8")
+		self.send_response(200)
+		self.send_header("Content-Type", "text/html; charset=utf-8")
+		self.send_header("Set-Cookie", "sess=abc; Path=/")
+		self.send_header("Content-Length", str(len(body)))
+		self.end_headers()
+		self.wfile.write(body)
+
+	def do_POST(self) -> None:
+		form = parse_qs(self.rfile.read(int(self.headers["Content-Length"])).decode("utf-8"))
+		if self.headers.get("X-CSRF-Token") != TOKEN or "sess=abc" not in (self.headers.get("Cookie") or ""):
+			self.send_response(419)
+			self.send_header("Content-Length", "0")
+			self.end_headers()
+			return
+		assert form["method"] == ["getHomeNum"]
+		body = json.dumps({"result": True, "data": HOUSES}).encode("utf-8")
+		self.send_response(200)
+		self.send_header("Content-Type", "application/json")
+		self.send_header("Content-Length", str(len(body)))
+		self.end_headers()
+		self.wfile.write(body)
+
+
+class HttpFactFetcherTest(unittest.TestCase):
+	@classmethod
+	def setUpClass(cls) -> None:
+		cls.server = ThreadingHTTPServer(("127.0.0.1", 0), FakeSite)
+		threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+		cls.url = f"http://127.0.0.1:{cls.server.server_address[1]}/ua/shutdowns"
+
+	@classmethod
+	def tearDownClass(cls) -> None:
+		cls.server.shutdown()
+		cls.server.server_close()
+
+	def setUp(self) -> None:
+		FakeSite.fact = make_fact()
+		FakeSite.page_loads = 0
+
+	def test_group_results_match_rendered_tables(self) -> None:
+		fetcher = HttpFactFetcher(self.url)
+		results = fetcher.fetch_group_results()
+		self.assertEqual(sorted(results), ["GPV1.2", "GPV3.1"])
+		for group, parsed in results.items():
+			self.assertEqual(parsed, extract_results(render_fact_tables_html(fetcher.fact, group, fetcher.tz)))
+		self.assertEqual(fact_group_results(FakeSite.fact), results)
+		self.assertEqual(results["GPV3.1"][0]["off_ranges"], ["04:00 - 07:30", "08:30 - 09:00"])
+
+	def test_form_submit_resolves_group(self) -> None:
+		fetcher = HttpFactFetcher(self.url)
+		self.assertEqual(fetcher.resolve_group("м. Дніпро", "вул. Тестова", "12"), "GPV3.1")
+		groups = fetcher.resolve_groups([("м. Дніпро", "вул. Тестова", "14"), ("м. Дніпро", "вул. Тестова", "99")])
+		self.assertEqual(groups[("м. Дніпро", "вул. Тестова", "14")], "GPV1.2")
+		self.assertIsInstance(groups[("м. Дніпро", "вул. Тестова", "99")], Exception)
+
+	def test_fact_table_html_for_address(self) -> None:
+		fetcher = HttpFactFetcher(self.url)
+		html = fetcher.fetch_fact_table_html("м. Дніпро", "вул. Тестова", "14")
+		self.assertEqual(extract_results(html), fact_group_results(FakeSite.fact, fetcher.tz)["GPV1.2"])
+
+	def test_reused_fetcher_reloads_outdated_fact(self) -> None:
+		FakeSite.fact = make_fact(-1)
+		fetcher = HttpFactFetcher(self.url)
+		fetcher.fetch_fact_table_html("м. Дніпро", "вул. Тестова", "12")
+		self.assertFalse(fetcher.fact_is_current())
+		FakeSite.fact = make_fact()
+		loads = FakeSite.page_loads
+		html = fetcher.fetch_fact_table_html("м. Дніпро", "вул. Тестова", "12")
+		self.assertEqual(FakeSite.page_loads, loads + 1)
+		self.assertTrue(fetcher.fact_is_current())
+		self.assertEqual(extract_results(html)[0]["date"], datetime.now(fetcher.tz).date().isoformat())
+		# A current fact is reused without another page load
+		fetcher.fetch_fact_table_html("м. Дніпро", "вул. Тестова", "12")
+		self.assertEqual(FakeSite.page_loads, loads + 1)
+
+
+if __name__ == "__main__":
+	unittest.main()
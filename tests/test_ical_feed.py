@@ -0,0 +1,73 @@
+"""iCalendar feeds: stable UIDs and rewrites only on changed off intervals."""
+import os
+import re
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from http_fetch import kyiv_tz  # noqa: E402
+from ical_feed import IcalFeeds, render_feed  # noqa: E402
+
+KEY = "Дніпро|вул. Тестова|12"
+LABEL = "Дніпро, вул. Тестова, 12"
+
+
+def results(*ranges: str, slots=None) -> list:
+	return [{"date": "2025-10-16", "off_ranges": list(ranges), "slots": slots or []}]
+
+
+def uids(feed: str) -> list:
+	return re.findall(r"^UID:(.+)\r$", feed, re.M)
+
+
+class RenderFeedTest(unittest.TestCase):
+	def test_uids_stable_across_changes(self):
+		before = uids(render_feed(KEY, LABEL, results("04:00 - 08:00", "20:00 - 22:00")))
+		after = uids(render_feed(KEY, LABEL, results("04:00 - 08:00", "20:00 - 23:00")))
+		self.assertEqual(len(before), 2)
+		self.assertEqual(before[0], after[0])
+		self.assertNotEqual(before[1], after[1])
+		self.assertNotEqual(uids(render_feed("other|x|1", LABEL, results("04:00 - 08:00")))[0], before[0])
+
+	def test_events_in_utc(self):
+		feed = render_feed(KEY, LABEL, results("22:00 - 24:00"), kyiv_tz())
+		# 2025-10-16 is EEST (UTC+3); 24:00 is the next midnight
+		self.assertIn("DTSTART:20251016T190000Z\r\n", feed)
+		self.assertIn("DTEND:20251016T210000Z\r\n", feed)
+		self.assertTrue(all(len(line.encode("utf-8")) <= 75 for line in feed.split("\r\n")))
+
+
+class IcalFeedsTest(unittest.TestCase):
+	def setUp(self):
+		self.tmp = tempfile.TemporaryDirectory()
+		self.addCleanup(self.tmp.cleanup)
+		self.feeds = IcalFeeds(self.tmp.name)
+
+	def read(self, path: str) -> str:
+		with open(path, encoding="utf-8", newline="") as f:
+			return f.read()
+
+	def test_rewritten_only_when_off_intervals_change(self):
+		path = self.feeds.update(KEY, LABEL, results("04:00 - 08:00"))
+		self.assertIsNotNone(path)
+		first = self.read(path)
+		mtime = os.stat(path).st_mtime_ns
+		# Same off ranges, different non-off slots: nothing to write
+		self.assertIsNone(self.feeds.update(KEY, LABEL, results("04:00 - 08:00", slots=["maybe"] * 48)))
+		self.assertEqual(os.stat(path).st_mtime_ns, mtime)
+		self.assertEqual(self.read(path), first)
+		# A reopened directory remembers what the feed was written from
+		self.assertIsNone(IcalFeeds(self.tmp.name).update(KEY, LABEL, results("04:00 - 08:00")))
+		self.assertEqual(self.feeds.update(KEY, LABEL, results("04:00 - 09:00")), path)
+		self.assertIn("DTEND:20251016T060000Z", self.read(path))
+
+	def test_deleted_feed_is_rewritten(self):
+		path = self.feeds.update(KEY, LABEL, results("04:00 - 08:00"))
+		os.remove(path)
+		self.assertEqual(self.feeds.update(KEY, LABEL, results("04:00 - 08:00")), path)
+
+
+if __name__ == "__main__":
+	unittest.main()
@@ -0,0 +1,70 @@
+"""Read API ETags and conditional requests against a live local server."""
+import http.client
+import json
+import os
+import sys
+import unittest
+from urllib.parse import quote
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from read_api import ResultCache, serve_in_background  # noqa: E402
+
+KEY = "Дніпро|вул. Тестова|12"
+
+
+def results(off_from: int) -> list:
+	slots = ["off" if off_from <= i < off_from + 4 else "on" for i in range(48)]
+	return [{"date": "2025-10-16", "off_ranges": [], "slots": slots}]
+
+
+class ReadApiTest(unittest.TestCase):
+	def setUp(self):
+		self.cache = ResultCache()
+		self.cache.put(KEY, results(8), "вул. Тестова, 12")
+		self.server = serve_in_background(self.cache, "127.0.0.1", 0)
+		self.addCleanup(self.server.server_close)
+		self.addCleanup(self.server.shutdown)
+		self.port = self.server.server_address[1]
+
+	def get(self, path: str, etag: str = "", method: str = "GET"):
+		conn = http.client.HTTPConnection("127.0.0.1", self.port, timeout=5)
+		self.addCleanup(conn.close)
+		conn.request(method, path, headers={"If-None-Match": etag} if etag else {})
+		resp = conn.getresponse()
+		return resp.status, resp.getheader("ETag"), resp.read()
+
+	def test_etag_and_304(self):
+		path = "/schedules/" + quote(KEY)
+		status, etag, body = self.get(path)
+		self.assertEqual(status, 200)
+		self.assertTrue(etag.startswith('"'))
+		self.assertEqual(json.loads(body)["address"], KEY)
+		self.assertEqual(self.get(path, etag)[:2], (304, etag))
+		self.assertEqual(self.get(path, "W/" + etag)[0], 304)
+		self.assertEqual(self.get(path, '"other", ' + etag)[0], 304)
+		self.assertEqual(self.get(path, '"other"')[0], 200)
+		self.assertEqual(self.get(path, etag, "HEAD")[0], 304)
+
+	def test_etag_changes_only_with_the_schedule(self):
+		path = "/schedules/" + quote(KEY)
+		_, etag, _ = self.get(path)
+		_, index_etag, _ = self.get("/schedules")
+		self.assertFalse(self.cache.put(KEY, results(8)))
+		self.assertEqual(self.get(path, etag)[0], 304)
+		self.assertTrue(self.cache.put(KEY, results(20)))
+		status, new_etag, body = self.get(path, etag)
+		self.assertEqual(status, 200)
+		self.assertNotEqual(new_etag, etag)
+		self.assertEqual(json.loads(body)["results"][0]["slots"][20], "off")
+		status, new_index_etag, body = self.get("/schedules", index_etag)
+		self.assertEqual(status, 200)
+		self.assertEqual(json.loads(body)["addresses"][0]["etag"], new_etag)
+		self.assertNotEqual(new_index_etag, index_etag)
+
+	def test_unknown_address(self):
+		self.assertEqual(self.get("/schedules/" + quote("nowhere|x|1"))[0], 404)
+
+
+if __name__ == "__main__":
+	unittest.main()
@@ -0,0 +1,120 @@
+"""ReminderScheduler rescheduling and overdue lead handling on a fake clock."""
+import os
+import sys
+import threading
+import time
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from http_fetch import kyiv_tz  # noqa: E402
+from outage_index import result_intervals  # noqa: E402
+from reminders import ReminderScheduler  # noqa: E402
+
+KEY = "Дніпро|вул. Тестова|12"
+TZ = kyiv_tz()
+
+
+def results(start_slot: int, end_slot: int) -> list:
+	slots = ["off" if start_slot <= i < end_slot else "on" for i in range(48)]
+	return [{"date": "2025-10-16", "off_ranges": [], "slots": slots}]
+
+
+def bounds(start_slot: int, end_slot: int) -> tuple:
+	return result_intervals(results(start_slot, end_slot), TZ)[0]
+
+
+class Clock:
+	def __init__(self, now: float):
+		self.now = now
+
+	def __call__(self) -> float:
+		return self.now
+
+
+class ReminderSchedulerTest(unittest.TestCase):
+	def scheduler(self, now: float, leads=(30,)) -> ReminderScheduler:
+		self.clock = Clock(now)
+		self.sent = []
+		return ReminderScheduler(self.sent.extend, list(leads), restore_notice=True, clock=self.clock)
+
+	def due(self, scheduler: ReminderScheduler, at: float) -> list:
+		self.clock.now = at
+		return [body for _, body in scheduler._pop_due(at)]
+
+	def test_reminder_and_restore(self):
+		start, end = bounds(20, 24)  # 10:00 - 12:00
+		s = self.scheduler(start - 3 * 3600)
+		self.assertEqual(s.update(KEY, results(20, 24), "Тестова, 12", TZ), 2)
+		self.assertEqual(self.due(s, start - 31 * 60), [])
+		self.assertEqual(self.due(s, start - 30 * 60), ["Тестова, 12\n\nЧерез 30 мин отключение света: 10:00 - 12:00"])
+		self.assertEqual(self.due(s, end), ["Тестова, 12\n\nСвет должен вернуться в 12:00 (отключение 10:00 - 12:00)"])
+		self.assertEqual(len(s), 0)
+
+	def test_unchanged_schedule_keeps_pending_events(self):
+		start, _ = bounds(20, 24)
+		s = self.scheduler(start - 3 * 3600)
+		s.update(KEY, results(20, 24))
+		heap_size = len(s._heap)
+		self.assertEqual(s.update(KEY, results(20, 24)), 2)
+		self.assertEqual(len(s._heap), heap_size)
+
+	def test_reschedule_drops_old_events(self):
+		start, _ = bounds(20, 24)
+		new_start, new_end = bounds(28, 30)  # moved to 14:00 - 15:00
+		s = self.scheduler(start - 3 * 3600)
+		s.update(KEY, results(20, 24))
+		s.update(KEY, results(28, 30))
+		self.assertEqual(len(s), 2)
+		self.assertEqual(self.due(s, start + 3600), [])
+		self.assertEqual(self.due(s, new_start - 30 * 60), ["Через 30 мин отключение света: 14:00 - 15:00"])
+		self.assertEqual(self.due(s, new_end), ["Свет должен вернуться в 15:00 (отключение 14:00 - 15:00)"])
+
+	def test_sent_reminder_not_repeated_after_extension(self):
+		start, _ = bounds(20, 24)
+		s = self.scheduler(start - 3 * 3600)
+		s.update(KEY, results(20, 24))
+		self.assertEqual(len(self.due(s, start - 30 * 60)), 1)
+		# Same start, later end: only the new restore notice is pending
+		self.assertEqual(s.update(KEY, results(20, 26)), 1)
+		self.assertEqual(self.due(s, start), [])
+		self.assertEqual(self.due(s, bounds(20, 26)[1]), ["Свет должен вернуться в 13:00 (отключение 10:00 - 13:00)"])
+
+	def test_overdue_leads(self):
+		start, _ = bounds(20, 24)
+		s = self.scheduler(start - 20 * 60, leads=(60, 30, 10))
+		# 60 and 30 min have passed: only the 30-minute one is sent, right away and with the real time left
+		self.assertEqual(s.update(KEY, results(20, 24)), 3)
+		self.assertEqual(self.due(s, start - 20 * 60), ["Через 20 мин отключение света: 10:00 - 12:00"])
+		self.assertEqual(self.due(s, start - 10 * 60), ["Через 10 мин отключение света: 10:00 - 12:00"])
+
+	def test_started_outage_only_gets_restore_notice(self):
+		start, end = bounds(20, 24)
+		s = self.scheduler(start + 60)
+		self.assertEqual(s.update(KEY, results(20, 24)), 1)
+		self.assertEqual(self.due(s, end), ["Свет должен вернуться в 12:00 (отключение 10:00 - 12:00)"])
+
+	def test_dispatcher_wakes_for_an_earlier_event(self):
+		start, _ = bounds(20, 24)
+		# The clock runs in real time from 2 h before the 30-minute reminder
+		offset = start - 30 * 60 - 2 * 3600 - time.time()
+		done = threading.Event()
+		batches = []
+
+		def send(batch):
+			batches.append(batch)
+			done.set()
+
+		s = ReminderScheduler(send, [30], restore_notice=False, clock=lambda: time.time() + offset).start()
+		self.addCleanup(s.stop)
+		s.update("later", results(40, 42))
+		time.sleep(0.1)
+		# Due 0.2 s from now: the waiting dispatcher must be woken for it
+		offset = start - 30 * 60 - 0.2 - time.time()
+		s.update(KEY, results(20, 24))
+		self.assertTrue(done.wait(5))
+		self.assertEqual([k for k, _ in batches[0]], [KEY])
+
+
+if __name__ == "__main__":
+	unittest.main()
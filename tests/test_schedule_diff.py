@@ -0,0 +1,105 @@
+"""Per-date change classification in schedule_diff."""
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from day_schedule import DaySchedule  # noqa: E402
+from schedule_diff import day_fingerprints, describe_delta, diff_day, diff_results  # noqa: E402
+
+DATE = "2025-10-16"
+
+
+def day(**spans) -> list:
+	"""48 'on' slots with `status=[(start_hour, end_hour), ...]` spans applied."""
+	slots = ["on"] * 48
+	for status, runs in spans.items():
+		for start, end in runs:
+			slots[int(start * 2):int(end * 2)] = [status] * int((end - start) * 2)
+	return slots
+
+
+def fp(slots: list) -> str:
+	return DaySchedule.from_slots(slots).hex()
+
+
+def delta(prev: list, cur: list) -> dict:
+	return diff_day(DATE, fp(prev), fp(cur))
+
+
+class DiffDayTest(unittest.TestCase):
+	def test_unchanged(self):
+		slots = day(off=[(4, 8)], maybe=[(10, 12)])
+		self.assertIsNone(diff_day(DATE, fp(slots), fp(slots)))
+		self.assertEqual(diff_results({DATE: fp(slots)}, [{"date": DATE, "slots": slots}]), [])
+
+	def test_new_date(self):
+		d = diff_day(DATE, None, fp(day(off=[(4, 8)])))
+		self.assertEqual(d["kind"], "new")
+		self.assertEqual(d["added"], ["04:00 - 08:00"])
+		self.assertEqual(describe_delta(d), [" Опубликован новый график"])
+
+	def test_added_and_removed(self):
+		d = delta(day(off=[(4, 8)]), day(off=[(14, 16)]))
+		self.assertEqual(d["kind"], "changed")
+		self.assertEqual(d["added"], ["14:00 - 16:00"])
+		self.assertEqual(d["removed"], ["04:00 - 08:00"])
+
+	def test_extended(self):
+		d = delta(day(off=[(4, 8)]), day(off=[(3.5, 9)]))
+		self.assertEqual(d["extended"], [("04:00 - 08:00", "03:30 - 09:00")])
+		self.assertEqual(d["added"] + d["removed"], [])
+
+	def test_shortened(self):
+		d = delta(day(off=[(4, 8)]), day(off=[(5, 7)]))
+		self.assertEqual(d["shortened"], [("04:00 - 08:00", "05:00 - 07:00")])
+
+	def test_moved(self):
+		d = delta(day(off=[(4, 8)]), day(off=[(6, 10)]))
+		self.assertEqual(d["moved"], [("04:00 - 08:00", "06:00 - 10:00")])
+
+	def test_merge_is_removed_and_added(self):
+		d = delta(day(off=[(4, 6), (7, 9)]), day(off=[(4, 9)]))
+		self.assertEqual(d["added"], ["04:00 - 09:00"])
+		self.assertEqual(d["removed"], ["04:00 - 06:00", "07:00 - 09:00"])
+
+	def test_maybe_resolved_off_reported_once(self):
+		d = delta(day(off=[(4, 8)], maybe=[(10, 12)]), day(off=[(4, 8), (10, 12)]))
+		self.assertEqual(d["maybe_resolved"], {"off": ["10:00 - 12:00"], "on": []})
+		self.assertEqual(d["added"], [])
+		self.assertEqual(describe_delta(d), [" ! возможное отключение подтверждено 10:00 - 12:00"])
+
+	def test_off_run_beyond_maybe_is_still_added(self):
+		d = delta(day(maybe=[(10, 12)]), day(off=[(9, 12)]))
+		self.assertEqual(d["added"], ["09:00 - 12:00"])
+		self.assertEqual(d["maybe_resolved"]["off"], ["10:00 - 12:00"])
+
+	def test_maybe_resolved_on(self):
+		d = delta(day(maybe=[(10, 12)]), day())
+		self.assertEqual(d["maybe_resolved"], {"off": [], "on": ["10:00 - 12:00"]})
+		self.assertEqual(describe_delta(d), [" ✓ возможное отключение не состоится 10:00 - 12:00"])
+
+	def test_maybe_added(self):
+		d = delta(day(), day(maybe=[(18, 20)]))
+		self.assertEqual(d["maybe_added"], ["18:00 - 20:00"])
+		self.assertEqual(describe_delta(d), [" ? возможное отключение 18:00 - 20:00"])
+
+	def test_only_changed_dates(self):
+		today, tomorrow = day(off=[(4, 8)]), day(off=[(12, 14)])
+		prev = day_fingerprints([{"date": DATE, "slots": today}])
+		results = [{"date": DATE, "slots": today}, {"date": "2025-10-17", "slots": tomorrow}]
+		deltas = diff_results(prev, results)
+		self.assertEqual([(d["date"], d["kind"]) for d in deltas], [("2025-10-17", "new")])
+
+	def test_describe_lines(self):
+		d = delta(day(off=[(4, 8), (20, 22)]), day(off=[(4, 9), (14, 15)]))
+		self.assertEqual(describe_delta(d), [
+			" + новое отключение 14:00 - 15:00",
+			" − отменено отключение 20:00 - 22:00",
+			" ↑ продлено 04:00 - 08:00 → 04:00 - 09:00",
+		])
+
+
+if __name__ == "__main__":
+	unittest.main()
@@ -0,0 +1,74 @@
+"""SnapshotStore deduplication and the HTTP engine's raw fact round trip."""
+import glob
+import os
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from http_fetch import RawFact, kyiv_tz, raw_fact_html, render_fact_tables_html  # noqa: E402
+from snapshot_store import SnapshotStore  # noqa: E402
+
+HTML = '<div class="discon-fact-tables"><div class="discon-fact-table" rel="1760648400"></div></div>'
+FACT = {
+	"today": 1760648400,
+	"data": {"1760648400": {
+		"GPV3.1": {str(h): "no" if h in (9, 10) else "yes" for h in range(1, 25)},
+		"GPV1.2": {str(h): "yes" for h in range(1, 25)},
+	}},
+}
+HOUSES = {"12": {"sub_type_reason": ["GPV3.1"]}, "14": {"sub_type_reason": ["GPV1.2"]}}
+
+
+class SnapshotStoreTest(unittest.TestCase):
+	def setUp(self):
+		self.tmp = tempfile.TemporaryDirectory()
+		self.addCleanup(self.tmp.cleanup)
+		self.store = SnapshotStore(self.tmp.name)
+
+	def objects(self, kind: str) -> list:
+		return glob.glob(os.path.join(self.tmp.name, "objects", "*", f"*.{kind}.*"))
+
+	def test_identical_content_stored_once(self):
+		first = self.store.put(HTML, "a", "2025-10-16T10:00:00+00:00")
+		second = self.store.put(HTML, "b", "2025-10-16T10:05:00+00:00")
+		other = self.store.put(HTML.replace("1760648400", "1760734800"), "a", "2025-10-16T10:10:00+00:00")
+		self.assertEqual(first, second)
+		self.assertNotEqual(first, other)
+		self.assertEqual(len(self.objects("html")), 2)
+		self.assertEqual(self.store.get(first), HTML)
+		self.assertEqual(len(list(self.store.iter_index())), 3)
+		self.assertEqual([e["hash"] for e in self.store.iter_index("a")], [first, other])
+		self.assertEqual(len(list(self.store.iter_index(since="2025-10-16T10:01:00+00:00"))), 2)
+
+	def test_http_round_trip(self):
+		digest = self.store.put_http(FACT, "GPV3.1", "12", HOUSES, "a", "2025-10-16T10:00:00+00:00")
+		doc = self.store.get_http(digest)
+		self.assertEqual(doc, {"fact": FACT, "group": "GPV3.1", "house": "12", "houses": HOUSES})
+		entry = next(self.store.iter_index())
+		self.assertEqual((entry["kind"], entry["hash"]), ("http", digest))
+		html = raw_fact_html(RawFact(**doc), kyiv_tz())
+		self.assertEqual(html, render_fact_tables_html(FACT, "GPV3.1", kyiv_tz()))
+
+	def test_fact_shared_between_addresses(self):
+		a = self.store.put_http(FACT, "GPV3.1", "12", HOUSES, "a")
+		b = self.store.put_http(FACT, "GPV1.2", "14", HOUSES, "b")
+		again = self.store.put_http(FACT, "GPV3.1", "12", HOUSES, "a")
+		self.assertNotEqual(a, b)
+		self.assertEqual(a, again)
+		self.assertEqual(len(self.objects("fact")), 1)
+		self.assertEqual(len(self.objects("http")), 2)
+
+	def test_replay_resolves_group_from_houses(self):
+		# A stale indexed group is corrected by the stored getHomeNum data
+		raw = RawFact(**self.store.get_http(self.store.put_http(FACT, "GPV1.2", "12", HOUSES)))
+		self.assertEqual(raw_fact_html(raw), render_fact_tables_html(FACT, "GPV3.1"))
+
+	def test_missing_object(self):
+		with self.assertRaises(KeyError):
+			self.store.get("0" * 64)
+
+
+if __name__ == "__main__":
+	unittest.main()
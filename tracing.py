@@ -0,0 +1,132 @@
+"""Lightweight timing spans for the scrape pipeline.
+
+Wrap a stage in `with span("name"):` and it is recorded in the process-wide
+`TRACER`. At the end of a run the spans can be exported as JSON lines or as a
+Chrome trace (open in chrome://tracing or Perfetto) and summarised as a
+per-stage table.
+
+Configuration:
+- TRACE_FILE: export path; `.json` writes a Chrome trace, anything else JSON lines.
+  Both formats append, so --watch / --daemon keep every poll: the Chrome
+  trace uses the JSON array form, which the viewers read without the
+  closing bracket, with timestamps on the wall clock
+- TRACE_FORMAT: force `chrome` or `jsonl` regardless of the extension
+"""
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, List, Optional
+
+
+class Tracer:
+	"""Collects completed spans; safe to use from several worker threads."""
+
+	def __init__(self):
+		self._lock = threading.Lock()
+		self._origin = time.perf_counter()
+		self._wall_origin = time.time()
+		self.spans: List[dict] = []
+
+	def reset(self) -> None:
+		with self._lock:
+			self.spans = []
+			self._origin = time.perf_counter()
+			self._wall_origin = time.time()
+
+	@contextmanager
+	def span(self, name: str, **attrs):
+		start = time.perf_counter()
+		error = None
+		try:
+			yield
+		except BaseException as e:
+			error = e.__class__.__name__
+			raise
+		finally:
+			end = time.perf_counter()
+			record = {
+				"name": name,
+				"start_ms": round((start - self._origin) * 1000, 3),
+				"dur_ms": round((end - start) * 1000, 3),
+				"thread": threading.current_thread().name,
+				"tid": threading.get_ident(),
+			}
+			if attrs:
+				record["attrs"] = attrs
+			if error:
+				record["error"] = error
+			with self._lock:
+				self.spans.append(record)
+
+	def export_jsonl(self, path: str) -> None:
+		with self._lock:
+			spans = list(self.spans)
+		with open(path, "a", encoding="utf-8") as f:
+			for s in spans:
+				f.write(json.dumps(dict(s, run_started=self._wall_origin), ensure_ascii=False) + "\n")
+
+	def export_chrome_trace(self, path: str) -> None:
+		with self._lock:
+			spans = list(self.spans)
+		pid = os.getpid()
+		origin_us = self._wall_origin * 1e6
+		events = [
+			{
+				"name": s["name"],
+				"ph": "X",
+				"ts": int(origin_us + s["start_ms"] * 1000),
+				"dur": int(s["dur_ms"] * 1000),
+				"pid": pid,
+				"tid": s["tid"],
+				"args": dict(s.get("attrs") or {}, **({"error": s["error"]} if "error" in s else {})),
+			}
+			for s in spans
+		]
+		try:
+			with open(path, "r", encoding="utf-8") as f:
+				started = f.read(1) == "["
+		except FileNotFoundError:
+			started = False
+		# A file in another format (or empty) is started over
+		with open(path, "a" if started else "w", encoding="utf-8") as f:
+			if not started:
+				f.write("[\n")
+			for event in events:
+				f.write(json.dumps(event, ensure_ascii=False) + ",\n")
+
+	def export(self, path: Optional[str] = None, fmt: Optional[str] = None) -> Optional[str]:
+		"""Export to TRACE_FILE (or `path`); returns the path written, if any."""
+		path = path or os.environ.get("TRACE_FILE")
+		if not path:
+			return None
+		fmt = (fmt or os.environ.get("TRACE_FORMAT") or ("chrome" if path.endswith(".json") else "jsonl")).lower()
+		if fmt == "chrome":
+			self.export_chrome_trace(path)
+		else:
+			self.export_jsonl(path)
+		return path
+
+	def summary(self) -> str:
+		"""Per-stage table: count, total, mean and max duration, sorted by total."""
+		with self._lock:
+			spans = list(self.spans)
+		if not spans:
+			return "No spans recorded"
+		stats: Dict[str, List[float]] = {}
+		for s in spans:
+			stats.setdefault(s["name"], []).append(s["dur_ms"])
+		rows = sorted(stats.items(), key=lambda kv: sum(kv[1]), reverse=True)
+		width = max(len("stage"), max(len(name) for name in stats))
+		lines = [f"{'stage':<{width}}  {'count':>5}  {'total ms':>10}  {'mean ms':>9}  {'max ms':>9}"]
+		for name, durs in rows:
+			total = sum(durs)
+			lines.append(
+				f"{name:<{width}}  {len(durs):>5}  {total:>10.1f}  {total / len(durs):>9.1f}  {max(durs):>9.1f}"
+			)
+		return "\n".join(lines)
+
+
+TRACER = Tracer()
+span = TRACER.span